@@ -15,5 +15,16 @@ else:
     from urllib2 import urlopen, HTTPError
     STRING_BASE_CLASS = basestring
 
+try:
+    from time import perf_counter
+except ImportError:
+    from time import time as perf_counter
+
+try:
+    from inspect import iscoroutinefunction
+except ImportError:
+    def iscoroutinefunction(obj):
+        return False
+
 def unicode_str(x=''):
     return str(x) if PY_VER == 3 else unicode(x, encoding='utf-8')
@@ -0,0 +1,201 @@
+""" Asynchronous (asyncio) service lookups for the service registry.
+
+This module uses 'async' syntax (and so requires Python 3.5 or later). It is
+only imported by the service registry when an asynchronous lookup is made.
+
+"""
+
+
+# Standard library imports.
+import asyncio
+
+# Local imports.
+from .service_registry import compile_query
+from ._compat import perf_counter
+
+
+async def find_services_async(registry, protocol, query, minimize, maximize,
+                              properties):
+    """ Return all services that match the specified query.
+
+    This is 'get_services_async' without the monitoring.
+
+    """
+
+    if query:
+        try:
+            query = compile_query(query)
+
+        # A query that can't be compiled doesn't match any services.
+        except SyntaxError:
+            return []
+
+    actual_protocol, service_ids = registry._get_candidates(
+        protocol, properties
+    )
+
+    entries = []
+    for service_id in service_ids:
+        entry = registry._services.get(service_id)
+        if entry is not None:
+            entries.append((service_id,) + entry)
+
+    # Create any services that are still factories concurrently.
+    objs = await asyncio.gather(*[
+        resolve_factory_async(
+            registry, actual_protocol, name, obj, service_properties,
+            service_id
+        )
+
+        for service_id, name, obj, service_properties in entries
+    ])
+
+    services = []
+    for obj, (service_id, name, factory, service_properties) in zip(
+        objs, entries
+    ):
+        # If a query was specified then only add the service if it matches
+        # it!
+        if not query or registry._eval_query(
+            name, obj, service_properties, query
+        ):
+            services.append(obj)
+            if service_id in registry._policies:
+                registry._touch_service(name, service_id)
+
+    return registry._sort_services(services, minimize, maximize)
+
+
+async def get_service_async(registry, protocol, query, minimize, maximize,
+                            properties):
+    """ Return at most one service that matches the specified query. """
+
+    services = await get_services_async(
+        registry, protocol, query, minimize, maximize, properties
+    )
+    if len(services) > 0:
+        service = services[0]
+
+    else:
+        service = None
+
+    return service
+
+
+async def get_services_async(registry, protocol, query, minimize, maximize,
+                             properties):
+    """ Return all services that match the specified query. """
+
+    registry._check_idle_services()
+
+    start = perf_counter()
+    services = await find_services_async(
+        registry, protocol, query, minimize, maximize, properties
+    )
+
+    if registry.monitor is not None:
+        registry.monitor.record_lookup(
+            registry._get_protocol_name(protocol), perf_counter() - start,
+            len(services)
+        )
+
+    return services
+
+
+async def create_service_async(registry, protocol, name, factory,
+                               properties, service_id):
+    """ Use a factory to create a service.
+
+    This runs in its own task (shared by all of the lookups of the service),
+    so that cancelling any one lookup does not cancel the creation of the
+    service.
+
+    """
+
+    try:
+        if isinstance(factory, str):
+            factory = registry._import_manager.import_symbol(factory)
+
+        if asyncio.iscoroutinefunction(factory):
+            start = perf_counter()
+            try:
+                obj = await factory(**properties)
+
+            except Exception:
+                if registry.monitor is not None:
+                    registry.monitor.record_factory(
+                        name, perf_counter() - start, failed=True
+                    )
+                raise
+
+            if registry.monitor is not None:
+                registry.monitor.record_factory(name, perf_counter() - start)
+
+            registry._set_service(service_id, obj)
+
+        else:
+            obj = registry._resolve_factory(
+                protocol, name, factory, properties, service_id
+            )
+
+    finally:
+        with registry._lock:
+            del registry._pending_async_services[service_id]
+
+    return obj
+
+
+async def resolve_factory_async(registry, protocol, name, obj, properties,
+                                service_id):
+    """ If 'obj' is a factory then use it to create the actual service.
+
+    Coroutine factories are awaited, and all concurrent lookups of the same
+    service share a single call to the factory. Any other factories are called
+    synchronously.
+
+    """
+
+    if not registry._is_service_factory(protocol, obj):
+        return obj
+
+    with registry._lock:
+        # Another lookup may have created the service (or unregistered it)
+        # since we looked it up.
+        entry = registry._services.get(service_id)
+        if entry is not None:
+            name, obj, properties = entry
+            if not registry._is_service_factory(protocol, obj):
+                return obj
+
+        # If another lookup is already creating the service then we wait for
+        # it to finish rather than calling the factory again.
+        task = registry._pending_async_services.get(service_id)
+        if task is None:
+            task = asyncio.ensure_future(
+                create_service_async(
+                    registry, protocol, name, obj, properties, service_id
+                )
+            )
+            task.add_done_callback(_retrieve_exception)
+            registry._pending_async_services[service_id] = task
+
+    # Every lookup (including the one that created the task) shields the task
+    # so that cancelling one lookup does not cancel the creation of the
+    # service for everybody else.
+    return await asyncio.shield(task)
+
+
+def _retrieve_exception(task):
+    """ Mark the exception (if any) of a finished task as retrieved.
+
+    This stops asyncio from complaining if every lookup that was waiting for
+    the service has been cancelled.
+
+    """
+
+    if not task.cancelled():
+        task.exception()
+
+    return
+
+#### EOF ######################################################################
@@ -0,0 +1,8 @@
+# This file was automatically generated from the `setup.py` script.
+version = '4.6.0'
+full_version = '4.6.0.dev0'
+git_revision = 'Unknown'
+is_released = False
+
+if not is_released:
+    version = full_version
@@ -21,6 +21,7 @@ from .extension_point_binding import ExtensionPointBinding, bind_extension_point
 from .extension_provider import ExtensionProvider
 from .extension_point_changed_event import ExtensionPointChangedEvent
 from .import_manager import ImportManager
+from .import_prefetcher import ImportPrefetcher
 from .plugin import Plugin
 from .plugin_activator import PluginActivator
 from .plugin_extension_registry import PluginExtensionRegistry
@@ -28,7 +29,10 @@ from .plugin_manager import PluginManager
 from .provider_extension_registry import ProviderExtensionRegistry
 from .service import Service
 from .service_offer import ServiceOffer
+from .service_policy import ServicePolicy
 from .service_registry import NoSuchServiceError, ServiceRegistry
+from .service_registry import compile_query
+from .service_registry_monitor import ServiceRegistryMonitor
 from .twisted_application import TwistedApplication
 from .unknown_extension import UnknownExtension
 from .unknown_extension_point import UnknownExtensionPoint
@@ -8,7 +8,7 @@ import logging, os
 from traits.etsconfig.api import ETSConfig
 from apptools.preferences.api import IPreferences, ScopedPreferences
 from apptools.preferences.api import set_default_preferences
-from traits.api import Delegate, Event, HasTraits, Instance, Str
+from traits.api import Bool, Delegate, Event, HasTraits, Instance, Str
 from traits.api import VetoableEvent, provides
 
 # Local imports.
@@ -77,6 +77,22 @@ class Application(HasTraits):
     # Fired when a plugin has been removed.
     plugin_removed = Delegate('plugin_manager', modify=True)
 
+    #### 'IServiceRegistry' interface #########################################
+
+    #### Events ####
+
+    # Fired when a service is registered.
+    registered = Delegate('service_registry', modify=True)
+
+    # Fired when a service is unregistered.
+    unregistered = Delegate('service_registry', modify=True)
+
+    # Fired when a batch of services is registered.
+    services_registered = Delegate('service_registry', modify=True)
+
+    # Fired when a batch of services is unregistered.
+    services_unregistered = Delegate('service_registry', modify=True)
+
     #### 'Application' interface ##############################################
 
     # These traits allow application developers to build completely different
@@ -92,11 +108,24 @@ class Application(HasTraits):
     # The service registry.
     service_registry = Instance(IServiceRegistry)
 
+    # Should the symbols contributed to the core extension points (service
+    # offer protocols and factories, and category classes) be imported on a
+    # background thread when the application is started? This means that the
+    # first use of each symbol does not have to wait for it to be imported.
+    #
+    # See 'ImportPrefetcher' for details.
+    prefetch_imports = Bool(False)
+
     #### Private interface ####################################################
 
     # The import manager.
     _import_manager = Instance(IImportManager, factory=ImportManager)
 
+    # The import prefetcher (if 'prefetch_imports' is True).
+    _import_prefetcher = Instance(
+        'envisage.import_prefetcher.ImportPrefetcher'
+    )
+
     ###########################################################################
     # 'object' interface.
     ###########################################################################
@@ -197,6 +226,11 @@ class Application(HasTraits):
 
         return
 
+    def batch(self):
+        """ Return a context manager that batches changes to extensions. """
+
+        return self.extension_registry.batch()
+
     def get_extensions(self, extension_point_id):
         """ Return a list containing all contributions to an extension point.
 
@@ -204,6 +238,26 @@ class Application(HasTraits):
 
         return self.extension_registry.get_extensions(extension_point_id)
 
+    def get_extensions_generation(self, extension_point_id=None):
+        """ Return the generation of the extensions to an extension point. """
+
+        return self.extension_registry.get_extensions_generation(
+            extension_point_id
+        )
+
+    def get_extensions_view(self, extension_point_id):
+        """ Return a read-only view of the extensions to an extension point.
+        """
+
+        return self.extension_registry.get_extensions_view(extension_point_id)
+
+    def get_keyed_extension(self, extension_point_id, key):
+        """ Return the contribution to a keyed extension point with a key. """
+
+        return self.extension_registry.get_keyed_extension(
+            extension_point_id, key
+        )
+
     def get_extension_point(self, extension_point_id):
         """ Return the extension point with the specified Id. """
 
@@ -295,6 +349,10 @@ class Application(HasTraits):
             # plugins).
             self.plugin_manager.start()
 
+            # Start importing lazily referenced symbols in the background.
+            if self.prefetch_imports:
+                self._start_import_prefetcher()
+
             # Lifecycle event.
             self.started = self._create_application_event()
 
@@ -351,7 +409,8 @@ class Application(HasTraits):
     # 'IServiceRegistry' interface.
     ###########################################################################
 
-    def get_required_service(self, protocol, query='', minimize='',maximize=''):
+    def get_required_service(self, protocol, query='', minimize='',maximize='',
+                             properties=None):
         """ Return the service that matches the specified query.
 
         Raise a 'NoSuchServiceError' exception if no such service exists.
@@ -359,20 +418,33 @@ class Application(HasTraits):
         """
 
         service = self.service_registry.get_required_service(
-            protocol, query, minimize, maximize
+            protocol, query, minimize, maximize, properties
         )
 
         return service
 
-    def get_service(self, protocol, query='', minimize='', maximize=''):
+    def get_service(self, protocol, query='', minimize='', maximize='',
+                    properties=None):
         """ Return at most one service that matches the specified query. """
 
         service = self.service_registry.get_service(
-            protocol, query, minimize, maximize
+            protocol, query, minimize, maximize, properties
         )
 
         return service
 
+    def get_service_async(self, protocol, query='', minimize='', maximize='',
+                          properties=None):
+        """ Return at most one service that matches the specified query.
+
+        This is a coroutine (i.e. its result must be awaited).
+
+        """
+
+        return self.service_registry.get_service_async(
+            protocol, query, minimize, maximize, properties
+        )
+
     def get_service_from_id(self, service_id):
         """ Return the service with the specified id. """
 
@@ -383,24 +455,61 @@ class Application(HasTraits):
 
         return self.service_registry.get_service_properties(service_id)
 
-    def get_services(self, protocol, query='', minimize='', maximize=''):
+    def get_services(self, protocol, query='', minimize='', maximize='',
+                     properties=None):
         """ Return all services that match the specified query. """
 
         services = self.service_registry.get_services(
-            protocol, query, minimize, maximize
+            protocol, query, minimize, maximize, properties
         )
 
         return services
 
-    def register_service(self, protocol, obj, properties=None):
+    def get_services_async(self, protocol, query='', minimize='', maximize='',
+                           properties=None):
+        """ Return all services that match the specified query.
+
+        This is a coroutine (i.e. its result must be awaited).
+
+        """
+
+        return self.service_registry.get_services_async(
+            protocol, query, minimize, maximize, properties
+        )
+
+    def get_services_generation(self, protocol=None):
+        """ Return the generation of the services registered for a protocol.
+        """
+
+        return self.service_registry.get_services_generation(protocol)
+
+    def register_service(self, protocol, obj, properties=None, policy=None):
         """ Register a service. """
 
         service_id = self.service_registry.register_service(
-            protocol, obj, properties
+            protocol, obj, properties, policy
         )
 
         return service_id
 
+    def register_services(self, services):
+        """ Register a batch of services. """
+
+        # Service registries written before batches were supported can still
+        # register the services one at a time.
+        register_services = getattr(
+            self.service_registry, 'register_services', None
+        )
+        if register_services is None:
+            service_ids = [
+                self.register_service(*service) for service in services
+            ]
+
+        else:
+            service_ids = register_services(services)
+
+        return service_ids
+
     def set_service_properties(self, service_id, properties):
         """ Set the dictionary of properties associated with a service. """
 
@@ -415,6 +524,23 @@ class Application(HasTraits):
 
         return
 
+    def unregister_services(self, service_ids):
+        """ Unregister a batch of services. """
+
+        # Service registries written before batches were supported can still
+        # unregister the services one at a time.
+        unregister_services = getattr(
+            self.service_registry, 'unregister_services', None
+        )
+        if unregister_services is None:
+            for service_id in service_ids:
+                self.unregister_service(service_id)
+
+        else:
+            unregister_services(service_ids)
+
+        return
+
     ###########################################################################
     # 'Application' interface.
     ###########################################################################
@@ -504,4 +630,14 @@ class Application(HasTraits):
 
         return
 
+    def _start_import_prefetcher(self):
+        """ Start importing lazily referenced symbols in the background. """
+
+        from .import_prefetcher import ImportPrefetcher
+
+        self._import_prefetcher = ImportPrefetcher(application=self)
+        self._import_prefetcher.start()
+
+        return
+
 #### EOF ######################################################################
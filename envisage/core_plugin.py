@@ -171,8 +171,7 @@ class CorePlugin(Plugin):
         has been retracted.
 
         """
-        for service in event.added:
-            self._register_service_offer(service)
+        self._register_service_offers(event.added)
 
         return
 
@@ -282,16 +281,47 @@ class CorePlugin(Plugin):
     def _register_service_offers(self, service_offers):
         """ Register a list of service offers. """
 
-        return list(map(self._register_service_offer, service_offers))
+        # Applications written before batches were supported can still
+        # register the offers one at a time.
+        register_services = getattr(
+            self.application, 'register_services', None
+        )
+        if register_services is None:
+            return list(map(self._register_service_offer, service_offers))
+
+        # Otherwise, the offers are registered as a single batch.
+        service_ids = register_services([
+            (
+                service_offer.protocol,
+                service_offer.factory,
+                service_offer.properties,
+                service_offer.policy
+            )
+
+            for service_offer in service_offers
+        ])
+
+        return service_ids
 
     def _register_service_offer(self, service_offer):
         """ Register a service offer. """
 
-        service_id = self.application.register_service(
-            protocol   = service_offer.protocol,
-            obj        = service_offer.factory,
-            properties = service_offer.properties
-        )
+        # Only pass the policy if there is one, as older applications don't
+        # support them.
+        if service_offer.policy is not None:
+            service_id = self.application.register_service(
+                protocol   = service_offer.protocol,
+                obj        = service_offer.factory,
+                properties = service_offer.properties,
+                policy     = service_offer.policy
+            )
+
+        else:
+            service_id = self.application.register_service(
+                protocol   = service_offer.protocol,
+                obj        = service_offer.factory,
+                properties = service_offer.properties
+            )
 
         return service_id
 
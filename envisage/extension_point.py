@@ -5,7 +5,8 @@
 import inspect, weakref
 
 # Enthought library imports.
-from traits.api import List, TraitType, Undefined, provides
+from traits.api import Dict, List, TraitDictEvent, TraitDictObject
+from traits.api import TraitListObject, TraitType, Undefined, provides
 
 # Local imports.
 from .i_extension_point import IExtensionPoint
@@ -53,9 +54,17 @@ def contributes_to(id):
     return decorator
 
 
-# Exception message template.
+# The (non-trait) attribute that objects keep their cache of validated
+# extensions in. It is not a trait so it is never pickled.
+CACHE_ATTRIBUTE = '_extension_point_cache'
+
+# Exception message templates.
 INVALID_TRAIT_TYPE = 'extension points must be "List"s e.g. List, List(Int)' \
-' but a value of %s was specified.'
+' (or keyed "Dict"s e.g. Dict(Str, Any), key="id") but a value of %s was' \
+' specified.'
+
+MISSING_KEY = 'a "Dict" extension point must have a key e.g. key="id" but' \
+' none was specified for <%s>.'
 
 
 # Even though trait types do not themselves have traits, we can still
@@ -69,6 +78,14 @@ class ExtensionPoint(TraitType):
 
     """
 
+    #### 'ExtensionPoint' *CLASS* interface ###################################
+
+    # The dispatcher that calls the traits connected to each extension point,
+    # for each extension registry.
+    #
+    # Dict(weakref.ref(IExtensionRegistry), Dict(Str, Dispatcher))
+    _dispatchers = weakref.WeakKeyDictionary()
+
     ###########################################################################
     # 'ExtensionPoint' *CLASS* interface.
     ###########################################################################
@@ -103,8 +120,17 @@ class ExtensionPoint(TraitType):
     # 'object' interface.
     ###########################################################################
 
-    def __init__(self, trait_type=List, id=None, **metadata):
-        """ Constructor. """
+    def __init__(self, trait_type=List, id=None, key=None, **metadata):
+        """ Constructor.
+
+        If a key is specified then the extension point is *keyed*, i.e. each
+        contribution is identified by the value of its attribute of that name
+        and the registry can look up a single contribution by its key (see
+        'IExtensionRegistry.get_keyed_extension'). A keyed extension point
+        can also be declared with a 'Dict' trait type, in which case its
+        value is a dictionary of the contributions by their keys.
+
+        """
 
         # We add '__extension_point__' to the metadata to make the extension
         # point traits easier to find with the 'traits' and 'trait_names'
@@ -119,9 +145,9 @@ class ExtensionPoint(TraitType):
         if inspect.isclass(trait_type):
             trait_type = trait_type()
 
-        # Currently, we only support list extension points (we may in the
-        # future want to allow other collections e.g. dictionaries etc).
-        if not isinstance(trait_type, List):
+        # Currently, we only support list extension points, and dictionary
+        # extension points that are keyed.
+        if not isinstance(trait_type, (List, Dict)):
             raise TypeError(INVALID_TRAIT_TYPE % trait_type)
 
         self.trait_type = trait_type
@@ -132,12 +158,12 @@ class ExtensionPoint(TraitType):
 
         self.id = id
 
-        # A dictionary that is used solely to keep a reference to all extension
-        # point listeners alive until their associated objects are garbage
-        # collected.
-        #
-        # Dict(weakref.ref(Any), Dict(Str, Callable))
-        self._obj_to_listeners_map = weakref.WeakKeyDictionary()
+        # The name of the attribute that identifies each contribution (or None
+        # if the extension point is not keyed).
+        if isinstance(trait_type, Dict) and key is None:
+            raise ValueError(MISSING_KEY % id)
+
+        self.key = key
 
         return
 
@@ -146,21 +172,63 @@ class ExtensionPoint(TraitType):
     ###########################################################################
 
     def get(self, obj, trait_name):
-        """ Trait type getter. """
+        """ Trait type getter.
+
+        The validated extensions are cached until the extensions to the
+        extension point change, and each access returns a copy of them (so
+        that modifying the value doesn't affect any other access).
+
+        """
 
         extension_registry = self._get_extension_registry(obj)
 
-        # Get the extensions to this extension point.
-        extensions = extension_registry.get_extensions(self.id)
+        # We can only cache the extensions if the registry can tell us when
+        # they have changed.
+        get_generation = getattr(
+            extension_registry, 'get_extensions_generation', None
+        )
+        if get_generation is None:
+            return self._get_validated_extensions(
+                extension_registry, obj, trait_name
+            )
 
-        # Make sure the contributions are of the appropriate type.
-        return self.trait_type.validate(obj, trait_name, extensions)
+        generation = get_generation(self.id)
+
+        # The cache is kept on the object itself (rather than on the trait
+        # type, which is shared by all instances of the class) so that it is
+        # garbage collected along with the object, even if the extensions
+        # refer back to it.
+        cache = self._get_cache(obj)
+        if cache is None:
+            return self._get_validated_extensions(
+                extension_registry, obj, trait_name
+            )
+
+        entry = cache.get(trait_name)
+        if entry is not None:
+            registry_ref, cached_generation, value = entry
+            if registry_ref() is extension_registry \
+               and cached_generation == generation:
+                return self._copy_value(value, obj, trait_name)
+
+        value = self._get_validated_extensions(
+            extension_registry, obj, trait_name
+        )
+        cache[trait_name] = (
+            weakref.ref(extension_registry), generation, value
+        )
+
+        return self._copy_value(value, obj, trait_name)
 
     def set(self, obj, name, value):
         """ Trait type setter. """
 
         extension_registry = self._get_extension_registry(obj)
 
+        # The registry always stores the contributions as a list.
+        if isinstance(self.trait_type, Dict):
+            value = list(value.values())
+
         # Note that some extension registry implementations may not support the
         # setting of extension points (the default, plugin extension registry
         # for exxample ;^).
@@ -184,34 +252,25 @@ class ExtensionPoint(TraitType):
 
         """
 
-        def listener(extension_registry, event):
-            """ Listener called when an extension point is changed. """
-
-            # If an index was specified then we fire an '_items' changed event.
-            if event.index is not None:
-                name = trait_name + '_items'
-                old  = Undefined
-                new  = event
-
-            # Otherwise, we fire a normal trait changed event.
-            else:
-                name = trait_name
-                old  = event.removed
-                new  = event.added
-
-            obj.trait_property_changed(name, old, new)
+        extension_registry = self._get_extension_registry(obj)
 
-            return
+        # All of the traits connected to the extension point share a single
+        # listener (the dispatcher) in each extension registry.
+        dispatchers = ExtensionPoint._dispatchers.setdefault(
+            extension_registry, {}
+        )
 
-        extension_registry = self._get_extension_registry(obj)
+        dispatcher = dispatchers.get(self.id)
+        if dispatcher is None:
+            dispatcher = _ExtensionPointDispatcher()
+            dispatchers[self.id] = dispatcher
 
-        # Add the listener to the extension registry.
-        extension_registry.add_extension_point_listener(listener, self.id)
+            # Add the dispatcher to the extension registry.
+            extension_registry.add_extension_point_listener(
+                dispatcher, self.id
+            )
 
-        # Save a reference to the listener so that it does not get garbage
-        # collected until its associated object does.
-        listeners = self._obj_to_listeners_map.setdefault(obj, {})
-        listeners[trait_name] = listener
+        dispatcher.add(obj, trait_name, self)
 
         return
 
@@ -220,15 +279,19 @@ class ExtensionPoint(TraitType):
 
         extension_registry = self._get_extension_registry(obj)
 
-        listener = self._obj_to_listeners_map[obj].get(trait_name)
-        if listener is not None:
-            # Remove the listener from the extension registry.
-            extension_registry.remove_extension_point_listener(
-                listener, self.id
-            )
+        dispatchers = ExtensionPoint._dispatchers.get(extension_registry, {})
+        dispatcher  = dispatchers.get(self.id)
+        if dispatcher is not None:
+            dispatcher.remove(obj, trait_name)
 
             # Clean up.
-            del self._obj_to_listeners_map[obj][trait_name]
+            if len(dispatcher) == 0:
+                # Remove the dispatcher from the extension registry.
+                extension_registry.remove_extension_point_listener(
+                    dispatcher, self.id
+                )
+
+                del dispatchers[self.id]
 
         return
 
@@ -236,6 +299,96 @@ class ExtensionPoint(TraitType):
     # Private interface.
     ###########################################################################
 
+    def _copy_value(self, value, obj, trait_name):
+        """ Return a copy of a cached (and hence validated) value.
+
+        The items in the value have already been validated, so they are not
+        validated again.
+
+        """
+
+        if isinstance(value, TraitListObject) and value.trait.minlen == 0:
+            copy = TraitListObject(value.trait, obj, trait_name, [])
+
+            # We use the 'list' method directly to skip the validation.
+            list.__setitem__(copy, slice(0, 0), value)
+
+        elif isinstance(value, TraitDictObject):
+            copy = TraitDictObject(value.trait, obj, trait_name, {})
+
+            # We use the 'dict' method directly to skip the validation.
+            dict.update(copy, value)
+
+        # Otherwise, we just validate the value again.
+        elif isinstance(value, dict):
+            copy = self.trait_type.validate(obj, trait_name, dict(value))
+
+        else:
+            copy = self.trait_type.validate(obj, trait_name, list(value))
+
+        return copy
+
+    def _fire_trait_change(self, obj, trait_name, event):
+        """ Fire a trait change event for a change to the extension point. """
+
+        # If the value is a dictionary then the event is keyed.
+        if isinstance(self.trait_type, Dict):
+            added   = self._get_keyed_extensions(event.added)
+            removed = self._get_keyed_extensions(event.removed)
+
+        # If an index was specified then we fire an '_items' changed event.
+        if event.index is not None:
+            name = trait_name + '_items'
+            old  = Undefined
+
+            if isinstance(self.trait_type, Dict):
+                # Contributions whose key was both removed and added have just
+                # changed.
+                changed = {}
+                for key in list(added):
+                    if key in removed:
+                        changed[key] = removed.pop(key)
+                        del added[key]
+
+                new = TraitDictEvent(added, changed, removed)
+
+            else:
+                new = event
+
+        # Otherwise, we fire a normal trait changed event.
+        elif isinstance(self.trait_type, Dict):
+            name = trait_name
+            old  = removed
+            new  = added
+
+        else:
+            name = trait_name
+            old  = event.removed
+            new  = event.added
+
+        obj.trait_property_changed(name, old, new)
+
+        return
+
+    def _get_cache(self, obj):
+        """ Return the cache of validated extensions for an object.
+
+        The cache is a dictionary in the form::
+
+            {trait_name : (weakref.ref(registry), generation, value)}
+
+        Return None if the object can't have a cache.
+
+        """
+
+        try:
+            cache = obj.__dict__.setdefault(CACHE_ATTRIBUTE, {})
+
+        except AttributeError:
+            cache = None
+
+        return cache
+
     def _get_extension_registry(self, obj):
         """ Return the extension registry in effect for an object. """
 
@@ -259,4 +412,106 @@ class ExtensionPoint(TraitType):
 
         return extension_registry
 
+    def _get_keyed_extensions(self, extensions):
+        """ Return a dictionary of extensions by their keys.
+
+        If more than one extension has the same key then the first one wins.
+
+        """
+
+        keyed_extensions = {}
+        for extension in extensions:
+            key = getattr(extension, self.key)
+            keyed_extensions.setdefault(key, extension)
+
+        return keyed_extensions
+
+    def _get_validated_extensions(self, extension_registry, obj, trait_name):
+        """ Return the validated extensions to the extension point. """
+
+        # Get the extensions to this extension point.
+        extensions = extension_registry.get_extensions(self.id)
+        if isinstance(self.trait_type, Dict):
+            extensions = self._get_keyed_extensions(extensions)
+
+        # Make sure the contributions are of the appropriate type.
+        return self.trait_type.validate(obj, trait_name, extensions)
+
+
+class _ExtensionPointDispatcher(object):
+    """ Calls the traits connected to an extension point when it changes.
+
+    There is one dispatcher for each extension point in each extension
+    registry, and it is the only listener that the registry knows about, no
+    matter how many objects are connected to the extension point.
+
+    """
+
+    def __init__(self):
+        """ Constructor. """
+
+        # The connected traits as (weakref(obj), trait_name, extension_point)
+        # tuples. Objects are removed when they are garbage collected.
+        self._targets = []
+
+        return
+
+    def __call__(self, extension_registry, event):
+        """ Listener called when the extension point is changed. """
+
+        # Take a copy, as a trait change handler might connect or disconnect
+        # other traits.
+        for obj_ref, trait_name, extension_point in self._targets[:]:
+            obj = obj_ref()
+            if obj is not None:
+                extension_point._fire_trait_change(obj, trait_name, event)
+
+        return
+
+    def __len__(self):
+        """ Return the number of connected traits. """
+
+        return len(self._targets)
+
+    ###########################################################################
+    # '_ExtensionPointDispatcher' interface.
+    ###########################################################################
+
+    def add(self, obj, trait_name, extension_point):
+        """ Connect a trait on an object. """
+
+        self.remove(obj, trait_name)
+        self._targets.append(
+            (weakref.ref(obj, self._prune), trait_name, extension_point)
+        )
+
+        return
+
+    def remove(self, obj, trait_name):
+        """ Disconnect a trait on an object. """
+
+        self._targets = [
+            target
+
+            for target in self._targets
+
+            if target[0]() is not obj or target[1] != trait_name
+        ]
+
+        return
+
+    ###########################################################################
+    # Private interface.
+    ###########################################################################
+
+    def _prune(self, obj_ref):
+        """ Remove the traits of an object that has been garbage collected.
+        """
+
+        self._targets = [
+            target for target in self._targets if target[0] is not obj_ref
+        ]
+
+        return
+
 #### EOF ######################################################################
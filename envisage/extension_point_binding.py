@@ -146,9 +146,17 @@ class ExtensionPointBinding(HasTraits):
         return
 
     def _update_trait(self, event):
-        """ Update the object's trait to the value of the extension point. """
+        """ Update the object's trait to the value of the extension point.
 
-        self._set_trait(notify=False)
+        The change is applied to the object's list in place (so only the
+        added extensions are validated). If the list doesn't look like it is
+        in step with the extension point then we fall back to setting the
+        whole trait.
+
+        """
+
+        if not self._update_list(event):
+            self._set_trait(notify=False)
 
         self.obj.trait_property_changed(
             self.trait_name + '_items', Undefined, event
@@ -156,6 +164,78 @@ class ExtensionPointBinding(HasTraits):
 
         return
 
+    def _update_list(self, event):
+        """ Apply an extension point changed event to the object's list.
+
+        Return True if the list was updated, or False if it couldn't be.
+
+        """
+
+        value = getattr(self.obj, self.trait_name)
+
+        # We can only update a trait list (that is, a list that knows how to
+        # validate its items).
+        trait = getattr(value, 'trait', None)
+        if not isinstance(value, list) or trait is None:
+            return False
+
+        # Changes that replace a slice of the list (e.g. when a contributing
+        # trait is reassigned) are handled by setting the whole trait.
+        start = event.index
+        if not isinstance(start, int):
+            return False
+
+        stop  = start + len(event.removed)
+        if not 0 <= start <= len(value):
+            return False
+
+        if value[start:stop] != list(event.removed):
+            return False
+
+        # Changes to an extension point can be reported out of order (e.g. if
+        # a listener changes the extension point while an event is being
+        # fired), so the list might already include the change, or be
+        # missing others. We only apply the change if the result would agree
+        # with the extension point as it is now.
+        extensions = self._get_extensions_view()
+        new_length = len(value) - len(event.removed) + len(event.added)
+        if new_length != len(extensions):
+            return False
+
+        if list(extensions[start:start + len(event.added)]) \
+           != list(event.added):
+            return False
+
+        if not (trait.minlen <= new_length <= trait.maxlen):
+            return False
+
+        added = event.added
+        validate = trait.item_trait.handler.validate
+        if validate is not None:
+            added = [
+                validate(self.obj, self.trait_name, extension)
+
+                for extension in added
+            ]
+
+        # We use the 'list' method directly so that the trait list doesn't
+        # fire an '_items' event of its own.
+        list.__setitem__(value, slice(start, stop), added)
+
+        return True
+
+    def _get_extensions_view(self):
+        """ Return a read-only view of the extensions to the extension point.
+        """
+
+        # Not all extension registries support views.
+        get_extensions_view = getattr(
+            self.extension_registry, 'get_extensions_view',
+            self.extension_registry.get_extensions
+        )
+
+        return get_extensions_view(self.extension_point_id)
+
     def _set_extensions(self, extensions):
         """ Set the extensions to an extension point. """
 
@@ -20,6 +20,14 @@ class ExtensionProvider(HasTraits):
     # contributions to or from an extension point).
     extension_point_changed = Event(ExtensionPointChangedEvent)
 
+    def get_contribution_manifest(self):
+        """ Return the Ids of the extension points the provider contributes to.
+        """
+
+        # We don't know, so the provider gets asked about every extension
+        # point.
+        return None
+
     def get_extension_points(self):
         """ Return the extension points offered by the provider. """
 
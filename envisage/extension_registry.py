@@ -2,10 +2,12 @@
 
 
 # Standard library imports.
-import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+import logging, weakref
 
 # Enthought library imports.
-from traits.api import Dict, HasTraits, provides
+from traits.api import Dict, HasTraits, Int, List, provides
 
 # Local imports.
 from .extension_point_changed_event import ExtensionPointChangedEvent
@@ -18,6 +20,47 @@ from .unknown_extension_point import UnknownExtensionPoint
 logger = logging.getLogger(__name__)
 
 
+def _merge_events(events):
+    """ Merge a sequence of changes to the extensions of an extension point.
+
+    Each change is an (added, removed, index) tuple. Consecutive changes are
+    merged if they add (or remove) a contiguous run of extensions, e.g. when
+    several providers are added one after the other.
+
+    Return the list of merged changes.
+
+    """
+
+    merged = []
+    for added, removed, index in events:
+        # Only changes with integer indexes are merged (not changes with no
+        # index, or that replace a slice).
+        if len(merged) > 0 and isinstance(index, int) \
+           and isinstance(merged[-1][2], int):
+            last_added, last_removed, last_index = merged[-1]
+
+            # Adding extensions straight after those added last time.
+            if len(removed) == 0 and len(last_removed) == 0 \
+               and index == last_index + len(last_added):
+                merged[-1] = (last_added + added, [], last_index)
+                continue
+
+            # Removing extensions just before (or in the same place as) those
+            # removed last time.
+            if len(added) == 0 and len(last_added) == 0:
+                if index == last_index:
+                    merged[-1] = ([], last_removed + removed, last_index)
+                    continue
+
+                if index + len(removed) == last_index:
+                    merged[-1] = ([], removed + last_removed, index)
+                    continue
+
+        merged.append((list(added), list(removed), index))
+
+    return merged
+
+
 @provides(IExtensionRegistry)
 class ExtensionRegistry(HasTraits):
     """ A base class for extension registry implementation. """
@@ -29,6 +72,38 @@ class ExtensionRegistry(HasTraits):
     # A dictionary of extensions, keyed by extension point.
     _extensions = Dict
 
+    # The number of 'batch' blocks that are currently open.
+    _batch_depth = Int
+
+    # The changes that have been made inside a 'batch' block, whose events are
+    # fired when the (outermost) block closes.
+    #
+    # [(refs, extension_point_id, added, removed, index)]
+    _deferred_events = List
+
+    # The extensions to each extension point that has changed inside a
+    # 'batch' block, as they were before the first change.
+    #
+    # { extension_point_id : list }
+    _batch_snapshots = Dict
+
+    # An index of the extensions to each keyed extension point by their
+    # keys. An index is built when it is first used, and is thrown away when
+    # the extensions to the extension point change.
+    #
+    # { extension_point_id : { key : extension } }
+    _keyed_extensions = Dict
+
+    # The number of times that the extensions to any extension point have
+    # changed.
+    _generation = Int
+
+    # The generation of the registry when the extensions to each extension
+    # point last changed.
+    #
+    # { extension_point_id : int }
+    _generations = Dict
+
     # The extension points that have been added *explicitly*.
     _extension_points = Dict
 
@@ -43,8 +118,18 @@ class ExtensionRegistry(HasTraits):
     #
     # def listener(extension_registry, extension_point_changed_event):
     #     ...
+    #
+    # The weak references are removed as soon as their listeners are garbage
+    # collected.
     _listeners = Dict
 
+    # The weak references to all of the listeners to each extension point
+    # (see '_get_listener_refs'). The tuples are built when they are first
+    # used, and are thrown away when the listeners change.
+    #
+    # e.g. Dict(extension_point, (weakref.ref(callable), ...))
+    _listener_refs = Dict
+
     ###########################################################################
     # 'IExtensionRegistry' interface.
     ###########################################################################
@@ -53,7 +138,10 @@ class ExtensionRegistry(HasTraits):
         """ Add a listener for extensions being added or removed. """
 
         listeners = self._listeners.setdefault(extension_point_id, [])
-        listeners.append(safeweakref.ref(listener))
+        listeners.append(
+            self._create_listener_ref(listener, extension_point_id)
+        )
+        self._listeners_changed(extension_point_id)
 
         return
 
@@ -61,14 +149,68 @@ class ExtensionRegistry(HasTraits):
         """ Add an extension point. """
 
         self._extension_points[extension_point.id] = extension_point
+        self._next_generation(extension_point.id)
         logger.debug('extension point <%s> added', extension_point.id)
 
         return
 
+    @contextmanager
+    def batch(self):
+        """ Defer extension point changed events until the block closes. """
+
+        self._batch_depth += 1
+        try:
+            yield self
+
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._fire_deferred_events()
+
+        return
+
     def get_extensions(self, extension_point_id):
         """ Return the extensions contributed to an extension point. """
 
-        return self._get_extensions(extension_point_id)[:]
+        return list(self._get_extensions(extension_point_id))
+
+    def get_extensions_generation(self, extension_point_id=None):
+        """ Return the generation of the extensions to an extension point.
+        """
+
+        if extension_point_id is None:
+            return self._generation
+
+        return self._generations.get(extension_point_id, 0)
+
+    def get_extensions_view(self, extension_point_id):
+        """ Return a read-only view of the extensions to an extension point.
+        """
+
+        return tuple(self._get_extensions(extension_point_id))
+
+    def get_keyed_extension(self, extension_point_id, key):
+        """ Return the contribution to a keyed extension point with a key. """
+
+        extension_point = self._extension_points.get(extension_point_id)
+        if extension_point is None:
+            return None
+
+        attribute = getattr(extension_point, 'key', None)
+        if attribute is None:
+            raise ValueError(
+                'extension point <%s> is not keyed' % extension_point_id
+            )
+
+        index = self._keyed_extensions.get(extension_point_id)
+        if index is None:
+            index = {}
+            for extension in self._get_extensions(extension_point_id):
+                index.setdefault(getattr(extension, attribute), extension)
+
+            self._keyed_extensions[extension_point_id] = index
+
+        return index.get(key)
 
     def get_extension_point(self, extension_point_id):
         """ Return the extension point with the specified Id. """
@@ -85,6 +227,7 @@ class ExtensionRegistry(HasTraits):
 
         listeners = self._listeners.setdefault(extension_point_id, [])
         listeners.remove(safeweakref.ref(listener))
+        self._listeners_changed(extension_point_id)
 
         return
 
@@ -93,16 +236,23 @@ class ExtensionRegistry(HasTraits):
 
         self._check_extension_point(extension_point_id)
 
+        # Get any extensions to the extension point (while we still know about
+        # it!). Registries may store the extensions in their own way (e.g. by
+        # provider), so we get them as a list.
+        if extension_point_id in self._extensions:
+            self._snapshot_extensions(extension_point_id)
+            old = list(self._get_extensions(extension_point_id))
+
+        else:
+            old = []
+
         # Remove the extension point.
         del self._extension_points[extension_point_id]
 
         # Remove any extensions to the extension point.
         if extension_point_id in self._extensions:
-            old = self._extensions[extension_point_id]
             del self._extensions[extension_point_id]
-
-        else:
-            old = []
+            self._extensions_removed(extension_point_id)
 
         refs = self._get_listener_refs(extension_point_id)
         self._call_listeners(refs, extension_point_id, [], old, 0)
@@ -116,6 +266,7 @@ class ExtensionRegistry(HasTraits):
 
         self._check_extension_point(extension_point_id)
 
+        self._snapshot_extensions(extension_point_id)
         old = self._get_extensions(extension_point_id)
         self._extensions[extension_point_id] = extensions
 
@@ -129,19 +280,25 @@ class ExtensionRegistry(HasTraits):
     ###########################################################################
 
     def _call_listeners(self, refs, extension_point_id, added, removed, index):
-        """ Call listeners that are listening to an extension point. """
+        """ Call listeners that are listening to an extension point.
 
-        event = ExtensionPointChangedEvent(
-            extension_point_id = extension_point_id,
-            added              = added,
-            removed            = removed,
-            index              = index
-        )
+        This is called whenever the extensions to an extension point change,
+        so it also moves the extension point on to its next generation.
 
-        for ref in refs:
-            listener = ref()
-            if listener is not None:
-                listener(self, event)
+        Inside a 'batch' block, the listeners are not called until the block
+        closes.
+
+        """
+
+        self._next_generation(extension_point_id)
+
+        if self._batch_depth > 0:
+            self._deferred_events.append(
+                (refs, extension_point_id, added, removed, index)
+            )
+
+        else:
+            self._fire_event(refs, extension_point_id, added, removed, index)
 
         return
 
@@ -157,6 +314,16 @@ class ExtensionRegistry(HasTraits):
 
         return
 
+    def _extensions_removed(self, extension_point_id):
+        """ Called when the extensions to an extension point are removed.
+
+        This does nothing by default, but registries can override it to throw
+        away anything that they know about the extensions.
+
+        """
+
+        return
+
     def _get_extensions(self, extension_point_id):
         """ Return the extensions for the given extension point. """
 
@@ -165,16 +332,178 @@ class ExtensionRegistry(HasTraits):
     def _get_listener_refs(self, extension_point_id):
         """ Get weak references to all listeners to an extension point.
 
-        Returns a list containing the weak references to those listeners that
+        Returns a tuple containing the weak references to those listeners that
         are listening to this extension point specifically first, followed by
         those that are listening to any extension point.
 
+        The tuple is shared until the listeners change (so it can be iterated
+        over even if listeners are added or removed in the meantime).
+
         """
 
-        refs = []
-        refs.extend(self._listeners.get(extension_point_id, []))
-        refs.extend(self._listeners.get(None, []))
+        refs = self._listener_refs.get(extension_point_id)
+        if refs is None:
+            refs = tuple(self._listeners.get(extension_point_id, [])) \
+                + tuple(self._listeners.get(None, []))
+
+            self._listener_refs[extension_point_id] = refs
 
         return refs
 
+    def _snapshot_extensions(self, extension_point_id):
+        """ Take a snapshot of the extensions to an extension point.
+
+        This must be called *before* the extensions to the extension point
+        are changed. Inside a 'batch' block, the extensions are remembered as
+        they were before the first change, so that a single event can be
+        fired for all of the changes when the block closes.
+
+        """
+
+        if self._batch_depth > 0 \
+           and extension_point_id not in self._batch_snapshots:
+            self._batch_snapshots[extension_point_id] = list(
+                self._get_extensions(extension_point_id)
+            )
+
+        return
+
+    def _next_generation(self, extension_point_id):
+        """ Move an extension point on to its next generation.
+
+        This must be called whenever the extensions returned for the
+        extension point might change (e.g. when the extension point itself is
+        added or removed).
+
+        """
+
+        self._generation += 1
+        self._generations[extension_point_id] = self._generation
+
+        # Any index of the extensions by their keys is now out of date.
+        self._keyed_extensions.pop(extension_point_id, None)
+
+        return
+
+    ###########################################################################
+    # Private interface.
+    ###########################################################################
+
+    def _create_listener_ref(self, listener, extension_point_id):
+        """ Create a weak reference to a listener.
+
+        The reference removes itself from the listeners to the extension point
+        when the listener is garbage collected.
+
+        """
+
+        # The callback only has a weak reference to the registry, so that the
+        # listeners don't keep it alive.
+        registry_ref = weakref.ref(self)
+
+        def callback(ref):
+            registry = registry_ref()
+            if registry is not None:
+                registry._prune_listeners(extension_point_id)
+
+            return
+
+        # Bound methods need special treatment (see 'safeweakref').
+        if getattr(listener, '__self__', None) is not None:
+            ref = safeweakref.WeakMethod(listener, callback)
+
+        else:
+            ref = weakref.ref(listener, callback)
+
+        return ref
+
+    def _fire_deferred_events(self):
+        """ Fire the events for the changes made inside a 'batch' block.
+
+        Exactly one event is fired for each extension point that changed. If
+        the changes can be merged into a single change (e.g. when several
+        providers are added) then the event describes that change, otherwise
+        it replaces all of the extensions as they were before the block with
+        all of the extensions as they are now.
+
+        """
+
+        # { extension_point_id : (refs, [(added, removed, index)]) }
+        changes = OrderedDict()
+        for refs, extension_point_id, added, removed, index \
+            in self._deferred_events:
+            changes.setdefault(extension_point_id, (refs, []))[1].append(
+                (added, removed, index)
+            )
+
+        snapshots = self._batch_snapshots
+
+        self._deferred_events = []
+        self._batch_snapshots = {}
+
+        for extension_point_id, (refs, events) in changes.items():
+            merged = _merge_events(events)
+            old    = snapshots.get(extension_point_id)
+
+            # If we don't know what the extensions were before the block then
+            # all we can do is fire the merged events.
+            if len(merged) == 1 or old is None:
+                for added, removed, index in merged:
+                    self._fire_event(
+                        refs, extension_point_id, added, removed, index
+                    )
+
+            else:
+                if extension_point_id in self._extension_points:
+                    new = list(self._get_extensions(extension_point_id))
+
+                else:
+                    new = []
+
+                self._fire_event(
+                    refs, extension_point_id, new, old, slice(0, len(old))
+                )
+
+        return
+
+    def _fire_event(self, refs, extension_point_id, added, removed, index):
+        """ Fire an extension point changed event to the listeners. """
+
+        event = ExtensionPointChangedEvent(
+            extension_point_id = extension_point_id,
+            added              = added,
+            removed            = removed,
+            index              = index
+        )
+
+        for ref in refs:
+            listener = ref()
+            if listener is not None:
+                listener(self, event)
+
+        return
+
+    def _listeners_changed(self, extension_point_id):
+        """ Throw away the cached references to the listeners. """
+
+        # Listeners to any extension point are listening to them all!
+        if extension_point_id is None:
+            self._listener_refs.clear()
+
+        else:
+            self._listener_refs.pop(extension_point_id, None)
+
+        return
+
+    def _prune_listeners(self, extension_point_id):
+        """ Remove the references to listeners that have been collected. """
+
+        listeners = self._listeners.get(extension_point_id)
+        if listeners is not None:
+            listeners[:] = [ref for ref in listeners if ref() is not None]
+
+        self._listeners_changed(extension_point_id)
+
+        return
+
 #### EOF ######################################################################
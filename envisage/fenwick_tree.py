@@ -0,0 +1,117 @@
+""" A Fenwick tree (a.k.a. a binary indexed tree) of integers. """
+
+
+class FenwickTree(object):
+    """ A Fenwick tree (a.k.a. a binary indexed tree) of integers.
+
+    The tree holds a sequence of values and can update a value, or compute
+    the sum of the values before an index, in O(log N). Appending a value is
+    also O(log N), but deleting one (or inserting one anywhere else) means
+    rebuilding the tree in O(N).
+
+    """
+
+    def __init__(self, values=()):
+        """ Constructor. """
+
+        # The values themselves.
+        self._values = list(values)
+
+        # The tree (1-based, i.e. the first element is unused).
+        self._tree = self._build(self._values)
+
+        return
+
+    def __len__(self):
+        """ Return the number of values in the tree. """
+
+        return len(self._values)
+
+    ###########################################################################
+    # 'FenwickTree' interface.
+    ###########################################################################
+
+    def append(self, value):
+        """ Append a value. """
+
+        self._values.append(value)
+
+        # The new node covers the values from (i - lowbit(i) + 1) to i, so
+        # its initial total is the sum of those before it plus the new value.
+        i = len(self._values)
+        total = value
+        child = i - 1
+        stop  = i - (i & -i)
+        while child > stop:
+            total += self._tree[child]
+            child -= child & -child
+
+        self._tree.append(total)
+
+        return
+
+    def delete(self, index):
+        """ Delete the value at an index. """
+
+        del self._values[index]
+        self._tree = self._build(self._values)
+
+        return
+
+    def insert(self, index, value):
+        """ Insert a value before an index. """
+
+        if index >= len(self._values):
+            self.append(value)
+
+        else:
+            self._values.insert(index, value)
+            self._tree = self._build(self._values)
+
+        return
+
+    def prefix_sum(self, index):
+        """ Return the sum of the values before an index. """
+
+        total = 0
+        i = index
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+
+        return total
+
+    def set(self, index, value):
+        """ Set the value at an index. """
+
+        delta = value - self._values[index]
+        self._values[index] = value
+
+        i = index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+        return
+
+    def total(self):
+        """ Return the sum of all of the values. """
+
+        return self.prefix_sum(len(self._values))
+
+    ###########################################################################
+    # Private interface.
+    ###########################################################################
+
+    def _build(self, values):
+        """ Build the tree for a list of values in O(N). """
+
+        tree = [0] + list(values)
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+
+        return tree
+
+#### EOF ######################################################################
@@ -6,7 +6,13 @@ from traits.api import Instance, Interface, Str, TraitType
 
 
 class IExtensionPoint(Interface):
-    """ The interface for extension points. """
+    """ The interface for extension points.
+
+    Note that each read of an extension point trait returns a new value, so
+    modifying it in place does not change the extensions. To change the
+    extensions, assign a new value to the trait instead.
+
+    """
 
     # A description of what the extension point is and does! (it is called
     # the slightly dubious, 'desc', instead of 'description', or, to be more
@@ -23,6 +29,12 @@ class IExtensionPoint(Interface):
     # e.g. 'envisage.ui.workbench.views'
     id = Str
 
+    # The name of the attribute that identifies each contribution to the
+    # extension point, if the extension point is *keyed* (None if it is not).
+    #
+    # e.g. 'id'
+    key = Str
+
     # A trait type that describes what can be contributed to the extension
     # point.
     #
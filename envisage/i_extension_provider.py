@@ -14,6 +14,19 @@ class IExtensionProvider(Interface):
     # The event fired when one of the provider's extension points has changed.
     extension_point_changed = Event(ExtensionPointChangedEvent)
 
+    def get_contribution_manifest(self):
+        """ Return the Ids of the extension points the provider contributes to.
+
+        Registries use this to avoid asking the provider for contributions to
+        extension points that it doesn't contribute to. The Ids are returned
+        as a set (or frozenset), or None if the provider doesn't know (in which
+        case it is asked about every extension point).
+
+        Providers written before this method was added may not implement it,
+        so registries treat a provider without it as returning None.
+
+        """
+
     def get_extension_points(self):
         """ Return the extension points offered by the provider.
 
@@ -39,6 +39,23 @@ class IExtensionRegistry(Interface):
 
         """
 
+    def batch(self):
+        """ Return a context manager that batches changes to extensions.
+
+        e.g.::
+
+            with extension_registry.batch():
+                ...
+
+        Listeners are not called until the (outermost) 'with' block closes,
+        and then receive exactly one event for each extension point that
+        changed. If the changes can be merged (e.g. extensions added one after
+        the other) then the event describes the merged change, otherwise it
+        replaces the extensions as they were before the block with the
+        extensions as they are now (and its index is a slice).
+
+        """
+
     def get_extensions(self, extension_point_id):
         """ Return the extensions contributed to an extension point.
 
@@ -46,6 +63,45 @@ class IExtensionRegistry(Interface):
 
         """
 
+    def get_extensions_generation(self, extension_point_id=None):
+        """ Return the generation of the extensions to an extension point.
+
+        The generation is an integer that increases every time that the
+        extensions to the extension point change (including when the
+        extension point itself is added or removed), so any value computed
+        from the extensions can be cached along with the generation and is
+        still valid for as long as the generation stays the same.
+
+        If *no* extension point is specified then the generation increases
+        every time that the extensions to *any* extension point change.
+
+        """
+
+    def get_extensions_view(self, extension_point_id):
+        """ Return a read-only view of the extensions to an extension point.
+
+        The view is a sequence (currently a tuple) that must not be modified.
+        Unlike 'get_extensions', the extensions are not copied, so use this
+        when you only need to look at the extensions (e.g. to iterate over
+        them).
+
+        Return an empty sequence if the extension point does not exist.
+
+        """
+
+    def get_keyed_extension(self, extension_point_id, key):
+        """ Return the contribution to a keyed extension point with a key.
+
+        The registry keeps an index of the contributions to each keyed
+        extension point by their keys, so this takes constant time. If more
+        than one contribution has the same key then the first one is returned.
+
+        Return None if there is no such contribution (or if the extension
+        point does not exist). Raise a 'ValueError' if the extension point
+        is not keyed.
+
+        """
+
     def get_extension_point(self, extension_point_id):
         """ Return the extension point with the specified Id.
 
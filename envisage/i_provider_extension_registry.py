@@ -14,6 +14,15 @@ class IProviderExtensionRegistry(IExtensionRegistry):
 
         """
 
+    def add_providers(self, providers):
+        """ Add several extension providers.
+
+        This is equivalent to adding each provider in turn inside a 'batch'
+        block, i.e. listeners receive (at most) one event per extension
+        point.
+
+        """
+
     def get_providers(self):
         """ Return all of the providers in the registry.
 
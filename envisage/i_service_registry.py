@@ -30,7 +30,24 @@ class IServiceRegistry(Interface):
     # An event that is fired when a service is unregistered.
     unregistered = Event
 
-    def get_service(self, protocol, query='', minimize='', maximize=''):
+    # An event that is fired when a batch of services is registered (using
+    # 'register_services'). The value is the list of the services' Ids.
+    #
+    # Note that 'registered' is still fired for each service in a batch, so
+    # that existing listeners hear about every service. Listeners that
+    # only want to be told once per batch should listen to this event.
+    services_registered = Event
+
+    # An event that is fired when a batch of services is unregistered (using
+    # 'unregister_services'). The value is the list of the services' Ids.
+    #
+    # Note that 'unregistered' is still fired for each service in a batch, so
+    # that existing listeners hear about every service. Listeners that
+    # only want to be told once per batch should listen to this event.
+    services_unregistered = Event
+
+    def get_service(self, protocol, query='', minimize='', maximize='',
+                    properties=None):
         """ Return at most one service that matches the specified query.
 
         The protocol can be an actual class or interface, or the *name* of a
@@ -39,21 +56,40 @@ class IServiceRegistry(Interface):
         Return None if no such service is found.
 
         If no query is specified then a service that provides the specified
-        protocol is returned (if one exists).
+        protocol is returned (if one exists). The query can be a string or a
+        query compiled using 'compile_query'.
+
+        See 'get_services' for the meaning of 'properties'.
 
         NOTE: If more than one service exists that match the criteria then
         Don't try to guess *which* one it will return - it is random!
 
         """
 
+    def get_service_async(self, protocol, query='', minimize='', maximize='',
+                          properties=None):
+        """ Return at most one service that matches the specified query.
+
+        This is the asynchronous version of 'get_service'. It is a coroutine,
+        i.e. its result must be awaited in an 'asyncio' event loop (which
+        requires Python 3.5 or later).
+
+        Unlike 'get_service', service factories can be coroutine functions.
+
+        """
+
     def get_service_from_id(self, service_id):
         """ Return the service with the specified id.
 
+        If the service was registered as a factory that hasn't been called yet
+        (or whose services are pooled) then the factory is returned.
+
         If no such service exists a 'ValueError' exception is raised.
 
         """
 
-    def get_services(self, protocol, query='', minimize='', maximize=''):
+    def get_services(self, protocol, query='', minimize='', maximize='',
+                     properties=None):
         """ Return all services that match the specified query.
 
         The protocol can be an actual class or interface, or the *name* of a
@@ -62,7 +98,50 @@ class IServiceRegistry(Interface):
         If no services match the query, then an empty list is returned.
 
         If no query is specified then all services that provide the specified
-        protocol are returned (if any exist).
+        protocol are returned (if any exist). The query can be a string or a
+        query compiled using 'compile_query'.
+
+        'properties' is an optional, structured query over the properties
+        that the services were registered with. It is a dictionary of
+        conditions that a service must satisfy *all* of, where each key is a
+        property name, optionally followed by an operator, e.g.::
+
+            {'language' : 'python', 'priority__gt' : 3}
+
+        The operators are 'eq' (the default), 'ne', 'lt', 'le', 'gt', 'ge' and
+        'in'. Unlike the free-form query, structured queries can be answered
+        using indexes, so they stay fast when there are many services.
+
+        """
+
+    def get_services_async(self, protocol, query='', minimize='', maximize='',
+                           properties=None):
+        """ Return all services that match the specified query.
+
+        This is the asynchronous version of 'get_services'. It is a coroutine,
+        i.e. its result must be awaited in an 'asyncio' event loop (which
+        requires Python 3.5 or later).
+
+        Unlike 'get_services', service factories can be coroutine functions.
+        The factories of all of the matching services are called concurrently
+        and, if a service is looked up again while its factory is still
+        running, the lookups share the result of the one call to the factory.
+
+        """
+
+    def get_services_generation(self, protocol=None):
+        """ Return the generation of the services registered for a protocol.
+
+        The generation is an integer that increases every time that a service
+        is registered against the protocol or unregistered, its properties
+        are set, or it is evicted (see 'ServicePolicy'). The results of a
+        lookup can therefore be cached along with the generation and are
+        still valid for as long as the generation stays the same.
+
+        The protocol can be an actual class or interface, or the *name* of a
+        class or interface in the form '<module_name>.<class_name>'. If *no*
+        protocol is specified then the generation increases every time that
+        *any* service changes.
 
         """
 
@@ -76,7 +155,7 @@ class IServiceRegistry(Interface):
 
         """
 
-    def register_service(self, protocol, obj, properties=None):
+    def register_service(self, protocol, obj, properties=None, policy=None):
         """ Register a service.
 
         The protocol can be an actual class or interface, or the *name* of a
@@ -99,6 +178,30 @@ class IServiceRegistry(Interface):
         and returns an object. For *really* lazy loading, the factory can also
         be specified as a string which is used to import the callable.
 
+        The factory can also be a coroutine function, in which case the
+        service can only be looked up using 'get_service_async' or
+        'get_services_async'.
+
+        'policy' is an optional 'ServicePolicy' that allows the registry to
+        throw away services created by the factory (e.g. when they have been
+        idle for too long). The factory is called again the next time the
+        service is looked up.
+
+        """
+
+    def register_services(self, services):
+        """ Register a batch of services.
+
+        'services' is a list of tuples in the form (protocol, obj),
+        (protocol, obj, properties) or (protocol, obj, properties, policy),
+        with the same meaning as the arguments of 'register_service'.
+
+        All of the services are registered together, and a 'registered' event
+        is fired for each service followed by a single 'services_registered'
+        event for the batch.
+
+        Return the list of the services' Ids (in the same order).
+
         """
 
     def set_service_properties(self, service_id, properties):
@@ -115,4 +218,16 @@ class IServiceRegistry(Interface):
 
         """
 
+    def unregister_services(self, service_ids):
+        """ Unregister a batch of services.
+
+        All of the services are unregistered together, and an 'unregistered'
+        event is fired for each service followed by a single
+        'services_unregistered' event for the batch.
+
+        If any of the services doesn't exist a 'ValueError' exception is
+        raised, and none of the services are unregistered.
+
+        """
+
 #### EOF ######################################################################
@@ -1,6 +1,9 @@
 """ The default import manager implementation. """
 
 
+# Standard library imports.
+import sys
+
 # Enthought library imports.
 from traits.api import HasTraits, provides
 
@@ -8,6 +11,79 @@ from traits.api import HasTraits, provides
 from .i_import_manager import IImportManager
 
 
+class SymbolCache(object):
+    """ A cache of imported symbols, keyed by symbol path.
+
+    A cached symbol is only used while the module that it was imported from
+    is still the one in 'sys.modules', so removing or reloading a module
+    means that its symbols are imported again.
+
+    """
+
+    def __init__(self):
+        """ Constructor. """
+
+        # The cached symbols.
+        #
+        # { symbol_path : (module_name, module, symbol) }
+        self._symbols = {}
+
+        # The number of times a symbol was (and wasn't) found in the cache.
+        self.hits   = 0
+        self.misses = 0
+
+        return
+
+    def clear(self):
+        """ Remove all symbols from the cache (and reset the statistics). """
+
+        self._symbols.clear()
+        self.hits   = 0
+        self.misses = 0
+
+        return
+
+    def get(self, symbol_path):
+        """ Return the cached symbol for a symbol path.
+
+        Raise a 'KeyError' if the symbol is not in the cache (or the module
+        that it was imported from has since changed).
+
+        """
+
+        try:
+            module_name, module, symbol = self._symbols[symbol_path]
+            if sys.modules.get(module_name) is not module:
+                del self._symbols[symbol_path]
+                raise KeyError(symbol_path)
+
+        except KeyError:
+            self.misses += 1
+            raise
+
+        self.hits += 1
+
+        return symbol
+
+    def set(self, symbol_path, module_name, module, symbol):
+        """ Add a symbol to the cache. """
+
+        self._symbols[symbol_path] = (module_name, module, symbol)
+
+        return
+
+    def statistics(self):
+        """ Return a dictionary of statistics about the cache. """
+
+        statistics = {
+            'hits'   : self.hits,
+            'misses' : self.misses,
+            'size'   : len(self._symbols)
+        }
+
+        return statistics
+
+
 @provides(IImportManager)
 class ImportManager(HasTraits):
     """ The default import manager implementation.
@@ -18,6 +94,12 @@ class ImportManager(HasTraits):
 
     """
 
+    #### 'ImportManager' *CLASS* interface ####################################
+
+    # The process-wide cache of imported symbols (shared by *all* import
+    # managers).
+    symbol_cache = SymbolCache()
+
     ###########################################################################
     # 'IImportManager' interface.
     ###########################################################################
@@ -25,24 +107,15 @@ class ImportManager(HasTraits):
     def import_symbol(self, symbol_path):
         """ Import the symbol defined by the specified symbol path. """
 
-        if ':' in symbol_path:
-            module_name, symbol_name = symbol_path.split(':')
-
-            module = self._import_module(module_name)
-            symbol = eval(symbol_name, module.__dict__)
-
-        else:
-            components = symbol_path.split('.')
+        try:
+            symbol = ImportManager.symbol_cache.get(symbol_path)
 
-            module_name = '.'.join(components[:-1])
-            symbol_name = components[-1]
-
-            module = __import__(
-                module_name, globals(), locals(), [symbol_name]
+        except KeyError:
+            module_name, module, symbol = self._import_symbol(symbol_path)
+            ImportManager.symbol_cache.set(
+                symbol_path, module_name, module, symbol
             )
 
-            symbol = getattr(module, symbol_name)
-
         # Event notification.
         self.symbol_imported = symbol
 
@@ -70,4 +143,31 @@ class ImportManager(HasTraits):
 
         return module
 
+    def _import_symbol(self, symbol_path):
+        """ Import the symbol defined by the specified symbol path.
+
+        Returns a tuple in the form (module_name, module, symbol).
+
+        """
+
+        if ':' in symbol_path:
+            module_name, symbol_name = symbol_path.split(':')
+
+            module = self._import_module(module_name)
+            symbol = eval(symbol_name, module.__dict__)
+
+        else:
+            components = symbol_path.split('.')
+
+            module_name = '.'.join(components[:-1])
+            symbol_name = components[-1]
+
+            module = __import__(
+                module_name, globals(), locals(), [symbol_name]
+            )
+
+            symbol = getattr(module, symbol_name)
+
+        return module_name, module, symbol
+
 #### EOF ######################################################################
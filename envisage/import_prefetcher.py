@@ -0,0 +1,162 @@
+""" Imports lazily referenced symbols in the background. """
+
+
+# Standard library imports.
+import logging, threading
+
+# Enthought library imports.
+from traits.api import Any, HasTraits, Instance, List, Str
+
+# Local imports.
+from .i_application import IApplication
+from .import_manager import ImportManager
+from ._compat import STRING_BASE_CLASS
+
+
+# Logging.
+logger = logging.getLogger(__name__)
+
+
+class ImportPrefetcher(HasTraits):
+    """ Imports lazily referenced symbols in the background.
+
+    Envisage encourages contributions to refer to symbols by name so that
+    nothing is imported until it is actually needed. The price is that the
+    first use of each symbol stalls whichever thread uses it (usually the UI
+    thread) while it is imported.
+
+    The prefetcher collects the symbol paths contributed to the core
+    extension points (the protocols and factories of service offers, and the
+    category classes of categories) and imports them on a background thread.
+    The imported symbols end up in the process-wide symbol cache, so when the
+    application later asks for them, they are simply looked up.
+
+    Note that the *target* classes of categories and class load hooks are
+    deliberately not imported, as doing so would run the hooks on the
+    background thread.
+
+    """
+
+    #### 'ImportPrefetcher' interface #########################################
+
+    # The application whose contributions are prefetched.
+    application = Instance(IApplication)
+
+    # The Ids of the extension points whose contributions are prefetched.
+    extension_point_ids = List(Str, [
+        'envisage.categories',
+        'envisage.service_offers',
+    ])
+
+    #### Private interface ####################################################
+
+    # The background thread.
+    _thread = Any
+
+    ###########################################################################
+    # 'ImportPrefetcher' interface.
+    ###########################################################################
+
+    def get_symbol_paths(self):
+        """ Return the symbol paths to import, in the order to import them.
+
+        The paths are sorted by module name so that packages are imported
+        before the modules inside them.
+
+        """
+
+        application = self.application
+
+        symbol_paths = set()
+        for extension_point_id in self.extension_point_ids:
+            # Not every application has the core plugin!
+            if application.get_extension_point(extension_point_id) is None:
+                continue
+
+            for extension in application.get_extensions_view(
+                extension_point_id
+            ):
+                symbol_paths.update(self._get_symbol_paths(extension))
+
+        return sorted(symbol_paths, key=self._get_sort_key)
+
+    def join(self, timeout=None):
+        """ Wait for the background thread to finish. """
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+        return
+
+    def start(self):
+        """ Start importing the symbols on a background thread. """
+
+        symbol_paths = self.get_symbol_paths()
+
+        self._thread = threading.Thread(
+            target = self._import_symbols,
+            args   = (symbol_paths,),
+            name   = 'envisage-import-prefetcher'
+        )
+
+        # The application must be able to exit even if the prefetcher is still
+        # importing things.
+        self._thread.daemon = True
+        self._thread.start()
+
+        return
+
+    ###########################################################################
+    # Private interface.
+    ###########################################################################
+
+    def _get_sort_key(self, symbol_path):
+        """ Return the key used to sort symbol paths into import order. """
+
+        if ':' in symbol_path:
+            module_name = symbol_path.split(':')[0]
+
+        else:
+            module_name = symbol_path.rsplit('.', 1)[0]
+
+        return (module_name.split('.'), symbol_path)
+
+    def _get_symbol_paths(self, extension):
+        """ Return the symbol paths referenced by a contribution. """
+
+        # Service offers.
+        names = [
+            getattr(extension, 'protocol', None),
+            getattr(extension, 'factory', None),
+        ]
+
+        # Categories (but not their target classes!).
+        if hasattr(extension, 'target_class_name'):
+            names.append(extension.class_name)
+
+        return [name for name in names if isinstance(name, STRING_BASE_CLASS)]
+
+    def _import_symbols(self, symbol_paths):
+        """ Import symbols (this is run on the background thread). """
+
+        logger.debug('prefetching %d symbols', len(symbol_paths))
+
+        # We use our own import manager so that the application's import
+        # manager does not fire events on this thread. The imported symbols
+        # are cached by all import managers.
+        import_manager = ImportManager()
+        for symbol_path in symbol_paths:
+            try:
+                import_manager.import_symbol(symbol_path)
+
+            # The prefetch is only an optimization, so if an import fails here
+            # we leave it to the application to report it when it actually
+            # needs the symbol.
+            except Exception:
+                logger.debug('prefetching <%s> failed', symbol_path)
+
+        logger.debug('prefetching finished')
+
+        return
+
+#### EOF ######################################################################
@@ -1,7 +1,7 @@
 """ The default implementation of the 'IPlugin' interface. """
 
 # Standard library imports.
-import inspect, logging, os
+import inspect, logging, os, weakref
 from os.path import exists, join
 
 # Enthought library imports.
@@ -19,11 +19,106 @@ from .i_plugin_activator import IPluginActivator
 from .i_service_registry import IServiceRegistry
 from .i_service_user import IServiceUser
 from .plugin_activator import PluginActivator
+from ._compat import STRING_BASE_CLASS
 
 # Logging.
 logger = logging.getLogger(__name__)
 
 
+def _add_namespace_aliases(extension_point_ids):
+    """ Return a set of extension point Ids including any aliases.
+
+    This supports the temporary fix in 'Plugin.get_extensions' (i.e. a
+    contribution to 'enthought.foo' is also a contribution to 'foo').
+
+    """
+
+    ids = set(extension_point_ids)
+    for extension_point_id in extension_point_ids:
+        if extension_point_id.startswith('enthought.'):
+            ids.add(extension_point_id[len('enthought.'):])
+
+    return ids
+
+
+class _PluginClassMetadata(object):
+    """ The extension point metadata of a plugin class.
+
+    None of this depends on a particular plugin, so it is computed once per
+    class (the first time that it is needed) and shared by all of the class's
+    instances.
+
+    """
+
+    def __init__(self, cls):
+        """ Constructor. """
+
+        # The names of the traits that are extension points.
+        self.extension_point_trait_names = list(
+            cls.class_traits(__extension_point__=True)
+        )
+
+        # The names of the traits that contribute to each extension point.
+        #
+        # { extension_point_id : [trait_name] }
+        self.contributing_trait_names = {}
+
+        for trait_name, trait in cls.class_traits().items():
+            if trait.contributes_to is not None:
+                self.contributing_trait_names.setdefault(
+                    trait.contributes_to, []
+                ).append(trait_name)
+
+        # The names of the methods that contribute to each extension point,
+        # sorted by name (which is the order that 'inspect.getmembers' used to
+        # find them in).
+        #
+        # Currently there is exactly one way to make a method make a
+        # contribution, and that is to mark it using the 'contributes_to'
+        # decorator, e.g::
+        #
+        #   @contributes_to('acme.motd.messages')
+        #   def get_messages(self):
+        #       ...
+        #       messages = [...]
+        #       ...
+        #       return messages
+        #
+        # { extension_point_id : [method_name] }
+        self.contributing_method_names = {}
+
+        # Methods in derived classes override those in base classes.
+        members = {}
+        for klass in reversed(cls.__mro__):
+            members.update(vars(klass))
+
+        for name in sorted(members):
+            value = members[name]
+            if not inspect.isfunction(value):
+                continue
+
+            extension_point_id = getattr(value, '__extension_point__', None)
+            if isinstance(extension_point_id, STRING_BASE_CLASS):
+                self.contributing_method_names.setdefault(
+                    extension_point_id, []
+                ).append(name)
+
+        # The Ids of all of the extension points that the class contributes
+        # to.
+        self.contribution_manifest = frozenset(_add_namespace_aliases(
+            list(self.contributing_trait_names)
+            + list(self.contributing_method_names)
+        ))
+
+        return
+
+
+# The metadata of each plugin class.
+#
+# { plugin_class : _PluginClassMetadata }
+_class_metadata = weakref.WeakKeyDictionary()
+
+
 @provides(IPlugin, IExtensionPointUser, IServiceUser)
 class Plugin(ExtensionProvider):
     """ The default implementation of the 'IPlugin' interface.
@@ -99,13 +194,43 @@ class Plugin(ExtensionProvider):
     # 'IExtensionProvider' interface.
     ###########################################################################
 
+    def get_contribution_manifest(self):
+        """ Return the Ids of the extension points the provider contributes to.
+        """
+
+        manifest = self._get_class_metadata().contribution_manifest
+
+        # Traits can also be added to individual plugins.
+        added_ids = [
+            trait.contributes_to
+
+            for trait in self._get_added_traits().values()
+
+            if trait.contributes_to is not None
+        ]
+        if len(added_ids) > 0:
+            manifest = manifest.union(_add_namespace_aliases(added_ids))
+
+        return manifest
+
     def get_extension_points(self):
         """ Return the extension points offered by the provider. """
 
+        trait_names = self._get_class_metadata().extension_point_trait_names
+
+        # Traits can also be added to individual plugins.
+        added_names = [
+            trait_name
+
+            for trait_name, trait in self._get_added_traits().items()
+
+            if trait.__extension_point__
+        ]
+
         extension_points = [
-            trait.trait_type
+            self.trait(trait_name).trait_type
 
-            for trait in self.traits(__extension_point__=True).values()
+            for trait_name in trait_names + added_names
         ]
 
         return extension_points
@@ -119,13 +244,13 @@ class Plugin(ExtensionProvider):
         # fixme: We make this restriction in case that in future we can wire up
         # the list traits directly. If we don't end up doing that then it is
         # fine to allow mutiple traits!
-        trait_names = self.trait_names(contributes_to=extension_point_id)
+        trait_names = self._get_contributing_trait_names(extension_point_id)
 
         # FIXME: This is a temporary fix, which was necessary due to the
         #        namespace refactor, but should be removed at some point.
         if len(trait_names) == 0:
             old_id = 'enthought.' + extension_point_id
-            trait_names = self.trait_names(contributes_to=old_id)
+            trait_names = self._get_contributing_trait_names(old_id)
 #            if trait_names:
 #                print 'deprecated:', old_id
 
@@ -272,8 +397,17 @@ class Plugin(ExtensionProvider):
         service_ids = self._service_ids[:]
         service_ids.reverse()
 
-        for service_id in service_ids:
-            self.application.unregister_service(service_id)
+        # Applications written before batches were supported can still
+        # unregister the services one at a time.
+        unregister_services = getattr(
+            self.application, 'unregister_services', None
+        )
+        if unregister_services is None:
+            for service_id in service_ids:
+                self.application.unregister_service(service_id)
+
+        elif len(service_ids) > 0:
+            unregister_services(service_ids)
 
         # Just in case the plugin is started again!
         self._service_ids = []
@@ -327,6 +461,58 @@ class Plugin(ExtensionProvider):
 
         return exception
 
+    def _get_added_traits(self):
+        """ Return the traits that were added to this particular plugin.
+
+        Returns a dictionary in the form {trait_name : ctrait}.
+
+        """
+
+        class_traits = self.__class_traits__
+
+        added_traits = dict(
+            (trait_name, trait)
+
+            for trait_name, trait in self._instance_traits().items()
+
+            # Traits are copied into the instance's dictionary (e.g. when
+            # somebody listens to them), but those aren't *added* traits.
+            if trait_name not in class_traits
+        )
+
+        return added_traits
+
+    def _get_class_metadata(self):
+        """ Return the metadata of the plugin's class. """
+
+        cls = type(self)
+
+        metadata = _class_metadata.get(cls)
+        if metadata is None:
+            metadata = _PluginClassMetadata(cls)
+            _class_metadata[cls] = metadata
+
+        return metadata
+
+    def _get_contributing_trait_names(self, extension_point_id):
+        """ Return the names of the traits that contribute to an extension
+        point.
+
+        """
+
+        metadata = self._get_class_metadata()
+
+        trait_names = list(
+            metadata.contributing_trait_names.get(extension_point_id, [])
+        )
+
+        # Traits can also be added to individual plugins.
+        for trait_name, trait in self._get_added_traits().items():
+            if trait.contributes_to == extension_point_id:
+                trait_names.append(trait_name)
+
+        return trait_names
+
     def _get_extensions_from_trait(self, trait_name):
         """ Return the extensions contributed via the specified trait. """
 
@@ -364,39 +550,18 @@ class Plugin(ExtensionProvider):
     def _harvest_methods(self, extension_point_id):
         """ Harvest all method-based contributions. """
 
+        method_names = self._get_class_metadata().contributing_method_names
+
         extensions = []
-        for name, value in inspect.getmembers(self):
-            if self._is_extension_method(value, extension_point_id):
-                result = getattr(self, name)()
-                if not isinstance(result, list):
-                    result = [result]
+        for name in method_names.get(extension_point_id, []):
+            result = getattr(self, name)()
+            if not isinstance(result, list):
+                result = [result]
 
-                extensions.extend(result)
+            extensions.extend(result)
 
         return extensions
 
-    def _is_extension_method(self, value, extension_point_id):
-        """ Return True if the value is an extension method.
-
-        i.e. If the method is one that makes a contribution to the extension
-        point. Currently there is exactly one way to make a method make a
-        contribution, and that is to mark it using the 'contributes_to'
-        decorator, e.g::
-
-          @contributes_to('acme.motd.messages')
-          def get_messages(self):
-              ...
-              messages = [...]
-              ...
-              return messages
-
-        """
-
-        is_extension_method = inspect.ismethod(value) \
-            and extension_point_id == getattr(value,'__extension_point__',None)
-
-        return is_extension_method
-
     def _register_service_factory(self, trait_name, trait):
         """ Register a service factory for the specified trait. """
 
@@ -34,13 +34,13 @@ class PluginExtensionRegistry(ProviderExtensionRegistry):
         # In practise I can't see why you would ever want (or need) to change
         # the registry's plugin manager on the fly, but hey... Hence, 'old'
         # will probably always be 'None'!
-        if old is not None:
-            for plugin in old:
-                self.remove_provider(plugin)
+        with self.batch():
+            if old is not None:
+                for plugin in old:
+                    self.remove_provider(plugin)
 
-        if new is not None:
-            for plugin in new:
-                self.add_provider(plugin)
+            if new is not None:
+                self.add_providers(new)
 
         return
 
@@ -0,0 +1,103 @@
+""" The contributions made to an extension point by multiple providers. """
+
+
+# Standard library imports.
+from bisect import bisect_left
+
+# Local imports.
+from .fenwick_tree import FenwickTree
+
+
+class ProviderContributions(object):
+    """ The contributions made to an extension point by multiple providers.
+
+    Each provider is identified by a key (an integer) that increases in the
+    order that the providers were added to the registry, and the whole 'list'
+    of contributions is the concatenation of the providers' contributions in
+    key order.
+
+    The storage is sparse, i.e. only providers that actually contribute to
+    the extension point take up any space.
+
+    """
+
+    def __init__(self):
+        """ Constructor. """
+
+        # The keys of the providers that contribute to the extension point,
+        # in ascending order.
+        self._keys = []
+
+        # The contributions of each provider.
+        #
+        # { key : list }
+        self._extensions = {}
+
+        # The number of contributions made by each provider (in the same order
+        # as the keys).
+        self._counts = FenwickTree()
+
+        return
+
+    def __iter__(self):
+        """ Iterate over the contributions of each provider (in order). """
+
+        for key in self._keys:
+            yield self._extensions[key]
+
+    ###########################################################################
+    # 'ProviderContributions' interface.
+    ###########################################################################
+
+    def flatten(self):
+        """ Return a list of all of the contributions. """
+
+        all = []
+        for extensions in self:
+            all.extend(extensions)
+
+        return all
+
+    def get(self, key):
+        """ Return the contributions of a provider. """
+
+        return self._extensions.get(key, [])
+
+    def offset(self, key):
+        """ Return the index of a provider's first contribution.
+
+        i.e. The number of contributions made by the providers before it.
+
+        """
+
+        return self._counts.prefix_sum(bisect_left(self._keys, key))
+
+    def set(self, key, extensions):
+        """ Set the contributions of a provider. """
+
+        index = bisect_left(self._keys, key)
+        is_present = index < len(self._keys) and self._keys[index] == key
+
+        if len(extensions) > 0:
+            if is_present:
+                self._counts.set(index, len(extensions))
+
+            else:
+                self._keys.insert(index, key)
+                self._counts.insert(index, len(extensions))
+
+            self._extensions[key] = extensions
+
+        elif is_present:
+            del self._keys[index]
+            del self._extensions[key]
+            self._counts.delete(index)
+
+        return
+
+    def total(self):
+        """ Return the total number of contributions. """
+
+        return self._counts.total()
+
+#### EOF ######################################################################
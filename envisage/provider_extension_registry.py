@@ -5,12 +5,13 @@
 import logging
 
 # Enthought library imports.
-from traits.api import List, provides, on_trait_change
+from traits.api import Dict, Int, List, provides, on_trait_change
 
 # Local imports.
 from .extension_registry import ExtensionRegistry
 from .i_extension_provider import IExtensionProvider
 from .i_provider_extension_registry import IProviderExtensionRegistry
+from .provider_contributions import ProviderContributions
 
 
 # Logging.
@@ -26,6 +27,38 @@ class ProviderExtensionRegistry(ExtensionRegistry):
     # The extension providers that populate the registry.
     _providers = List(IExtensionProvider)
 
+    #### Private interface ####################################################
+
+    # The Ids of the extension points that each provider contributes to (or
+    # None if the provider doesn't know, in which case it is asked about every
+    # extension point).
+    #
+    # { provider : frozenset(extension_point_id) or None }
+    _contribution_manifests = Dict
+
+    # The key of each provider. Keys increase in the order that providers are
+    # added (and are never reused), so they give the order of the providers'
+    # contributions without having to be updated when a provider is removed.
+    #
+    # { provider : int }
+    _provider_keys = Dict
+
+    # The key of the next provider to be added.
+    _next_provider_key = Int
+
+    # The Ids of the (accessed) extension points that each provider actually
+    # contributes to.
+    #
+    # { provider : set(extension_point_id) }
+    _contributed_to = Dict
+
+    # The contributions of all providers to each extension point concatenated
+    # into a single tuple. This is cached until the contributions to the
+    # extension point change.
+    #
+    # { extension_point_id : tuple }
+    _flattened_extensions = Dict
+
     ###########################################################################
     # 'IExtensionRegistry' interface.
     ###########################################################################
@@ -49,6 +82,15 @@ class ProviderExtensionRegistry(ExtensionRegistry):
 
         return
 
+    def add_providers(self, providers):
+        """ Add several extension providers. """
+
+        with self.batch():
+            for provider in providers:
+                self.add_provider(provider)
+
+        return
+
     def get_providers(self):
         """ Return all of the providers in the registry. """
 
@@ -72,8 +114,20 @@ class ProviderExtensionRegistry(ExtensionRegistry):
     # Protected 'ExtensionRegistry' interface.
     ###########################################################################
 
+    def _extensions_removed(self, extension_point_id):
+        """ Called when the extensions to an extension point are removed. """
+
+        self._flattened_extensions.pop(extension_point_id, None)
+
+        return
+
     def _get_extensions(self, extension_point_id):
-        """ Return the extensions for the given extension point. """
+        """ Return the extensions for the given extension point.
+
+        The extensions are returned as a tuple which is shared by all callers
+        (so it must *not* be modified).
+
+        """
 
         # If we don't know about the extension point then it sure ain't got
         # any extensions!
@@ -82,10 +136,15 @@ class ProviderExtensionRegistry(ExtensionRegistry):
                 'getting extensions of unknown extension point <%s>' \
                 % extension_point_id
             )
-            extensions = []
+            return ()
+
+        # Has this extension point already been accessed? If so then we may
+        # have already flattened its extensions.
+        if extension_point_id in self._extensions:
+            all = self._flattened_extensions.get(extension_point_id)
+            if all is not None:
+                return all
 
-        # Has this extension point already been accessed?
-        elif extension_point_id in self._extensions:
             extensions = self._extensions[extension_point_id]
 
         # If not, then ask each provider for its contributions to the extension
@@ -94,19 +153,11 @@ class ProviderExtensionRegistry(ExtensionRegistry):
             extensions = self._initialize_extensions(extension_point_id)
             self._extensions[extension_point_id] = extensions
 
-        # We store the extensions as a list of lists, with each inner list
-        # containing the contributions from a single provider. Here we just
-        # concatenate them into a single list.
-        #
-        # You could use a list comprehension, here:-
-        #
-        #     all = [x for y in extensions for x in y]
-        #
-        # But I'm sure that that makes it any clearer ;^)
+        # We store the contributions from each provider separately. Here we
+        # just concatenate them into a single tuple.
+        all = tuple(extensions.flatten())
+        self._flattened_extensions[extension_point_id] = all
 
-        all = []
-        for extensions_of_single_provider in extensions:
-            all.extend(extensions_of_single_provider)
         return all
 
     ###########################################################################
@@ -116,6 +167,14 @@ class ProviderExtensionRegistry(ExtensionRegistry):
     def _add_provider(self, provider):
         """ Add a new provider. """
 
+        self._provider_keys[provider] = self._next_provider_key
+        self._next_provider_key += 1
+
+        # Find out which extension points the provider contributes to, so that
+        # we don't have to ask it about the others.
+        self._contribution_manifests[provider] = \
+            self._get_contribution_manifest(provider)
+
         # Add the provider's extension points.
         self._add_provider_extension_points(provider)
 
@@ -136,19 +195,36 @@ class ProviderExtensionRegistry(ExtensionRegistry):
         events = {}
 
         # Does the provider contribute any extensions to an extension point
-        # that has already been accessed?
+        # that has already been accessed? If we know which extension points
+        # the provider contributes to, then we only need to look at those.
+        manifest = self._contribution_manifests[provider]
+        if manifest is None:
+            extension_point_ids = list(self._extensions)
+
+        else:
+            extension_point_ids = [
+                extension_point_id
+
+                for extension_point_id in manifest
+
+                if extension_point_id in self._extensions
+            ]
 
-        for extension_point_id, extensions in self._extensions.items():
+        for extension_point_id in extension_point_ids:
             new = provider.get_extensions(extension_point_id)
 
             # We only need fire an event for this extension point if the
             # provider contributes any extensions.
             if len(new) > 0:
-                index = sum(map(len, extensions))
+                extensions = self._extensions[extension_point_id]
+
+                index = extensions.total()
                 refs  = self._get_listener_refs(extension_point_id)
                 events[extension_point_id] = (refs, new[:], index)
 
-            extensions.append(new)
+                self._set_provider_extensions(
+                    provider, extension_point_id, new
+                )
 
         return events
 
@@ -157,6 +233,7 @@ class ProviderExtensionRegistry(ExtensionRegistry):
 
         for extension_point in provider.get_extension_points():
             self._extension_points[extension_point.id] = extension_point
+            self._next_generation(extension_point.id)
 
         return
 
@@ -171,6 +248,8 @@ class ProviderExtensionRegistry(ExtensionRegistry):
 
         # And finally take it out of the list of providers.
         self._providers.remove(provider)
+        del self._provider_keys[provider]
+        del self._contribution_manifests[provider]
 
         return events
 
@@ -182,23 +261,28 @@ class ProviderExtensionRegistry(ExtensionRegistry):
         # need to fire.
         events = {}
 
-        # Find the index of the provider in the provider list. Its
-        # contributions are at the same index in the extensions list of lists.
-        index = self._providers.index(provider)
+        # Raise a 'ValueError' if the provider is not in the registry.
+        key = self._get_provider_key(provider)
 
-        # Does the provider contribute any extensions to an extension point
-        # that has already been accessed?
-        for extension_point_id, extensions in self._extensions.items():
-            old = extensions[index]
+        # We only need to look at the (accessed) extension points that the
+        # provider actually contributes to.
+        for extension_point_id in list(self._contributed_to.get(provider, ())):
+            extensions = self._extensions.get(extension_point_id)
+            if extensions is None:
+                continue
 
             # We only need fire an event for this extension point if the
             # provider contributed any extensions.
+            old = extensions.get(key)
             if len(old) > 0:
-                offset = sum(map(len, extensions[:index]))
-                refs  = self._get_listener_refs(extension_point_id)
+                offset = extensions.offset(key)
+                refs   = self._get_listener_refs(extension_point_id)
                 events[extension_point_id] = (refs, old[:], offset)
 
-            del extensions[index]
+        for extension_point_id in events:
+            self._set_provider_extensions(provider, extension_point_id, [])
+
+        self._contributed_to.pop(provider, None)
 
         return events
 
@@ -208,6 +292,7 @@ class ProviderExtensionRegistry(ExtensionRegistry):
         for extension_point in provider.get_extension_points():
             # Remove the extension point.
             del self._extension_points[extension_point.id]
+            self._next_generation(extension_point.id)
 
         return
 
@@ -234,8 +319,7 @@ class ProviderExtensionRegistry(ExtensionRegistry):
         if not extension_point_id in self._extensions:
             return
 
-        # This is a list of lists where each inner list contains the
-        # contributions made to the extension point by a single provider.
+        # The contributions made to the extension point by each provider.
         #
         # fixme: This causes a problem if the extension point has not yet been
         # accessed! The tricky thing is that if it hasn't been accessed yet
@@ -243,15 +327,13 @@ class ProviderExtensionRegistry(ExtensionRegistry):
         # empty list instead of barfing!
         extensions = self._extensions[extension_point_id]
 
-        # Find the index of the provider in the provider list. Its
-        # contributions are at the same index in the extensions list of lists.
-        provider_index = self._providers.index(obj)
+        # Find where the provider's contributions are in the whole 'list'.
+        offset = extensions.offset(self._get_provider_key(obj))
 
         # Get the updated list from the provider.
-        extensions[provider_index] = obj.get_extensions(extension_point_id)
-
-        # Find where the provider's contributions are in the whole 'list'.
-        offset = sum(map(len, extensions[:provider_index]))
+        self._set_provider_extensions(
+            obj, extension_point_id, obj.get_extensions(extension_point_id)
+        )
 
         # Translate the event index from one that refers to the list of
         # contributions from the provider, to the list of contributions from
@@ -268,21 +350,105 @@ class ProviderExtensionRegistry(ExtensionRegistry):
 
         return
 
+    @on_trait_change('_providers:trait_added')
+    def _providers_trait_added(self, obj, trait_name, old, new):
+        """ Dynamic trait change handler. """
+
+        # A trait added to a provider might contribute to extension points
+        # that the provider didn't contribute to before.
+        if obj in self._contribution_manifests:
+            self._contribution_manifests[obj] = \
+                self._get_contribution_manifest(obj)
+
+        return
+
     #### Methods ##############################################################
 
     def _initialize_extensions(self, extension_point_id):
         """ Initialize the extensions to an extension point. """
 
-        # We store the extensions as a list of lists, with each inner list
-        # containing the contributions from a single provider.
-        extensions = []
+        # We store the contributions from each provider separately (but only
+        # for the providers that actually contribute anything!).
+        extensions = ProviderContributions()
         for provider in self._providers:
-            extensions.append(provider.get_extensions(extension_point_id)[:])
+            new = self._get_provider_extensions(provider, extension_point_id)
+            if len(new) > 0:
+                extensions.set(self._provider_keys[provider], new[:])
+                self._contributed_to.setdefault(provider, set()).add(
+                    extension_point_id
+                )
 
-        logger.debug('extensions to <%s> <%s>', extension_point_id, extensions)
+        logger.debug(
+            'extensions to <%s> <%s>', extension_point_id, extensions.flatten()
+        )
 
         return extensions
 
+    def _get_contribution_manifest(self, provider):
+        """ Return the Ids of the extension points a provider contributes to.
+
+        Return None if the provider doesn't know (e.g. if it doesn't have a
+        'get_contribution_manifest' method), in which case it is asked about
+        every extension point.
+
+        """
+
+        get_contribution_manifest = getattr(
+            provider, 'get_contribution_manifest', None
+        )
+        if get_contribution_manifest is None:
+            return None
+
+        return get_contribution_manifest()
+
+    def _get_provider_key(self, provider):
+        """ Return the key of a provider.
+
+        Raise a 'ValueError' if the provider is not in the registry.
+
+        """
+
+        try:
+            key = self._provider_keys[provider]
+
+        except KeyError:
+            raise ValueError('provider <%s> is not in the registry' % provider)
+
+        return key
+
+    def _get_provider_extensions(self, provider, extension_point_id):
+        """ Return a provider's contributions to an extension point.
+
+        The provider is only asked if it contributes to the extension point.
+
+        """
+
+        manifest = self._contribution_manifests.get(provider)
+        if manifest is not None and extension_point_id not in manifest:
+            return []
+
+        return provider.get_extensions(extension_point_id)
+
+    def _set_provider_extensions(self, provider, extension_point_id,
+                                 extensions):
+        """ Set a provider's contributions to an (accessed) extension point.
+        """
+
+        self._snapshot_extensions(extension_point_id)
+        self._extensions[extension_point_id].set(
+            self._provider_keys[provider], extensions
+        )
+        self._flattened_extensions.pop(extension_point_id, None)
+
+        contributed_to = self._contributed_to.setdefault(provider, set())
+        if len(extensions) > 0:
+            contributed_to.add(extension_point_id)
+
+        else:
+            contributed_to.discard(extension_point_id)
+
+        return
+
     def _translate_index(self, index, offset):
         """ Translate an event index by the given offset. """
 
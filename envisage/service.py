@@ -2,7 +2,7 @@
 
 
 # Standard library imports.
-import logging
+import logging, weakref
 
 # Enthought library imports.
 from traits.api import TraitType
@@ -12,6 +12,11 @@ from traits.api import TraitType
 logger = logging.getLogger(__name__)
 
 
+# The (non-trait) attribute that objects keep their cache of services in. It
+# is not a trait so it is never pickled.
+CACHE_ATTRIBUTE = '_service_cache'
+
+
 class Service(TraitType):
     """ A trait type used to access services.
 
@@ -25,16 +30,27 @@ class Service(TraitType):
     ###########################################################################
 
     def __init__(
-        self, protocol=None, query='', minimize='', maximize='', **metadata
+        self, protocol=None, query='', minimize='', maximize='',
+        properties=None, cache=False, **metadata
     ):
-        """ Constructor. """
+        """ Constructor.
+
+        If 'cache' is True then the service is looked up the first time the
+        trait is read and the same service is returned until a service that
+        provides the same protocol is registered, unregistered or has its
+        properties set. Note that changes to the *attributes* of services are
+        not noticed, so don't use the cache with queries (or minimize and
+        maximize) that depend on attributes that change.
+
+        """
 
         super(Service, self).__init__(**metadata)
 
         # The protocol that the service must provide.
         self._protocol = protocol
 
-        # The optional query.
+        # The optional query (either a string or a query compiled using
+        # 'compile_query').
         self._query = query
 
         # The optional name of the trait/property to minimize.
@@ -43,6 +59,12 @@ class Service(TraitType):
         # The optional name of the trait/property to maximize.
         self._maximize = maximize
 
+        # The optional structured property query.
+        self._properties = properties
+
+        # Should the service be cached?
+        self._cache = cache
+
         return
 
     ###########################################################################
@@ -54,12 +76,43 @@ class Service(TraitType):
 
         service_registry = self._get_service_registry(obj)
 
+        # We can only cache the service if the registry can tell us when the
+        # services that provide the protocol have changed.
+        get_generation = getattr(
+            service_registry, 'get_services_generation', None
+        )
 
-        obj = service_registry.get_service(
-            self._protocol, self._query, self._minimize, self._maximize
+        # The cache is kept on the object itself (rather than on the trait
+        # type, which is shared by all instances of the class) so that it is
+        # garbage collected along with the object, even if the service refers
+        # back to it (e.g. via the application).
+        if self._cache and get_generation is not None:
+            cache = self._get_cache(obj)
+
+        else:
+            cache = None
+
+        if cache is not None:
+            generation = get_generation(self._protocol)
+
+            entry = cache.get(trait_name)
+            if entry is not None:
+                registry_ref, cached_generation, service = entry
+                if registry_ref() is service_registry \
+                   and cached_generation == generation:
+                    return service
+
+        service = service_registry.get_service(
+            self._protocol, self._query, self._minimize, self._maximize,
+            self._properties
         )
 
-        return obj
+        if cache is not None:
+            cache[trait_name] = (
+                weakref.ref(service_registry), generation, service
+            )
+
+        return service
 
     def set(self, obj, name, value):
         """ Trait type setter. """
@@ -70,6 +123,25 @@ class Service(TraitType):
     # Private interface.
     ###########################################################################
 
+    def _get_cache(self, obj):
+        """ Return the cache of services for an object.
+
+        The cache is a dictionary in the form::
+
+            {trait_name : (weakref.ref(registry), generation, service)}
+
+        Return None if the object can't have a cache.
+
+        """
+
+        try:
+            cache = obj.__dict__.setdefault(CACHE_ATTRIBUTE, {})
+
+        except AttributeError:
+            cache = None
+
+        return cache
+
     def _get_service_registry(self, obj):
         """ Return the service registry in effect for an object. """
 
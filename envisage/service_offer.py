@@ -2,7 +2,10 @@
 
 
 # Enthought library imports.
-from traits.api import Callable, Dict, Either, HasTraits, Str, Type
+from traits.api import Callable, Dict, Either, HasTraits, Instance, Str, Type
+
+# Local imports.
+from .service_policy import ServicePolicy
 
 
 class ServiceOffer(HasTraits):
@@ -26,6 +29,9 @@ class ServiceOffer(HasTraits):
     #   callable(**properties) -> Any
     #
     # e.g. 'foo.bar.baz.Baz' is turned into 'from foo.bar.baz import Baz'
+    #
+    # The factory can also be a coroutine function, in which case the service
+    # must be looked up using 'get_service_async' or 'get_services_async'.
     factory = Either(Str, Callable)
 
     # An optional set of properties to associate with the service offer.
@@ -33,4 +39,12 @@ class ServiceOffer(HasTraits):
     # This dictionary is passed as keyword arguments to the factory.
     properties = Dict
 
+    # An optional policy that allows the service registry to throw away the
+    # service created by the factory (e.g. if it hasn't been used for a
+    # while), in which case the factory is called again the next time the
+    # service is looked up.
+    #
+    # e.g. ServicePolicy(idle_timeout=300) or ServicePolicy(pool_size=4)
+    policy = Instance(ServicePolicy)
+
 #### EOF ######################################################################
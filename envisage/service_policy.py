@@ -0,0 +1,37 @@
+""" A policy that bounds the lifetime of services created by factories. """
+
+
+# Enthought library imports.
+from traits.api import Float, HasTraits, Int
+
+
+class ServicePolicy(HasTraits):
+    """ A policy that bounds the lifetime of services created by factories.
+
+    Normally, once a service factory has been called, the service that it
+    created is kept by the registry until the service is unregistered. A
+    policy allows the registry to throw the service away (i.e. *evict* it),
+    in which case the factory is called again the next time that the service
+    is looked up.
+
+    Policies only affect services registered as factories.
+
+    """
+
+    #### 'ServicePolicy' interface ############################################
+
+    # The number of seconds that a service can go without being looked up
+    # before it is evicted (0 means that it is never evicted for being idle).
+    idle_timeout = Float(0)
+
+    # The maximum number of services created by factories with this policy
+    # that are kept for each protocol. When there are too many, the least
+    # recently used service is evicted (0 means no limit).
+    capacity = Int(0)
+
+    # If this is greater than 0, the factory creates a pool of up to this many
+    # services and lookups are given each of the services in turn. When the
+    # pool is evicted, all of its services are thrown away.
+    pool_size = Int(0)
+
+#### EOF ######################################################################
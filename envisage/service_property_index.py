@@ -0,0 +1,215 @@
+""" Indexes used to answer structured service property queries. """
+
+
+# Standard library imports.
+from bisect import bisect_left, bisect_right
+import operator
+
+
+# The operators that can be used in a structured property query.
+#
+# A condition is written as '<property_name>__<operator>', e.g. 'price__lt'.
+# A condition without an operator suffix is an equality test.
+OPERATORS = {
+    'eq' : operator.eq,
+    'ne' : operator.ne,
+    'lt' : operator.lt,
+    'le' : operator.le,
+    'gt' : operator.gt,
+    'ge' : operator.ge,
+    'in' : lambda value, operand: value in operand,
+}
+
+
+def parse_condition(key):
+    """ Split a condition key into a property name and an operator name.
+
+    e.g. 'price__lt' -> ('price', 'lt') and 'language' -> ('language', 'eq')
+
+    """
+
+    name, separator, op = key.rpartition('__')
+    if len(separator) == 0 or op not in OPERATORS:
+        name, op = key, 'eq'
+
+    return name, op
+
+
+def matches(properties, name, op, operand):
+    """ Does a dictionary of service properties satisfy a condition?
+
+    A service that does not have the property never satisfies a condition.
+
+    """
+
+    if name not in properties:
+        return False
+
+    try:
+        result = OPERATORS[op](properties[name], operand)
+
+    except TypeError:
+        result = False
+
+    return result
+
+
+class PropertyIndex(object):
+    """ An index over the values of a single service property.
+
+    The index contains a hash index (used to answer equality conditions) and
+    a sorted index (used to answer range conditions). If the values of the
+    property are not hashable (or cannot be ordered) then the corresponding
+    index is disabled and 'match' returns None for conditions that it can't
+    answer, in which case the caller must fall back to a scan.
+
+    """
+
+    def __init__(self):
+        """ Constructor. """
+
+        # The Ids of all services that have the property.
+        self._ids = set()
+
+        # The hash index.
+        #
+        # { value : set(service_id) }
+        self._ids_by_value = {}
+        self._is_hashable = True
+
+        # The sorted index (the values and the service Ids at the same
+        # position in two parallel lists).
+        self._values = []
+        self._sorted_ids = []
+        self._is_sortable = True
+
+        return
+
+    ###########################################################################
+    # 'PropertyIndex' interface.
+    ###########################################################################
+
+    def add(self, service_id, value):
+        """ Add a service's value to the index. """
+
+        self._ids.add(service_id)
+
+        if self._is_hashable:
+            try:
+                self._ids_by_value.setdefault(value, set()).add(service_id)
+
+            except TypeError:
+                self._is_hashable = False
+                self._ids_by_value = {}
+
+        if self._is_sortable:
+            try:
+                index = bisect_right(self._values, value)
+
+            except TypeError:
+                self._is_sortable = False
+                self._values = []
+                self._sorted_ids = []
+
+            else:
+                self._values.insert(index, value)
+                self._sorted_ids.insert(index, service_id)
+
+        return
+
+    def remove(self, service_id, value):
+        """ Remove a service's value from the index. """
+
+        self._ids.discard(service_id)
+
+        if self._is_hashable:
+            ids = self._ids_by_value.get(value)
+            if ids is not None:
+                ids.discard(service_id)
+                if len(ids) == 0:
+                    del self._ids_by_value[value]
+
+        if self._is_sortable:
+            start = bisect_left(self._values, value)
+            stop  = bisect_right(self._values, value)
+            for index in range(start, stop):
+                if self._sorted_ids[index] == service_id:
+                    del self._values[index]
+                    del self._sorted_ids[index]
+                    break
+
+        return
+
+    def match(self, op, operand):
+        """ Return the Ids of the services that satisfy a condition.
+
+        Return None if the index cannot answer the condition.
+
+        """
+
+        if op == 'eq':
+            ids = self._match_equal(operand)
+
+        elif op == 'ne':
+            ids = self._match_equal(operand)
+            if ids is not None:
+                ids = self._ids - ids
+
+        elif op == 'in':
+            ids = set()
+            for value in operand:
+                matched = self._match_equal(value)
+                if matched is None:
+                    ids = None
+                    break
+
+                ids |= matched
+
+        else:
+            ids = self._match_range(op, operand)
+
+        return ids
+
+    ###########################################################################
+    # Private interface.
+    ###########################################################################
+
+    def _match_equal(self, operand):
+        """ Return the Ids of the services whose value equals the operand. """
+
+        if not self._is_hashable:
+            return None
+
+        try:
+            ids = set(self._ids_by_value.get(operand, ()))
+
+        except TypeError:
+            ids = None
+
+        return ids
+
+    def _match_range(self, op, operand):
+        """ Return the Ids of the services whose value is in a range. """
+
+        if not self._is_sortable:
+            return None
+
+        try:
+            if op == 'lt':
+                start, stop = 0, bisect_left(self._values, operand)
+
+            elif op == 'le':
+                start, stop = 0, bisect_right(self._values, operand)
+
+            elif op == 'gt':
+                start, stop = bisect_right(self._values, operand), None
+
+            else:
+                start, stop = bisect_left(self._values, operand), None
+
+        except TypeError:
+            return None
+
+        return set(self._sorted_ids[start:stop])
+
+#### EOF ######################################################################
@@ -0,0 +1,132 @@
+""" A ranking of services by the value of one of their attributes. """
+
+
+# Standard library imports.
+from bisect import bisect_left, insort
+
+
+class ServiceRanking(object):
+    """ A ranking of services by the value of one of their attributes.
+
+    The ranking is used to answer lookups that minimize or maximize an
+    attribute without sorting all of the services each time. Services with
+    equal values are ranked in the order in which they were registered (i.e.
+    by service Id), in both directions, just like a stable sort would.
+
+    """
+
+    def __init__(self, attribute):
+        """ Constructor. """
+
+        # The name of the attribute that the services are ranked by.
+        self.attribute = attribute
+
+        # The ranked services as a sorted list of (value, service_id) tuples.
+        self._keys = []
+
+        # The value that each service is currently ranked with.
+        #
+        # { service_id : value }
+        self._values = {}
+
+        # The following are maintained by the service registry that owns the
+        # ranking:-
+        #
+        # The Ids of services that have been registered but not yet added to
+        # the ranking (they may still be factories).
+        self.pending = []
+
+        # The number of lookups that are currently adding pending services.
+        self.updating = 0
+
+        # The listeners that keep the ranking up to date when the attribute
+        # of a service changes.
+        #
+        # { service_id : (service, listener) }
+        self.listeners = {}
+
+        return
+
+    def __contains__(self, service_id):
+        """ Is the service in the ranking? """
+
+        return service_id in self._values
+
+    ###########################################################################
+    # 'ServiceRanking' interface.
+    ###########################################################################
+
+    def add(self, service_id, value):
+        """ Add a service to the ranking.
+
+        Raise a 'TypeError' if the value can't be compared with the values of
+        the other services.
+
+        """
+
+        insort(self._keys, (value, service_id))
+        self._values[service_id] = value
+
+        return
+
+    def first(self, reverse=False):
+        """ Return the Id of the first service in the ranking.
+
+        Return None if the ranking is empty.
+
+        """
+
+        if len(self._keys) == 0:
+            return None
+
+        if not reverse:
+            return self._keys[0][1]
+
+        # The last service with the highest value is at the end of the list,
+        # but we want the first one registered.
+        value = self._keys[-1][0]
+
+        return self._keys[bisect_left(self._keys, (value,))][1]
+
+    def ids(self, reverse=False):
+        """ Return the Ids of all of the services in ranking order. """
+
+        if not reverse:
+            return [service_id for value, service_id in self._keys]
+
+        # Walk backwards through the runs of equal values, keeping each run in
+        # the order in which the services were registered.
+        keys = self._keys
+
+        ids  = []
+        stop = len(keys)
+        while stop > 0:
+            start = bisect_left(keys, (keys[stop - 1][0],), 0, stop)
+            ids.extend(service_id for value, service_id in keys[start:stop])
+            stop = start
+
+        return ids
+
+    def remove(self, service_id):
+        """ Remove a service from the ranking. """
+
+        value = self._values.pop(service_id)
+        index = bisect_left(self._keys, (value, service_id))
+        del self._keys[index]
+
+        return
+
+    def update(self, service_id, value):
+        """ Update the value that a service is ranked by.
+
+        Raise a 'TypeError' if the value can't be compared with the values of
+        the other services.
+
+        """
+
+        self.remove(service_id)
+        self.add(service_id, value)
+
+        return
+
+#### EOF ######################################################################
@@ -2,28 +2,242 @@
 
 
 # Standard library imports.
-import logging
+import logging, threading, types
+from collections import OrderedDict
 
 # Enthought library imports.
-from traits.api import Dict, Event, HasTraits, Int, provides
+from traits.api import Any, Dict, Event, Float, HasTraits, Instance, Int
+from traits.api import provides
 
 # Local imports.
+from .i_import_manager import IImportManager
 from .i_service_registry import IServiceRegistry
 from .import_manager import ImportManager
-from ._compat import STRING_BASE_CLASS
+from .service_property_index import PropertyIndex, matches, parse_condition
+from .service_ranking import ServiceRanking
+from .service_registry_monitor import ServiceRegistryMonitor
+from ._compat import STRING_BASE_CLASS, iscoroutinefunction, perf_counter
 
 
 # Logging.
 logger = logging.getLogger(__name__)
 
 
+# The maximum number of compiled queries that are cached.
+QUERY_CACHE_SIZE = 256
+
+# The number of times that a property must be used in a structured query for a
+# protocol before the registry builds an index over it.
+PROPERTY_INDEX_THRESHOLD = 3
+
+# How often (in seconds) lookups check for services that have been idle for
+# longer than their policy allows.
+IDLE_CHECK_INTERVAL = 1.0
+
+# A marker used in place of a ranking for an attribute that services can't be
+# ranked by (e.g. because it isn't a trait, so we can't tell when it changes).
+_UNRANKABLE = object()
+
+# The cache of compiled queries.
+#
+# { query_string : code_object }
+#
+# This is ordered by use (least recently used first) so that when the cache is
+# full we know which query to throw away.
+_query_cache = OrderedDict()
+
+# A lock that protects the query cache.
+_query_cache_lock = threading.Lock()
+
+
+def compile_query(query):
+    """ Compile a service query.
+
+    The result can be passed as the 'query' argument of 'get_services' and
+    'get_service', and of the 'Service' trait type, to avoid parsing the query
+    each time it is used. Compiled queries are cached, so compiling the same
+    query string twice returns the same object.
+
+    If the query is already compiled then it is returned unchanged.
+
+    Raise a 'SyntaxError' if the query is not a valid Python expression.
+
+    """
+
+    if isinstance(query, types.CodeType):
+        return query
+
+    with _query_cache_lock:
+        code = _query_cache.pop(query, None)
+        if code is None:
+            code = compile(query, '<query>', 'eval')
+
+            # If the cache is full then throw away the least recently used
+            # query.
+            if len(_query_cache) >= QUERY_CACHE_SIZE:
+                _query_cache.popitem(last=False)
+
+        _query_cache[query] = code
+
+    return code
+
+
+def _get_query_names(code):
+    """ Return the names used by a compiled query (including nested scopes).
+    """
+
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names.update(_get_query_names(const))
+
+    return names
+
+
+def _has_nested_scopes(code):
+    """ Does a compiled query contain nested scopes?
+
+    e.g. lambdas and generator expressions.
+
+    """
+
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            return True
+
+    return False
+
+
+class _QueryNamespace(object):
+    """ The namespace that a query is evaluated in.
+
+    This is a read-through mapping over a service's properties and the
+    attributes in its '__dict__' (properties take precedence), so only the
+    names that the query actually uses are ever looked up.
+
+    """
+
+    def __init__(self, service, properties):
+        """ Constructor. """
+
+        self._attributes = getattr(service, '__dict__', {})
+        self._properties = properties
+
+        return
+
+    def __getitem__(self, name):
+        """ Return the value of a name. """
+
+        try:
+            value = self._properties[name]
+
+        except KeyError:
+            value = self._attributes[name]
+
+        return value
+
+    def resolve(self, names):
+        """ Return a dictionary containing the values of some names.
+
+        Names that aren't in the namespace are left out.
+
+        """
+
+        namespace = {}
+        for name in names:
+            try:
+                namespace[name] = self[name]
+
+            except KeyError:
+                pass
+
+        return namespace
+
+
 class NoSuchServiceError(Exception):
     """ Raised when a required service is not found. """
 
 
+class _PendingService(object):
+    """ A service that is being created by a factory in some thread.
+
+    Other threads that want the same service wait for the factory to finish
+    (rather than calling it again).
+
+    """
+
+    def __init__(self):
+        """ Constructor. """
+
+        # The thread that is calling the factory.
+        self.owner = threading.current_thread()
+
+        # The service created by the factory (or the exception it raised).
+        self.service   = None
+        self.exception = None
+
+        # Set when the factory has finished.
+        self._done = threading.Event()
+
+        return
+
+    def get(self):
+        """ Wait for the factory to finish and return the service. """
+
+        self._done.wait()
+        if self.exception is not None:
+            raise self.exception
+
+        return self.service
+
+    def set(self, service=None, exception=None):
+        """ Set the result of calling the factory. """
+
+        self.service   = service
+        self.exception = exception
+        self._done.set()
+
+        return
+
+
+class _ServicePool(object):
+    """ A pool of services created by the same factory.
+
+    This is registered in place of a factory whose policy has a pool size.
+
+    """
+
+    def __init__(self, factory, size):
+        """ Constructor. """
+
+        # The factory that creates the services (or its symbol path).
+        self.factory = factory
+
+        # The maximum number of services in the pool.
+        self.size = size
+
+        # The services in the pool.
+        self.services = []
+
+        # The index of the service that is handed out next (once the pool is
+        # full).
+        self.index = 0
+
+        return
+
+
 @provides(IServiceRegistry)
 class ServiceRegistry(HasTraits):
-    """ The service registry. """
+    """ The service registry.
+
+    The registry can be used from multiple threads. Lookups do not take a lock
+    (unless they use a structured property query), as the per-protocol lists
+    of service Ids are immutable snapshots that are replaced (rather than
+    modified) when a service is registered or unregistered. Each service
+    factory is called exactly once, even if several threads look up the
+    service at the same time.
+
+    """
 
     ####  IServiceRegistry interface ##########################################
 
@@ -33,6 +247,20 @@ class ServiceRegistry(HasTraits):
     # An event that is fired when a service is unregistered.
     unregistered = Event
 
+    # An event that is fired when a batch of services is registered. The
+    # value is the list of the services' Ids.
+    services_registered = Event
+
+    # An event that is fired when a batch of services is unregistered. The
+    # value is the list of the services' Ids.
+    services_unregistered = Event
+
+    ####  'ServiceRegistry' interface #########################################
+
+    # An optional monitor that records statistics about how the registry is
+    # used (if this is None then nothing is recorded).
+    monitor = Instance(ServiceRegistryMonitor)
+
     ####  Private interface ###################################################
 
     # The services in the registry.
@@ -50,31 +278,136 @@ class ServiceRegistry(HasTraits):
     # registered with the object.
     _services = Dict
 
+    # An index of the services in the registry by protocol name.
+    #
+    # { protocol_name : (service_id, ...) }
+    #
+    # The service Ids for each protocol are kept in the order in which the
+    # services were registered. This allows a lookup to visit only those
+    # services that were registered against the requested protocol.
+    #
+    # The tuples are never modified, a new tuple is created instead. This
+    # allows lookups to iterate over them without taking the lock.
+    _services_by_protocol = Dict
+
+    # The services that are currently being created by their factories.
+    #
+    # { service_id : _PendingService }
+    _pending_services = Dict
+
+    # The services that are currently being created by coroutine factories.
+    #
+    # { service_id : asyncio.Task }
+    _pending_async_services = Dict
+
+    # Indexes over the properties of the services registered for a protocol.
+    #
+    # { protocol_name : { property_name : PropertyIndex } }
+    #
+    # An index is only built for a property once it has been used in enough
+    # structured queries (see 'PROPERTY_INDEX_THRESHOLD').
+    _property_indexes = Dict
+
+    # The number of structured queries that have used each property.
+    #
+    # { (protocol_name, property_name) : count }
+    _property_query_counts = Dict
+
+    # Rankings of the services registered for a protocol by an attribute that
+    # has been minimized or maximized.
+    #
+    # { protocol_name : { attribute : ServiceRanking or _UNRANKABLE } }
+    #
+    # Services can only be ranked by a trait (so that we know when its value
+    # changes). If any of a protocol's services doesn't have such a trait then
+    # lookups fall back to sorting the services each time.
+    _rankings = Dict
+
+    # The policies of the services that were registered with one.
+    #
+    # { service_id : (policy, factory) }
+    #
+    # Where 'factory' is what the service reverts to when it is evicted.
+    _policies = Dict
+
+    # The time that each service with a policy was last created or looked up.
+    #
+    # { service_id : time }
+    _last_used = Dict
+
+    # The created services of each protocol whose policy has a capacity,
+    # least recently used first.
+    #
+    # { protocol_name : OrderedDict(service_id : None) }
+    _lru = Dict
+
+    # The time at which lookups next check for idle services.
+    _next_idle_check = Float
+
+    # The number of times that any service has changed.
+    _generation = Int
+
+    # The generation of the registry when a service registered for each
+    # protocol last changed.
+    #
+    # { protocol_name : int }
+    _generations = Dict
+
     # The next service Id (service Ids are never persisted between process
     # invocations so this is simply an ever increasing integer!).
     _service_id = Int
 
+    # The lock that protects the registry's state.
+    _lock = Any
+
+    # The import manager used to import protocols and factories specified by
+    # name (imported symbols are cached by *all* import managers).
+    _import_manager = Instance(IImportManager, factory=ImportManager)
+
+    ###########################################################################
+    # 'object' interface.
+    ###########################################################################
+
+    def __init__(self, **traits):
+        """ Constructor. """
+
+        super(ServiceRegistry, self).__init__(**traits)
+
+        # A re-entrant lock, as service factories are free to register and
+        # look up other services.
+        self._lock = threading.RLock()
+
+        return
+
     ###########################################################################
     # 'IServiceRegistry' interface.
     ###########################################################################
 
-    def get_required_service(self, protocol, query='', minimize='',maximize=''):
+    def get_required_service(self, protocol, query='', minimize='',maximize='',
+                             properties=None):
         """ Return the service that matches the specified query.
 
         Raise a 'NoSuchServiceError' exception if no such service exists.
 
         """
 
-        service = self.get_service(protocol, query, minimize, maximize)
+        service = self.get_service(
+            protocol, query, minimize, maximize, properties
+        )
         if service is None:
             raise NoSuchServiceError(protocol)
 
         return service
 
-    def get_service(self, protocol, query='', minimize='', maximize=''):
+    def get_service(self, protocol, query='', minimize='', maximize='',
+                    properties=None):
         """ Return at most one service that matches the specified query. """
 
-        services = self.get_services(protocol, query, minimize, maximize)
+        # We only want one service so there is no need to look any further
+        # than the first match.
+        services = self._get_services(
+            protocol, query, minimize, maximize, properties, limit=1
+        )
         if len(services) > 0:
             service = services[0]
 
@@ -83,6 +416,21 @@ class ServiceRegistry(HasTraits):
 
         return service
 
+    def get_service_async(self, protocol, query='', minimize='', maximize='',
+                          properties=None):
+        """ Return at most one service that matches the specified query.
+
+        This is a coroutine (i.e. its result must be awaited), and requires
+        Python 3.5 or later.
+
+        """
+
+        from ._service_registry_async import get_service_async
+
+        return get_service_async(
+            self, protocol, query, minimize, maximize, properties
+        )
+
     def get_service_from_id(self, service_id):
         """ Return the service with the specified id. """
 
@@ -92,42 +440,47 @@ class ServiceRegistry(HasTraits):
         except KeyError:
             raise ValueError('no service with id <%d>' % service_id)
 
+        # A pooled service is registered as a pool, but the pool is just an
+        # implementation detail, so we return the factory that was actually
+        # registered.
+        if isinstance(obj, _ServicePool):
+            obj = obj.factory
+
         return obj
 
-    def get_services(self, protocol, query='', minimize='', maximize=''):
+    def get_services(self, protocol, query='', minimize='', maximize='',
+                     properties=None):
         """ Return all services that match the specified query. """
 
-        services = []
-        for service_id, (name, obj, properties) in self._services.items():
-            if self._get_protocol_name(protocol) == name:
-                # If the protocol is a string then we need to import it!
-                if isinstance(protocol, STRING_BASE_CLASS):
-                    actual_protocol = ImportManager().import_symbol(protocol)
-
-                # Otherwise, it is an actual protocol, so just use it!
-                else:
-                    actual_protocol = protocol
-
-                # If the registered service is actually a factory then use it
-                # to create the actual object.
-                obj = self._resolve_factory(
-                    actual_protocol, name, obj, properties, service_id
-                )
+        return self._get_services(
+            protocol, query, minimize, maximize, properties
+        )
 
-                # If a query was specified then only add the service if it
-                # matches it!
-                if len(query) == 0 or self._eval_query(obj, properties, query):
-                    services.append(obj)
+    def get_services_async(self, protocol, query='', minimize='', maximize='',
+                           properties=None):
+        """ Return all services that match the specified query.
 
-        # Are we minimizing or maximising anything? If so then sort the list
-        # of services by the specified attribute/property.
-        if minimize != '':
-            services.sort(key=lambda x: getattr(x, minimize))
+        This is a coroutine (i.e. its result must be awaited), and requires
+        Python 3.5 or later.
 
-        elif maximize != '':
-            services.sort(key=lambda x: getattr(x, maximize), reverse=True)
+        """
 
-        return services
+        # The asynchronous implementation uses 'async' syntax, so we only
+        # import it when it is actually used.
+        from ._service_registry_async import get_services_async
+
+        return get_services_async(
+            self, protocol, query, minimize, maximize, properties
+        )
+
+    def get_services_generation(self, protocol=None):
+        """ Return the generation of the services registered for a protocol.
+        """
+
+        if protocol is None:
+            return self._generation
+
+        return self._generations.get(self._get_protocol_name(protocol), 0)
 
     def get_service_properties(self, service_id):
         """ Return the dictionary of properties associated with a service. """
@@ -141,46 +494,219 @@ class ServiceRegistry(HasTraits):
 
         return properties
 
-    def register_service(self, protocol, obj, properties=None):
+    def register_service(self, protocol, obj, properties=None, policy=None):
         """ Register a service. """
 
         protocol_name = self._get_protocol_name(protocol)
 
-        # Make sure each service gets its own properties dictionary.
+        # Make sure each service gets its own properties dictionary (this also
+        # makes sure that the property indexes can't be invalidated by the
+        # caller changing the dictionary behind our back).
         if properties is None:
             properties = {}
 
-        service_id = self._next_service_id()
-        self._services[service_id] = (protocol_name, obj, properties)
+        else:
+            properties = dict(properties)
+
+        with self._lock:
+            service_id = self._next_service_id()
+            obj = self._add_policy(service_id, obj, policy)
+            self._services[service_id] = (protocol_name, obj, properties)
+            self._services_by_protocol[protocol_name] = \
+                self._services_by_protocol.get(protocol_name, ()) \
+                + (service_id,)
+            self._add_to_property_indexes(
+                protocol_name, service_id, properties
+            )
+            self._add_to_rankings(protocol_name, service_id)
+            self._next_generation(protocol_name)
+
         self.registered = service_id
 
         logger.debug('service <%d> registered %s', service_id, protocol_name)
 
         return service_id
 
+    def register_services(self, services):
+        """ Register a batch of services. """
+
+        # Make sure each service gets its own properties dictionary (see
+        # 'register_service').
+        entries = []
+        for service in services:
+            protocol, obj = service[:2]
+            properties = service[2] if len(service) > 2 else None
+            policy = service[3] if len(service) > 3 else None
+
+            entries.append((
+                self._get_protocol_name(protocol),
+                obj,
+                {} if properties is None else dict(properties),
+                policy
+            ))
+
+        if len(entries) == 0:
+            return []
+
+        with self._lock:
+            service_ids = []
+
+            # { protocol_name : [service_id] }
+            service_ids_by_protocol = OrderedDict()
+
+            for protocol_name, obj, properties, policy in entries:
+                service_id = self._next_service_id()
+                obj = self._add_policy(service_id, obj, policy)
+                self._services[service_id] = (protocol_name, obj, properties)
+                self._add_to_property_indexes(
+                    protocol_name, service_id, properties
+                )
+                self._add_to_rankings(protocol_name, service_id)
+
+                service_ids.append(service_id)
+                service_ids_by_protocol.setdefault(protocol_name, []).append(
+                    service_id
+                )
+
+            # Each protocol index is only updated once per batch.
+            for protocol_name, ids in service_ids_by_protocol.items():
+                self._services_by_protocol[protocol_name] = \
+                    self._services_by_protocol.get(protocol_name, ()) \
+                    + tuple(ids)
+                self._next_generation(protocol_name)
+
+        # Listeners to the per-service event still hear about each service.
+        for service_id in service_ids:
+            self.registered = service_id
+
+        self.services_registered = service_ids
+
+        logger.debug('%d services registered', len(service_ids))
+
+        return service_ids
+
     def set_service_properties(self, service_id, properties):
         """ Set the dictionary of properties associated with a service. """
 
-        try:
-            protocol, obj, old_properties = self._services[service_id]
-            self._services[service_id] = protocol, obj, properties.copy()
+        with self._lock:
+            try:
+                protocol, obj, old_properties = self._services[service_id]
 
-        except KeyError:
-            raise ValueError('no service with id <%d>' % service_id)
+            except KeyError:
+                raise ValueError('no service with id <%d>' % service_id)
+
+            properties = properties.copy()
+            self._services[service_id] = protocol, obj, properties
+
+            self._remove_from_property_indexes(
+                protocol, service_id, old_properties
+            )
+            self._add_to_property_indexes(protocol, service_id, properties)
+            self._next_generation(protocol)
 
         return
 
     def unregister_service(self, service_id):
         """ Unregister a service. """
 
-        try:
-            protocol, obj, properties = self._services.pop(service_id)
+        with self._lock:
+            try:
+                protocol, obj, properties = self._services.pop(service_id)
+
+            except KeyError:
+                raise ValueError('no service with id <%d>' % service_id)
+
+            self._remove_from_protocol_index(protocol, [service_id])
+            self._remove_from_property_indexes(protocol, service_id, properties)
+            self._remove_from_rankings(protocol, service_id)
+            self._remove_policy(protocol, service_id)
+            self._next_generation(protocol)
+
+        self.unregistered = service_id
+
+        logger.debug('service <%d> unregistered', service_id)
+
+        return
+
+    def unregister_services(self, service_ids):
+        """ Unregister a batch of services. """
+
+        # Ignore any duplicate Ids (but keep the order).
+        unique_ids = []
+        for service_id in service_ids:
+            if service_id not in unique_ids:
+                unique_ids.append(service_id)
+
+        if len(unique_ids) == 0:
+            return
+
+        with self._lock:
+            # Either all of the services are unregistered, or none of them are.
+            for service_id in unique_ids:
+                if service_id not in self._services:
+                    raise ValueError('no service with id <%d>' % service_id)
+
+            # { protocol_name : set(service_id) }
+            service_ids_by_protocol = OrderedDict()
+
+            for service_id in unique_ids:
+                protocol, obj, properties = self._services.pop(service_id)
+                self._remove_from_property_indexes(
+                    protocol, service_id, properties
+                )
+                self._remove_from_rankings(protocol, service_id)
+                self._remove_policy(protocol, service_id)
+
+                service_ids_by_protocol.setdefault(protocol, set()).add(
+                    service_id
+                )
+
+            # Each protocol index is only updated once per batch.
+            for protocol, ids in service_ids_by_protocol.items():
+                self._remove_from_protocol_index(protocol, ids)
+                self._next_generation(protocol)
+
+        # Listeners to the per-service event still hear about each service.
+        for service_id in unique_ids:
             self.unregistered = service_id
 
-            logger.debug('service <%d> unregistered', service_id)
+        self.services_unregistered = unique_ids
 
-        except KeyError:
-            raise ValueError('no service with id <%d>' % service_id)
+        logger.debug('%d services unregistered', len(unique_ids))
+
+        return
+
+    ###########################################################################
+    # 'ServiceRegistry' interface.
+    ###########################################################################
+
+    def evict_idle_services(self):
+        """ Evict the services that haven't been looked up for too long.
+
+        Lookups do this automatically (at most every 'IDLE_CHECK_INTERVAL'
+        seconds), but it can also be called explicitly, e.g. from a timer.
+
+        """
+
+        now = perf_counter()
+
+        with self._lock:
+            self._next_idle_check = now + IDLE_CHECK_INTERVAL
+
+            evicted = []
+            for service_id, (policy, factory) in list(self._policies.items()):
+                if policy.idle_timeout <= 0:
+                    continue
+
+                last_used = self._last_used.get(service_id)
+                if last_used is None or now - last_used < policy.idle_timeout:
+                    continue
+
+                protocol_name = self._evict_service(service_id)
+                if protocol_name is not None:
+                    evicted.append(protocol_name)
+
+        self._services_evicted(evicted)
 
         return
 
@@ -188,31 +714,502 @@ class ServiceRegistry(HasTraits):
     # Private interface.
     ###########################################################################
 
+    def _add_policy(self, service_id, obj, policy):
+        """ Add the policy (if any) of a service that is being registered.
+
+        Return the object to register for the service.
+
+        """
+
+        if policy is None:
+            return obj
+
+        # A pooled service is registered as a pool that creates the services
+        # (it never gets replaced by any one of them).
+        if policy.pool_size > 0:
+            obj = _ServicePool(obj, policy.pool_size)
+
+        self._policies[service_id] = (policy, obj)
+
+        return obj
+
+    def _add_to_property_indexes(self, protocol_name, service_id, properties):
+        """ Add a service's properties to the protocol's property indexes. """
+
+        indexes = self._property_indexes.get(protocol_name, {})
+        for name, index in indexes.items():
+            if name in properties:
+                index.add(service_id, properties[name])
+
+        return
+
+    def _add_to_ranking(self, protocol_name, ranking, service_id, obj):
+        """ Add a service to a ranking.
+
+        Return False if the service can't be ranked.
+
+        """
+
+        attribute = ranking.attribute
+
+        # We can only rank services by a trait that tells us when it changes,
+        # i.e. an ordinary trait (not e.g. a plain Python attribute set on the
+        # object, a constant, a delegate, an event or a property).
+        trait = obj.trait(attribute) if isinstance(obj, HasTraits) else None
+        if trait is None or trait.type != 'trait':
+            return False
+
+        def listener(new):
+            """ Keep the ranking up to date when the attribute changes. """
+
+            with self._lock:
+                if service_id in ranking:
+                    try:
+                        ranking.update(service_id, new)
+
+                    except TypeError:
+                        self._discard_ranking(protocol_name, attribute)
+
+            return
+
+        obj.on_trait_change(listener, attribute)
+
+        with self._lock:
+            # Make sure that the service wasn't unregistered (or the ranking
+            # discarded) while we weren't looking!
+            rankings = self._rankings.get(protocol_name, {})
+            if rankings.get(attribute) is not ranking \
+               or service_id not in self._services:
+                obj.on_trait_change(listener, attribute, remove=True)
+                return True
+
+            try:
+                ranking.add(service_id, getattr(obj, attribute))
+
+            except TypeError:
+                obj.on_trait_change(listener, attribute, remove=True)
+                return False
+
+            ranking.listeners[service_id] = (obj, listener)
+
+        return True
+
+    def _add_to_rankings(self, protocol_name, service_id):
+        """ Add a newly registered service to the protocol's rankings. """
+
+        rankings = self._rankings.get(protocol_name, {})
+        for attribute, ranking in list(rankings.items()):
+            # The new service might make it possible to rank services that
+            # couldn't be ranked before (well, it won't, but the registry
+            # doesn't try to be clever about it!).
+            if ranking is _UNRANKABLE:
+                del rankings[attribute]
+
+            # The new service will be added to the ranking the next time it is
+            # used (it might still be a factory).
+            else:
+                ranking.pending.append(service_id)
+
+        return
+
+    def _call_factory(self, protocol_name, factory, properties):
+        """ Call a service factory to create a service. """
+
+        monitor = self.monitor
+        if monitor is None:
+            return factory(**properties)
+
+        start = perf_counter()
+        try:
+            obj = factory(**properties)
+
+        except Exception:
+            monitor.record_factory(
+                protocol_name, perf_counter() - start, failed=True
+            )
+            raise
+
+        monitor.record_factory(protocol_name, perf_counter() - start)
+
+        return obj
+
+    def _check_idle_services(self):
+        """ Evict idle services if it is time to check for them. """
+
+        if len(self._policies) > 0 and perf_counter() >= self._next_idle_check:
+            self.evict_idle_services()
+
+        return
+
     def _create_namespace(self, service, properties):
         """ Create a namespace in which to evaluate a query. """
 
-        namespace = {}
-        namespace.update(service.__dict__)
-        namespace.update(properties)
+        return _QueryNamespace(service, properties)
 
-        return namespace
+    def _create_service(self, protocol_name, factory, properties, service_id):
+        """ Call a service factory to create a service. """
+
+        # A service factory is any callable that takes two arguments, the
+        # first is the protocol, the second is the (possibly empty) dictionary
+        # of properties that were registered with the service.
+        #
+        # If the factory is specified as a symbol path then import it.
+        if isinstance(factory, STRING_BASE_CLASS):
+            factory = self._import_manager.import_symbol(factory)
+
+        # Coroutine factories can only be used by asynchronous lookups.
+        if iscoroutinefunction(factory):
+            raise ValueError(
+                'the factory for service <%d> is a coroutine function, '
+                'use "get_service_async" to look it up' % service_id
+            )
+
+        return self._call_factory(protocol_name, factory, properties)
+
+    def _discard_ranking(self, protocol_name, attribute, unrankable=True):
+        """ Discard a ranking.
+
+        If 'unrankable' is True then lookups will not try to rank the services
+        by the attribute again until a service is registered or unregistered.
+
+        """
+
+        with self._lock:
+            rankings = self._rankings.get(protocol_name, {})
+
+            ranking = rankings.pop(attribute, None)
+            if ranking is not None and ranking is not _UNRANKABLE:
+                for obj, listener in ranking.listeners.values():
+                    obj.on_trait_change(listener, attribute, remove=True)
 
-    def _eval_query(self, service, properties, query):
-        """ Evaluate a query over a single service.
+                ranking.listeners.clear()
+
+            if unrankable:
+                rankings[attribute] = _UNRANKABLE
+
+        return
+
+    def _eval_query(self, protocol_name, service, properties, query):
+        """ Evaluate a (compiled) query over a single service.
 
         Return True if the service matches the query, otherwise return False.
 
         """
 
         namespace = self._create_namespace(service, properties)
+
+        # Names used in nested scopes (e.g. in generator expressions) are
+        # looked up as globals, and globals must be an actual dictionary, so in
+        # that case we resolve all of the names that the query uses up front.
+        if _has_nested_scopes(query):
+            global_namespace = namespace.resolve(_get_query_names(query))
+            namespace = None
+
+        else:
+            global_namespace = {}
+
         try:
-            result = eval(query, namespace)
+            result = eval(query, global_namespace, namespace)
+
+        # A query that can't be evaluated for a service (e.g. because it uses
+        # an attribute that the service doesn't have) doesn't match it.
+        except Exception as exception:
+            if self.monitor is not None:
+                self.monitor.record_query_failure(protocol_name, exception)
 
-        except:
             result = False
 
         return result
 
+    def _evict_service(self, service_id):
+        """ Evict a service (i.e. revert it to its factory).
+
+        Return the name of the service's protocol, or None if there was
+        nothing to evict.
+
+        """
+
+        entry = self._services.get(service_id)
+        if entry is None or service_id not in self._policies:
+            return None
+
+        protocol_name, obj, properties = entry
+        policy, factory = self._policies[service_id]
+
+        if isinstance(factory, _ServicePool):
+            if len(factory.services) == 0:
+                return None
+
+            del factory.services[:]
+            factory.index = 0
+
+        else:
+            # Has the service even been created?
+            if obj is factory:
+                return None
+
+            self._services[service_id] = (protocol_name, factory, properties)
+
+        self._last_used.pop(service_id, None)
+
+        lru = self._lru.get(protocol_name)
+        if lru is not None:
+            lru.pop(service_id, None)
+
+        # The service is added back to the rankings when it is created again.
+        self._remove_from_rankings(protocol_name, service_id)
+        self._add_to_rankings(protocol_name, service_id)
+
+        self._next_generation(protocol_name)
+
+        return protocol_name
+
+    def _find_services(self, protocol, query, minimize, maximize, properties,
+                       limit=None):
+        """ Return the services that match the specified query.
+
+        If a limit is specified then at most that many services are returned.
+
+        """
+
+        # Compile the query once for all of the candidate services (rather
+        # than once per candidate).
+        if query:
+            try:
+                query = compile_query(query)
+
+            # A query that can't be compiled doesn't match any services.
+            except SyntaxError:
+                return []
+
+        actual_protocol, service_ids = self._get_candidates(
+            protocol, properties
+        )
+
+        # If we are minimizing or maximizing an attribute then use a ranking of
+        # the services by that attribute rather than sorting them (if we can).
+        attribute = minimize or maximize
+        if attribute and len(service_ids) > 0:
+            services = self._get_ranked_services(
+                self._get_protocol_name(protocol), actual_protocol,
+                service_ids, query, attribute, not minimize,
+                bool(properties), limit
+            )
+            if services is not None:
+                return services
+
+        services = []
+        for service_id in service_ids:
+            # The service may have been unregistered since we took the
+            # snapshot of the Ids (by another thread, or by a factory that was
+            # resolved earlier in this loop).
+            entry = self._services.get(service_id)
+            if entry is None:
+                continue
+
+            name, obj, service_properties = entry
+
+            # If the registered service is actually a factory then use it
+            # to create the actual object.
+            obj = self._resolve_factory(
+                actual_protocol, name, obj, service_properties, service_id
+            )
+
+            # If a query was specified then only add the service if it
+            # matches it!
+            if not query or self._eval_query(name, obj, service_properties, query):
+                services.append(obj)
+                if service_id in self._policies:
+                    self._touch_service(name, service_id)
+
+                # If the services don't need sorting then we can stop as soon
+                # as we have enough of them (without creating any more
+                # services from factories).
+                if not attribute and limit is not None \
+                   and len(services) >= limit:
+                    break
+
+        return self._sort_services(services, minimize, maximize)
+
+    def _get_candidates(self, protocol, properties):
+        """ Return the Ids of the services that may match a lookup.
+
+        Returns a tuple in the form (actual_protocol, service_ids).
+
+        """
+
+        protocol_name = self._get_protocol_name(protocol)
+
+        # We only need to look at the services registered for the protocol.
+        #
+        # If a structured property query was specified then we only need to
+        # look at the services that match it. The snapshot of the Ids is taken
+        # under the same lock as the match so that the two agree.
+        if properties:
+            with self._lock:
+                service_ids = self._match_properties(
+                    protocol_name,
+                    self._services_by_protocol.get(protocol_name, ()),
+                    properties
+                )
+
+        else:
+            service_ids = self._services_by_protocol.get(protocol_name, ())
+
+        # If the protocol is a string then we need to import it! We only do
+        # this if there are services registered for the protocol to make sure
+        # that looking up a protocol with no services imports nothing.
+        if len(service_ids) > 0 and isinstance(protocol, STRING_BASE_CLASS):
+            actual_protocol = self._import_manager.import_symbol(protocol)
+
+        # Otherwise, it is an actual protocol, so just use it!
+        else:
+            actual_protocol = protocol
+
+        return actual_protocol, service_ids
+
+    def _get_ranked_services(self, protocol_name, actual_protocol,
+                             service_ids, query, attribute, reverse,
+                             is_filtered, limit):
+        """ Return the services that match a query in ranking order.
+
+        Return None if the services can't be ranked by the attribute.
+
+        """
+
+        ranking = self._get_ranking(protocol_name, actual_protocol, attribute)
+        if ranking is None:
+            return None
+
+        with self._lock:
+            # If we only want the best service then we don't need to look at
+            # any of the others!
+            if limit == 1 and not query and not is_filtered:
+                service_id = ranking.first(reverse)
+                ranked_ids = [] if service_id is None else [service_id]
+
+            else:
+                ranked_ids = ranking.ids(reverse)
+
+        # If the candidates were filtered (by a structured property query)
+        # then we only want the ranked services that passed the filter.
+        candidates = set(service_ids) if is_filtered else None
+
+        services = []
+        for service_id in ranked_ids:
+            if candidates is not None and service_id not in candidates:
+                continue
+
+            entry = self._services.get(service_id)
+            if entry is None:
+                continue
+
+            name, obj, service_properties = entry
+            if not query or self._eval_query(name, obj, service_properties, query):
+                services.append(obj)
+                if service_id in self._policies:
+                    self._touch_service(name, service_id)
+
+                if limit is not None and len(services) >= limit:
+                    break
+
+        return services
+
+    def _get_ranking(self, protocol_name, actual_protocol, attribute):
+        """ Return the ranking of a protocol's services by an attribute.
+
+        The ranking is created the first time it is asked for, and any
+        services registered since the last time are added to it (creating
+        them from their factories if necessary).
+
+        Return None if the services can't be ranked by the attribute.
+
+        """
+
+        with self._lock:
+            rankings = self._rankings.setdefault(protocol_name, {})
+
+            ranking = rankings.get(attribute)
+            if ranking is _UNRANKABLE:
+                return None
+
+            if ranking is None:
+                ranking = ServiceRanking(attribute)
+                ranking.pending.extend(
+                    self._services_by_protocol.get(protocol_name, ())
+                )
+                rankings[attribute] = ranking
+
+            # If another lookup is still adding services to the ranking then
+            # it is incomplete, so we don't use it.
+            pending = ranking.pending
+            if len(pending) == 0:
+                return ranking if ranking.updating == 0 else None
+
+            ranking.pending = []
+            ranking.updating += 1
+
+        try:
+            for service_id in pending:
+                entry = self._services.get(service_id)
+                if entry is None:
+                    continue
+
+                # Pooled services can't be ranked as lookups get a different
+                # service each time.
+                name, obj, properties = entry
+                if isinstance(obj, _ServicePool):
+                    self._discard_ranking(protocol_name, attribute)
+                    return None
+
+                # Services created by factories can only be ranked once they
+                # have been created!
+                obj = self._resolve_factory(
+                    actual_protocol, name, obj, properties, service_id
+                )
+
+                if not self._add_to_ranking(
+                    protocol_name, ranking, service_id, obj
+                ):
+                    self._discard_ranking(protocol_name, attribute)
+                    return None
+
+        # If a factory fails then try again next time.
+        except:
+            self._discard_ranking(protocol_name, attribute, unrankable=False)
+            raise
+
+        finally:
+            with self._lock:
+                ranking.updating -= 1
+
+        return ranking
+
+    def _get_pooled_service(self, protocol_name, pool, properties,
+                            service_id):
+        """ Return the next service from a pool.
+
+        If the pool isn't full yet then a new service is created.
+
+        """
+
+        with self._lock:
+            if len(pool.services) >= pool.size:
+                service = pool.services[pool.index]
+                pool.index = (pool.index + 1) % len(pool.services)
+
+                return service
+
+        service = self._create_service(
+            protocol_name, pool.factory, properties, service_id
+        )
+
+        with self._lock:
+            pool.services.append(service)
+            self._last_used[service_id] = perf_counter()
+
+        return service
+
     def _get_protocol_name(self, protocol_or_name):
         """ Returns the full class name for a protocol. """
 
@@ -226,6 +1223,66 @@ class ServiceRegistry(HasTraits):
 
         return name
 
+    def _get_property_index(self, protocol_name, name):
+        """ Return the index over a property of a protocol's services.
+
+        Return None if the property has not (yet) been used in enough queries
+        to be worth indexing.
+
+        """
+
+        indexes = self._property_indexes.setdefault(protocol_name, {})
+
+        index = indexes.get(name)
+        if index is None:
+            key = (protocol_name, name)
+            count = self._property_query_counts.get(key, 0) + 1
+            self._property_query_counts[key] = count
+
+            if count >= PROPERTY_INDEX_THRESHOLD:
+                index = PropertyIndex()
+                for service_id in self._services_by_protocol.get(
+                    protocol_name, ()
+                ):
+                    properties = self._services[service_id][2]
+                    if name in properties:
+                        index.add(service_id, properties[name])
+
+                indexes[name] = index
+
+                logger.debug(
+                    'property <%s> of protocol %s indexed', name, protocol_name
+                )
+
+        return index
+
+    def _get_services(self, protocol, query, minimize, maximize, properties,
+                      limit=None):
+        """ Return the services that match the specified query.
+
+        If a limit is specified then at most that many services are returned.
+
+        """
+
+        self._check_idle_services()
+
+        monitor = self.monitor
+        if monitor is None:
+            return self._find_services(
+                protocol, query, minimize, maximize, properties, limit
+            )
+
+        start = perf_counter()
+        services = self._find_services(
+            protocol, query, minimize, maximize, properties, limit
+        )
+        monitor.record_lookup(
+            self._get_protocol_name(protocol), perf_counter() - start,
+            len(services)
+        )
+
+        return services
+
     def _is_service_factory(self, protocol, obj):
         """ Is the object a factory for services supporting the protocol? """
 
@@ -235,6 +1292,70 @@ class ServiceRegistry(HasTraits):
 
         return not isinstance(obj, protocol)
 
+    def _match_properties(self, protocol_name, service_ids, properties):
+        """ Return the Ids of the services that match a property query.
+
+        The query is a dictionary of conditions on the services' properties
+        e.g. {'language' : 'python', 'priority__gt' : 3}. Conditions on indexed
+        properties are answered from the index, and any remaining conditions
+        are checked against each of the candidate services.
+
+        """
+
+        matched   = None
+        unindexed = []
+        for key, operand in properties.items():
+            name, op = parse_condition(key)
+
+            index = self._get_property_index(protocol_name, name)
+            ids   = index.match(op, operand) if index is not None else None
+            if ids is None:
+                unindexed.append((name, op, operand))
+
+            elif matched is None:
+                matched = ids
+
+            else:
+                matched &= ids
+
+        # Service Ids increase monotonically so sorting the matched Ids puts
+        # them back into the order in which the services were registered.
+        if matched is not None:
+            service_ids = sorted(matched)
+
+        if len(unindexed) > 0:
+            matched_ids = []
+            for service_id in service_ids:
+                # Skip any services that have been unregistered (if the Ids
+                # came from a snapshot taken earlier).
+                entry = self._services.get(service_id)
+                if entry is None:
+                    continue
+
+                if all(
+                    matches(entry[2], name, op, operand)
+
+                    for name, op, operand in unindexed
+                ):
+                    matched_ids.append(service_id)
+
+            service_ids = matched_ids
+
+        return service_ids
+
+    def _next_generation(self, protocol_name):
+        """ Move the registry on to its next generation.
+
+        This is called (with the lock held!) whenever a service registered
+        for a protocol changes.
+
+        """
+
+        self._generation += 1
+        self._generations[protocol_name] = self._generation
+
+        return
+
     def _next_service_id(self):
         """ Returns the next service ID. """
 
@@ -242,26 +1363,213 @@ class ServiceRegistry(HasTraits):
 
         return self._service_id
 
+    def _remove_policy(self, protocol_name, service_id):
+        """ Remove the policy (if any) of a service that is unregistered. """
+
+        if self._policies.pop(service_id, None) is not None:
+            self._last_used.pop(service_id, None)
+
+            lru = self._lru.get(protocol_name)
+            if lru is not None:
+                lru.pop(service_id, None)
+
+        return
+
+    def _remove_from_protocol_index(self, protocol_name, removed_ids):
+        """ Remove some services from the protocol index. """
+
+        service_ids = tuple(
+            id for id in self._services_by_protocol[protocol_name]
+
+            if id not in removed_ids
+        )
+
+        # Don't keep empty entries around for protocols that no longer have
+        # any services.
+        if len(service_ids) == 0:
+            del self._services_by_protocol[protocol_name]
+
+        else:
+            self._services_by_protocol[protocol_name] = service_ids
+
+        return
+
+    def _remove_from_property_indexes(self, protocol_name, service_id,
+                                      properties):
+        """ Remove a service's properties from the protocol's indexes. """
+
+        indexes = self._property_indexes.get(protocol_name, {})
+        for name, index in indexes.items():
+            if name in properties:
+                index.remove(service_id, properties[name])
+
+        return
+
+    def _remove_from_rankings(self, protocol_name, service_id):
+        """ Remove an unregistered service from the protocol's rankings. """
+
+        rankings = self._rankings.get(protocol_name, {})
+        for attribute, ranking in list(rankings.items()):
+            if ranking is _UNRANKABLE:
+                del rankings[attribute]
+
+            elif service_id in ranking:
+                ranking.remove(service_id)
+
+                obj, listener = ranking.listeners.pop(service_id)
+                obj.on_trait_change(listener, attribute, remove=True)
+
+            elif service_id in ranking.pending:
+                ranking.pending.remove(service_id)
+
+        return
+
     def _resolve_factory(self, protocol, name, obj, properties, service_id):
         """ If 'obj' is a factory then use it to create the actual service. """
 
         # Is the registered service actually a service *factory*?
-        if self._is_service_factory(protocol, obj):
-            # A service factory is any callable that takes two arguments, the
-            # first is the protocol, the second is the (possibly empty)
-            # dictionary of properties that were registered with the service.
-            #
-            # If the factory is specified as a symbol path then import it.
-            if isinstance(obj, STRING_BASE_CLASS):
-                obj = ImportManager().import_symbol(obj)
+        if not self._is_service_factory(protocol, obj):
+            return obj
+
+        with self._lock:
+            # Another thread may have created the service (or unregistered
+            # it) since we looked it up.
+            entry = self._services.get(service_id)
+            if entry is not None:
+                name, obj, properties = entry
+                if not self._is_service_factory(protocol, obj):
+                    return obj
+
+            # If another thread is already calling the factory then we wait
+            # for it to finish rather than calling it again.
+            pending = self._pending_services.get(service_id)
+            if pending is None:
+                pending = _PendingService()
+                self._pending_services[service_id] = pending
+                is_owner = True
+
+            else:
+                is_owner = False
+
+        if not is_owner:
+            if pending.owner is threading.current_thread():
+                raise ValueError(
+                    'the factory for service <%d> requires itself' % service_id
+                )
+
+            return pending.get()
+
+        try:
+            if isinstance(obj, _ServicePool):
+                is_pooled = True
+                obj = self._get_pooled_service(
+                    name, obj, properties, service_id
+                )
+
+            else:
+                is_pooled = False
+                obj = self._create_service(name, obj, properties, service_id)
+
+        except BaseException as exception:
+            with self._lock:
+                del self._pending_services[service_id]
+
+            pending.set(exception=exception)
+            raise
+
+        # The service replaces the factory (but not the pool!).
+        if not is_pooled:
+            self._set_service(service_id, obj)
+
+        with self._lock:
+            del self._pending_services[service_id]
+
+        pending.set(service=obj)
+
+        return obj
+
+    def _service_created(self, protocol_name, service_id):
+        """ Apply the policy of a service that has just been created.
+
+        Return the names of the protocols of any services that were evicted
+        to make room for it.
+
+        """
+
+        self._last_used[service_id] = perf_counter()
+
+        policy, factory = self._policies[service_id]
+        if policy.capacity <= 0:
+            return []
 
-            obj = obj(**properties)
+        lru = self._lru.setdefault(protocol_name, OrderedDict())
+        lru[service_id] = None
 
+        evicted = []
+        while len(lru) > policy.capacity:
+            oldest = next(iter(lru))
+            if self._evict_service(oldest) is not None:
+                evicted.append(protocol_name)
+
+            lru.pop(oldest, None)
+
+        return evicted
+
+    def _services_evicted(self, protocol_names):
+        """ Log the protocols whose services have been evicted. """
+
+        for protocol_name in OrderedDict.fromkeys(protocol_names):
+            logger.debug('services evicted %s', protocol_name)
+
+        return
+
+    def _set_service(self, service_id, obj):
+        """ Replace a service factory with the service that it created. """
+
+        with self._lock:
             # The resulting service object replaces the factory in the cache
             # (i.e. the factory will not get called again unless it is
-            # unregistered first).
-            self._services[service_id] = (name, obj, properties)
+            # unregistered first). If the service was unregistered while the
+            # factory was running then we don't put it back!
+            entry = self._services.get(service_id)
+            if entry is not None:
+                self._services[service_id] = (entry[0], obj, entry[2])
 
-        return obj
+            if entry is not None and service_id in self._policies:
+                evicted = self._service_created(entry[0], service_id)
+
+            else:
+                evicted = []
+
+        self._services_evicted(evicted)
+
+        return
+
+    def _sort_services(self, services, minimize, maximize):
+        """ Sort services by the attribute to minimize or maximize. """
+
+        # Are we minimizing or maximising anything? If so then sort the list
+        # of services by the specified attribute/property.
+        if minimize != '':
+            services.sort(key=lambda x: getattr(x, minimize))
+
+        elif maximize != '':
+            services.sort(key=lambda x: getattr(x, maximize), reverse=True)
+
+        return services
+
+    def _touch_service(self, protocol_name, service_id):
+        """ Record that a service with a policy has been looked up. """
+
+        with self._lock:
+            self._last_used[service_id] = perf_counter()
+
+            # Move the service to the most recently used end of the queue.
+            lru = self._lru.get(protocol_name)
+            if lru is not None and service_id in lru:
+                del lru[service_id]
+                lru[service_id] = None
+
+        return
 
 #### EOF ######################################################################
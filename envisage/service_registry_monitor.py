@@ -0,0 +1,191 @@
+""" Records statistics about how a service registry is used. """
+
+
+# Standard library imports.
+from bisect import bisect_left
+import json, threading
+
+
+# The upper bounds (in seconds) of the buckets of the lookup time histograms.
+# Any lookup that takes longer than the last bound goes in an extra bucket.
+LATENCY_BUCKETS = (0.00001, 0.0001, 0.001, 0.01, 0.1, 1.0)
+
+
+class ServiceRegistryMonitor(object):
+    """ Records statistics about how a service registry is used.
+
+    To monitor a registry, set its 'monitor' trait::
+
+        monitor = ServiceRegistryMonitor()
+        application.service_registry.monitor = monitor
+
+    The monitor records, per protocol, the number of lookups (and how many of
+    them found nothing), a histogram of how long they took, the number of
+    times that a query could not be evaluated (and the type of the error), and
+    the number and duration of the calls to service factories.
+
+    The monitor can be shared by several registries, and is thread-safe.
+
+    """
+
+    def __init__(self):
+        """ Constructor. """
+
+        # The statistics for each protocol.
+        #
+        # { protocol_name : dict }
+        self._protocols = {}
+
+        # A lock that protects the statistics.
+        self._lock = threading.Lock()
+
+        return
+
+    ###########################################################################
+    # 'ServiceRegistryMonitor' interface.
+    ###########################################################################
+
+    def dump(self, f, indent=2):
+        """ Write a snapshot of the statistics to a file as JSON. """
+
+        json.dump(self.snapshot(), f, indent=indent, sort_keys=True)
+
+        return
+
+    def record_factory(self, protocol_name, duration, failed=False):
+        """ Record a call to a service factory. """
+
+        with self._lock:
+            statistics = self._get_statistics(protocol_name)
+            statistics['factories'] += 1
+            statistics['factory_time']['total'] += duration
+            statistics['factory_time']['max'] = max(
+                statistics['factory_time']['max'], duration
+            )
+
+            if failed:
+                statistics['factory_failures'] += 1
+
+        return
+
+    def record_lookup(self, protocol_name, duration, count):
+        """ Record a lookup that found 'count' services. """
+
+        with self._lock:
+            statistics = self._get_statistics(protocol_name)
+            statistics['lookups'] += 1
+            if count == 0:
+                statistics['misses'] += 1
+
+            statistics['lookup_time']['total'] += duration
+            statistics['lookup_time']['max'] = max(
+                statistics['lookup_time']['max'], duration
+            )
+            statistics['lookup_time']['histogram'][
+                bisect_left(LATENCY_BUCKETS, duration)
+            ] += 1
+
+        return
+
+    def record_query_failure(self, protocol_name, exception):
+        """ Record a query that raised an exception when it was evaluated. """
+
+        with self._lock:
+            statistics = self._get_statistics(protocol_name)
+            statistics['query_failures'] += 1
+
+            errors = statistics['query_errors']
+            error  = type(exception).__name__
+            errors[error] = errors.get(error, 0) + 1
+
+        return
+
+    def reset(self):
+        """ Throw away all of the statistics recorded so far. """
+
+        with self._lock:
+            self._protocols.clear()
+
+        return
+
+    def snapshot(self):
+        """ Return a snapshot of the statistics.
+
+        The snapshot is a dictionary in the form::
+
+            {
+                'latency_buckets' : [upper_bound, ...],
+                'protocols'       : {protocol_name : statistics}
+            }
+
+        that only contains builtin types (so it can be serialized as JSON).
+        The statistics of each protocol are a dictionary with the keys
+        'lookups', 'misses', 'lookup_time', 'query_failures', 'query_errors',
+        'factories', 'factory_failures' and 'factory_time'. The 'histogram'
+        in 'lookup_time' has one count per latency bucket, plus one for the
+        lookups that took longer than the last bucket's upper bound.
+
+        """
+
+        with self._lock:
+            protocols = {}
+            for protocol_name, statistics in self._protocols.items():
+                protocols[protocol_name] = self._copy_statistics(statistics)
+
+        snapshot = {
+            'latency_buckets' : list(LATENCY_BUCKETS),
+            'protocols'       : protocols
+        }
+
+        return snapshot
+
+    def to_json(self, indent=None):
+        """ Return a snapshot of the statistics as a JSON string. """
+
+        return json.dumps(self.snapshot(), indent=indent, sort_keys=True)
+
+    ###########################################################################
+    # Private interface.
+    ###########################################################################
+
+    def _copy_statistics(self, statistics):
+        """ Return a (deep) copy of the statistics for a protocol. """
+
+        copy = dict(statistics)
+        copy['factory_time'] = dict(statistics['factory_time'])
+        copy['lookup_time']  = dict(statistics['lookup_time'])
+        copy['lookup_time']['histogram'] = list(
+            statistics['lookup_time']['histogram']
+        )
+        copy['query_errors'] = dict(statistics['query_errors'])
+
+        return copy
+
+    def _get_statistics(self, protocol_name):
+        """ Return the statistics for a protocol (creating them if needed). """
+
+        statistics = self._protocols.get(protocol_name)
+        if statistics is None:
+            statistics = {
+                'lookups'          : 0,
+                'misses'           : 0,
+                'lookup_time'      : {
+                    'total'     : 0.0,
+                    'max'       : 0.0,
+                    'histogram' : [0] * (len(LATENCY_BUCKETS) + 1)
+                },
+                'query_failures'   : 0,
+                'query_errors'     : {},
+                'factories'        : 0,
+                'factory_failures' : 0,
+                'factory_time'     : {
+                    'total' : 0.0,
+                    'max'   : 0.0
+                }
+            }
+
+            self._protocols[protocol_name] = statistics
+
+        return statistics
+
+#### EOF ######################################################################
@@ -0,0 +1,79 @@
+""" Coroutine service factories used by the asynchronous lookup tests.
+
+These are in a separate module as they use 'async' syntax, which requires
+Python 3.5 or later.
+
+"""
+
+
+# Standard library imports.
+import asyncio
+
+
+def make_async_factory(klass, calls, delay=0.05):
+    """ Return a coroutine factory for instances of a class.
+
+    Each call to the factory is recorded in the 'calls' list.
+
+    """
+
+    async def factory(**properties):
+        """ A slow, asynchronous factory. """
+
+        calls.append(properties)
+        await asyncio.sleep(delay)
+
+        return klass(**properties)
+
+    return factory
+
+
+def run(coroutine):
+    """ Run a coroutine to completion in a new event loop. """
+
+    loop = asyncio.new_event_loop()
+    try:
+        result = loop.run_until_complete(coroutine)
+
+    finally:
+        loop.close()
+
+    return result
+
+
+def gather(*coroutines):
+    """ Return a coroutine that runs coroutines concurrently. """
+
+    async def gather_coroutines():
+        return await asyncio.gather(*coroutines)
+
+    return gather_coroutines()
+
+def cancel_first(first, second, delay=0.01):
+    """ Return a coroutine that cancels the first of two coroutines.
+
+    Both coroutines are started, and after a delay the first one is
+    cancelled. The coroutine returns whether the first one was cancelled and
+    the result of the second one.
+
+    """
+
+    async def cancel_first_coroutine():
+        first_task  = asyncio.ensure_future(first)
+        second_task = asyncio.ensure_future(second)
+
+        await asyncio.sleep(delay)
+        first_task.cancel()
+
+        try:
+            await first_task
+            cancelled = False
+
+        except asyncio.CancelledError:
+            cancelled = True
+
+        return cancelled, await second_task
+
+    return cancel_first_coroutine()
+
+#### EOF ######################################################################
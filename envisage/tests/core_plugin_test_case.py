@@ -6,7 +6,7 @@ from pkg_resources import resource_filename
 
 # Enthought library imports.
 from envisage.api import Application, Category, ClassLoadHook, Plugin
-from envisage.api import ServiceOffer
+from envisage.api import ServiceOffer, ServiceRegistry
 from traits.api import HasTraits, Int, Interface, List
 from traits.testing.unittest_tools import unittest
 
@@ -91,6 +91,55 @@ class CorePluginTestCase(unittest.TestCase):
 
         return
 
+    def test_service_offers_with_registry_without_batches(self):
+        """ service offers with registry without batches """
+
+        from envisage.core_plugin import CorePlugin
+
+        class IMyService(Interface):
+            pass
+
+        # A service registry that (like those written before batches were
+        # supported) can only register services one at a time.
+        class MyServiceRegistry(ServiceRegistry):
+            register_services   = None
+            unregister_services = None
+
+        class PluginA(Plugin):
+            id = 'A'
+
+            service_offers = List(
+                contributes_to='envisage.service_offers'
+            )
+
+            def _service_offers_default(self):
+                """ Trait initializer. """
+
+                service_offers = [
+                    ServiceOffer(protocol=IMyService, factory=lambda: 42)
+                ]
+
+                return service_offers
+
+        core = CorePlugin()
+        a    = PluginA()
+
+        application = TestApplication(
+            plugins=[core, a], service_registry=MyServiceRegistry()
+        )
+        application.start()
+
+        # Lookup the service.
+        self.assertEqual(42, application.get_service(IMyService))
+
+        # Stop the core plugin.
+        application.stop_plugin(core)
+
+        # Make sure the service has gone.
+        self.assertEqual(None, application.get_service(IMyService))
+
+        return
+
     def test_dynamically_added_service_offer(self):
         """ dynamically added service offer """
 
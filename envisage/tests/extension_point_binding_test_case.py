@@ -2,9 +2,9 @@
 
 
 # Enthought library imports.
-from envisage.api import ExtensionPoint
+from envisage.api import Application, ExtensionPoint, Plugin
 from envisage.api import bind_extension_point
-from traits.api import HasTraits, List
+from traits.api import HasTraits, Int, List
 from traits.testing.unittest_tools import unittest
 
 # Local imports.
@@ -94,6 +94,115 @@ class ExtensionPointBindingTestCase(unittest.TestCase):
 
         return
 
+    def test_extensions_are_added_in_place(self):
+        """ extensions are added in place """
+
+        registry = self.extension_registry
+
+        # Add an extension point.
+        registry.add_extension_point(self._create_extension_point('my.ep'))
+
+        # Add some extensions.
+        registry.add_extensions('my.ep', [42, 43])
+
+        # Declare a class that consumes the extension.
+        class Foo(HasTraits):
+            x = List(Int)
+
+        f = Foo()
+        bind_extension_point(f, 'x', 'my.ep')
+        x = f.x
+
+        f.on_trait_change(listener)
+
+        # Add some more extensions.
+        registry.add_extensions('my.ep', [44, 45])
+
+        # Make sure that the object's list was updated in place...
+        self.assertIs(x, f.x)
+        self.assertEqual([42, 43, 44, 45], f.x)
+
+        # ... and that the correct trait change event was fired.
+        self.assertEqual('x_items', listener.trait_name)
+        self.assertEqual([44, 45], listener.new.added)
+        self.assertEqual(2, listener.new.index)
+
+        return
+
+    def test_contributing_trait_reassigned(self):
+        """ contributing trait reassigned """
+
+        class PluginA(Plugin):
+            id = 'A'
+            x  = ExtensionPoint(List(Int), id='a.x')
+
+        class PluginB(Plugin):
+            id = 'B'
+            c  = List(Int, [1, 2, 3], contributes_to='a.x')
+
+        b = PluginB()
+        application = Application(plugins=[PluginA(), b])
+
+        # Declare a class that consumes the extension.
+        class Foo(HasTraits):
+            x = List(Int)
+
+        f = Foo()
+        bind_extension_point(f, 'x', 'a.x', application)
+        self.assertEqual([1, 2, 3], f.x)
+
+        # Reassigning the contributing trait fires an event whose index is a
+        # slice.
+        b.c = [4, 5]
+        self.assertEqual([4, 5], f.x)
+
+        return
+
+    def test_extension_point_changed_by_listener(self):
+        """ extension point changed by listener """
+
+        class PluginA(Plugin):
+            id = 'A'
+            x  = ExtensionPoint(List(Int), id='a.x')
+            c  = List(Int, [1], contributes_to='a.x')
+
+        class PluginB(Plugin):
+            id = 'B'
+            c  = List(Int, contributes_to='a.x')
+
+        a = PluginA()
+        application = Application(plugins=[a])
+        self.assertEqual([1], application.get_extensions('a.x'))
+
+        # A listener that adds a plugin when the extension point changes. The
+        # binding hears about the new plugin's contributions *before* the
+        # change that prompted it.
+        def add_plugin(extension_registry, event):
+            """ An extension point listener. """
+
+            if event.added == [2]:
+                application.add_plugin(PluginB(c=[9]))
+
+            return
+
+        application.add_extension_point_listener(add_plugin, 'a.x')
+
+        # Declare a class that consumes the extension.
+        class Foo(HasTraits):
+            x = List(Int)
+
+        f = Foo()
+        bind_extension_point(f, 'x', 'a.x', application)
+        self.assertEqual([1], f.x)
+
+        # The binding's list is kept in step with the extension point (rather
+        # than having the changes applied to it twice).
+        a.c.append(2)
+        self.assertEqual([1, 2, 9], application.get_extensions('a.x'))
+        self.assertEqual([1, 2, 9], f.x)
+
+        return
+
     def test_set_extensions_via_trait(self):
         """ set extensions via trait """
 
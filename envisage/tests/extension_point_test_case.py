@@ -1,13 +1,26 @@
 """ Tests for extension points. """
 
 
+# Standard library imports.
+import gc, weakref
+
 # Enthought library imports.
-from envisage.api import Application, ExtensionPoint
+from envisage.api import Application, ExtensionPoint, Plugin
 from envisage.api import ExtensionRegistry
-from traits.api import HasTraits, Int, List, TraitError
+from envisage.tests.mutable_extension_registry import (
+    MutableExtensionRegistry
+)
+from traits.api import BaseInt, Dict, HasTraits, Instance, Int, List, Str
+from traits.api import TraitError
 from traits.testing.unittest_tools import unittest
 
 
+class Item(HasTraits):
+    """ A contribution to a keyed extension point. """
+
+    id = Str
+
+
 class TestBase(HasTraits):
     """ Base class for all test classes that use the 'ExtensionPoint' type. """
 
@@ -122,6 +135,58 @@ class ExtensionPointTestCase(unittest.TestCase):
 
         return
 
+    def test_connected_traits_share_a_listener(self):
+        """ connected traits share a listener """
+
+        registry = self.registry
+
+        # Add an extension point.
+        registry.add_extension_point(self._create_extension_point('my.ep'))
+
+        # Declare a class that consumes the extension.
+        class Foo(TestBase):
+            x = ExtensionPoint(id='my.ep')
+
+            x_changed_count = Int
+
+            def _x_changed(self):
+                """ Static trait change handler. """
+
+                self.x_changed_count += 1
+
+                return
+
+        f, g, h = Foo(), Foo(), Foo()
+        ExtensionPoint.connect_extension_point_traits(f)
+        ExtensionPoint.connect_extension_point_traits(g)
+        ExtensionPoint.connect_extension_point_traits(h)
+
+        # The registry only has one listener for all of the objects.
+        listeners = registry.extension_registry._listeners['my.ep']
+        self.assertEqual(1, len(listeners))
+
+        registry.set_extensions('my.ep', [42])
+        self.assertEqual(1, f.x_changed_count)
+        self.assertEqual(1, g.x_changed_count)
+        self.assertEqual(1, h.x_changed_count)
+
+        # Objects that are garbage collected are no longer called.
+        dispatcher = listeners[0]()
+        del h
+        gc.collect()
+        self.assertEqual(2, len(dispatcher))
+
+        ExtensionPoint.disconnect_extension_point_traits(f)
+        registry.set_extensions('my.ep', [43])
+        self.assertEqual(1, f.x_changed_count)
+        self.assertEqual(2, g.x_changed_count)
+
+        # When the last object is disconnected, so is the listener.
+        ExtensionPoint.disconnect_extension_point_traits(g)
+        self.assertEqual(0, len(listeners))
+
+        return
+
     def test_untyped_extension_point(self):
         """ untyped extension point """
 
@@ -174,6 +239,159 @@ class ExtensionPointTestCase(unittest.TestCase):
 
         return
 
+    def test_validated_extensions_are_cached(self):
+        """ validated extensions are cached """
+
+        registry = self.registry
+
+        # Add an extension point.
+        registry.add_extension_point(self._create_extension_point('my.ep'))
+
+        # Set the extensions.
+        registry.set_extensions('my.ep', [42, 43, 44])
+
+        # A trait type that records each value that it validates.
+        validated = []
+        class RecordedInt(BaseInt):
+            def validate(self, obj, name, value):
+                validated.append(value)
+                return super(RecordedInt, self).validate(obj, name, value)
+
+        # Declare a class that consumes the extension.
+        class Foo(TestBase):
+            x = ExtensionPoint(List(RecordedInt), id='my.ep')
+
+        # The extensions are only validated once.
+        f = Foo()
+        self.assertEqual([42, 43, 44], f.x)
+        self.assertEqual([42, 43, 44], f.x)
+        self.assertEqual([42, 43, 44], validated)
+
+        # ... until they change.
+        registry.set_extensions('my.ep', [45])
+        self.assertEqual([45], f.x)
+        self.assertEqual([45], f.x)
+        self.assertEqual([42, 43, 44, 45], validated)
+
+        return
+
+    def test_modifying_the_value_does_not_affect_other_reads(self):
+        """ modifying the value does not affect other reads """
+
+        registry = self.registry
+
+        # Add an extension point.
+        registry.add_extension_point(self._create_extension_point('my.ep'))
+
+        # Set the extensions.
+        registry.set_extensions('my.ep', [42, 43, 44])
+
+        # Declare a class that consumes the extension.
+        class Foo(TestBase):
+            x = ExtensionPoint(List(Int), id='my.ep')
+
+        # Each read returns a new list.
+        f = Foo()
+        x = f.x
+        x.append(99)
+        x.sort(reverse=True)
+        self.assertEqual([42, 43, 44], f.x)
+        self.assertIsNot(x, f.x)
+
+        # ... which is still validated.
+        with self.assertRaises(TraitError):
+            f.x.append('foo')
+
+        return
+
+    def test_cache_does_not_keep_objects_alive(self):
+        """ cache does not keep objects alive """
+
+        class PluginA(Plugin):
+            id = 'A'
+            x  = ExtensionPoint(List(Int), id='a.x')
+
+        class PluginB(Plugin):
+            id = 'B'
+            c  = List(Int, [1, 2, 3], contributes_to='a.x')
+
+        a = PluginA()
+        application = Application(plugins=[a, PluginB()])
+        application.start()
+        self.assertEqual([1, 2, 3], a.x)
+        application.stop()
+
+        # Make sure that the plugin and the application can be garbage
+        # collected once they have been read from.
+        a_ref = weakref.ref(a)
+        application_ref = weakref.ref(application)
+        del a, application
+        gc.collect()
+
+        self.assertEqual(None, a_ref())
+        self.assertEqual(None, application_ref())
+
+        return
+
+    def test_keyed_extension_point(self):
+        """ keyed extension point """
+
+        registry = MutableExtensionRegistry()
+        TestBase.extension_registry = registry
+
+        # Add a keyed extension point.
+        registry.add_extension_point(
+            self._create_extension_point('my.ep', Dict, key='id')
+        )
+
+        a, b, c = Item(id='a'), Item(id='b'), Item(id='c')
+        registry.add_extensions('my.ep', [a, b])
+
+        # The registry can look up the contributions by key.
+        self.assertIs(a, registry.get_keyed_extension('my.ep', 'a'))
+        self.assertIs(b, registry.get_keyed_extension('my.ep', 'b'))
+        self.assertEqual(None, registry.get_keyed_extension('my.ep', 'c'))
+        self.assertEqual(None, registry.get_keyed_extension('xxx', 'a'))
+
+        # Declare a class that consumes the extension.
+        class Foo(TestBase):
+            x = ExtensionPoint(Dict(Str, Instance(Item)), id='my.ep', key='id')
+
+            x_items_events = List
+
+            def _x_items_changed(self, event):
+                """ Static trait change handler. """
+
+                self.x_items_events.append(event)
+
+                return
+
+        f = Foo()
+        self.assertEqual({'a' : a, 'b' : b}, f.x)
+
+        # Changes to the extension point are keyed too.
+        ExtensionPoint.connect_extension_point_traits(f)
+        registry.add_extension('my.ep', c)
+        self.assertEqual(c, registry.get_keyed_extension('my.ep', 'c'))
+        self.assertEqual({'a' : a, 'b' : b, 'c' : c}, f.x)
+
+        self.assertEqual(1, len(f.x_items_events))
+        self.assertEqual({'c' : c}, f.x_items_events[0].added)
+        self.assertEqual({}, f.x_items_events[0].removed)
+
+        # Only keyed extension points can be looked up by key.
+        registry.add_extension_point(self._create_extension_point('your.ep'))
+        self.failUnlessRaises(
+            ValueError, registry.get_keyed_extension, 'your.ep', 'a'
+        )
+
+        # And a dictionary extension point must have a key.
+        self.failUnlessRaises(
+            ValueError, ExtensionPoint, Dict, id='their.ep'
+        )
+
+        return
+
     def test_invalid_extension_point(self):
         """ invalid extension point """
 
@@ -253,10 +471,12 @@ class ExtensionPointTestCase(unittest.TestCase):
     # Private interface.
     ###########################################################################
 
-    def _create_extension_point(self, id, trait_type=List, desc=''):
+    def _create_extension_point(self, id, trait_type=List, desc='', key=None):
         """ Create an extension point. """
 
-        return ExtensionPoint(id=id, trait_type=trait_type, desc=desc)
+        return ExtensionPoint(
+            id=id, trait_type=trait_type, desc=desc, key=key
+        )
 
 
 # Entry point for stand-alone testing.
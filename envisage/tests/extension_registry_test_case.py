@@ -1,6 +1,9 @@
 """ Tests for the base extension registry. """
 
 
+# Standard library imports.
+import gc
+
 # Enthought library imports.
 from envisage.api import Application, ExtensionPoint
 from envisage.api import ExtensionRegistry, UnknownExtensionPoint
@@ -167,6 +170,79 @@ class ExtensionRegistryTestCase(unittest.TestCase):
 
         return
 
+    def test_generations(self):
+        """ generations """
+
+        registry = self.registry
+
+        self.assertEqual(0, registry.get_extensions_generation())
+        self.assertEqual(0, registry.get_extensions_generation('my.ep'))
+
+        registry.add_extension_point(self._create_extension_point('my.ep'))
+        registry.add_extension_point(self._create_extension_point('your.ep'))
+        generation = registry.get_extensions_generation('my.ep')
+        self.assertTrue(generation > 0)
+
+        # Setting the extensions moves the extension point (and the registry)
+        # on to the next generation.
+        registry.set_extensions('my.ep', [1, 2, 3])
+        self.assertTrue(
+            registry.get_extensions_generation('my.ep') > generation
+        )
+        generation = registry.get_extensions_generation('my.ep')
+        self.assertEqual(generation, registry.get_extensions_generation())
+
+        # ... but not any other extension point.
+        registry.set_extensions('your.ep', [4])
+        self.assertEqual(
+            generation, registry.get_extensions_generation('my.ep')
+        )
+        self.assertTrue(registry.get_extensions_generation() > generation)
+
+        # Reading the extensions doesn't change anything.
+        registry.get_extensions('my.ep')
+        self.assertEqual(
+            generation, registry.get_extensions_generation('my.ep')
+        )
+
+        registry.remove_extension_point('my.ep')
+        self.assertTrue(
+            registry.get_extensions_generation('my.ep') > generation
+        )
+
+        return
+
+    def test_dead_listeners_are_pruned(self):
+        """ dead listeners are pruned """
+
+        # The registry itself (rather than the application).
+        registry = getattr(self.registry, 'extension_registry', self.registry)
+
+        def listener(extension_registry, event):
+            """ An extension point listener. """
+
+        def any_listener(extension_registry, event):
+            """ An extension point listener. """
+
+        registry.add_extension_point_listener(listener, 'my.ep')
+        registry.add_extension_point_listener(any_listener)
+
+        # The references to the listeners are only gathered once...
+        refs = registry._get_listener_refs('my.ep')
+        self.assertEqual(2, len(refs))
+        self.assertIs(refs, registry._get_listener_refs('my.ep'))
+
+        # ... until the listeners change.
+        del listener
+        gc.collect()
+        self.assertEqual([], registry._listeners['my.ep'])
+        self.assertEqual(1, len(registry._get_listener_refs('my.ep')))
+
+        registry.remove_extension_point_listener(any_listener)
+        self.assertEqual(0, len(registry._get_listener_refs('my.ep')))
+
+        return
+
     ###########################################################################
     # Private interface.
     ###########################################################################
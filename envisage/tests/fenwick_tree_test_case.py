@@ -0,0 +1,68 @@
+""" Tests for the Fenwick tree. """
+
+
+# Standard library imports.
+import random
+
+# Enthought library imports.
+from envisage.fenwick_tree import FenwickTree
+from traits.testing.unittest_tools import unittest
+
+
+class FenwickTreeTestCase(unittest.TestCase):
+    """ Tests for the Fenwick tree. """
+
+    ###########################################################################
+    # Tests.
+    ###########################################################################
+
+    def test_prefix_sums(self):
+        """ prefix sums """
+
+        values = [3, 0, 4, 1, 5, 9, 2, 6]
+        tree = FenwickTree(values)
+
+        self.assertEqual(len(values), len(tree))
+        for index in range(len(values) + 1):
+            self.assertEqual(sum(values[:index]), tree.prefix_sum(index))
+
+        self.assertEqual(sum(values), tree.total())
+
+        return
+
+    def test_append_set_and_delete(self):
+        """ append, set and delete """
+
+        generator = random.Random(42)
+
+        values = []
+        tree = FenwickTree()
+        for i in range(200):
+            operation = generator.choice(['append', 'set', 'delete'])
+            if operation == 'append' or len(values) == 0:
+                value = generator.randint(0, 10)
+                values.append(value)
+                tree.append(value)
+
+            elif operation == 'set':
+                index = generator.randrange(len(values))
+                value = generator.randint(0, 10)
+                values[index] = value
+                tree.set(index, value)
+
+            else:
+                index = generator.randrange(len(values))
+                del values[index]
+                tree.delete(index)
+
+            for index in range(len(values) + 1):
+                self.assertEqual(sum(values[:index]), tree.prefix_sum(index))
+
+        return
+
+
+# Entry point for stand-alone testing.
+if __name__ == '__main__':
+    unittest.main()
+
+#### EOF ######################################################################
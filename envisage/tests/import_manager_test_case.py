@@ -1,6 +1,9 @@
 """ Tests for the import manager. """
 
 
+# Standard library imports.
+import sys
+
 # Enthought library imports.
 from envisage.api import Application, ImportManager
 from traits.testing.unittest_tools import unittest
@@ -61,6 +64,48 @@ class ImportManagerTestCase(unittest.TestCase):
 
         return
 
+    def test_imported_symbols_are_cached(self):
+        """ imported symbols are cached """
+
+        symbol_cache = ImportManager.symbol_cache
+        symbol_cache.clear()
+
+        symbol = self.import_manager.import_symbol('tarfile.TarFile')
+        self.assertEqual({'hits' : 0, 'misses' : 1, 'size' : 1},
+                         symbol_cache.statistics())
+
+        # The cache is shared by all import managers.
+        for import_manager in [self.import_manager, ImportManager()]:
+            self.assertIs(
+                symbol, import_manager.import_symbol('tarfile.TarFile')
+            )
+        self.assertEqual({'hits' : 2, 'misses' : 1, 'size' : 1},
+                         symbol_cache.statistics())
+
+        return
+
+    def test_cached_symbol_is_reimported_when_its_module_changes(self):
+        """ cached symbol is reimported when its module changes """
+
+        symbol_cache = ImportManager.symbol_cache
+        symbol_cache.clear()
+
+        symbol_path = 'envisage.tests.foo.Foo'
+        symbol = self.import_manager.import_symbol(symbol_path)
+
+        # Remove the module so that the next import creates a new one.
+        del sys.modules['envisage.tests.foo']
+
+        new_symbol = self.import_manager.import_symbol(symbol_path)
+        self.assertIsNot(symbol, new_symbol)
+        self.assertIs(sys.modules['envisage.tests.foo'].Foo, new_symbol)
+        self.assertEqual(2, symbol_cache.statistics()['misses'])
+
+        # Clean up!
+        del sys.modules['envisage.tests.foo']
+
+        return
+
 
 # Entry point for stand-alone testing.
 if __name__ == '__main__':
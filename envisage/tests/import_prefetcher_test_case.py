@@ -0,0 +1,143 @@
+""" Tests for the import prefetcher. """
+
+
+# Standard library imports.
+import sys
+
+# Enthought library imports.
+from envisage.api import Application, Category, ExtensionPoint
+from envisage.api import ExtensionRegistry, ImportManager, ImportPrefetcher
+from envisage.api import ServiceOffer
+from traits.api import List
+from traits.testing.unittest_tools import unittest
+
+
+# This module's package.
+PKG = 'envisage.tests'
+
+
+class ImportPrefetcherTestCase(unittest.TestCase):
+    """ Tests for the import prefetcher. """
+
+    ###########################################################################
+    # 'TestCase' interface.
+    ###########################################################################
+
+    def setUp(self):
+        """ Prepares the test fixture before each test method is called. """
+
+        self.application = Application(extension_registry=ExtensionRegistry())
+
+        self.application.add_extension_point(
+            ExtensionPoint(List, id='envisage.service_offers')
+        )
+        self.application.set_extensions(
+            'envisage.service_offers', [
+                ServiceOffer(
+                    protocol = PKG + '.i_foo.IFoo',
+                    factory  = PKG + '.foo.Foo'
+                ),
+                ServiceOffer(protocol=ImportManager, factory=ImportManager),
+                ServiceOffer(protocol=PKG + '.i_foo.IFoo', factory='bogus.Foo')
+            ]
+        )
+
+        self.application.add_extension_point(
+            ExtensionPoint(List, id='envisage.categories')
+        )
+        self.application.set_extensions(
+            'envisage.categories', [
+                Category(
+                    class_name        = PKG + '.bar_category.BarCategory',
+                    target_class_name = PKG + '.bar.Bar'
+                )
+            ]
+        )
+
+        self._remove_modules()
+
+        return
+
+    def tearDown(self):
+        """ Called immediately after each test method has been called. """
+
+        self._remove_modules()
+
+        return
+
+    ###########################################################################
+    # Tests.
+    ###########################################################################
+
+    def test_get_symbol_paths(self):
+        """ get symbol paths """
+
+        prefetcher = ImportPrefetcher(application=self.application)
+
+        # Only string references are collected (and never the target classes
+        # of categories), with packages before the modules inside them.
+        self.assertEqual(
+            [
+                'bogus.Foo',
+                PKG + '.bar_category.BarCategory',
+                PKG + '.foo.Foo',
+                PKG + '.i_foo.IFoo'
+            ],
+            prefetcher.get_symbol_paths()
+        )
+
+        return
+
+    def test_symbols_are_imported_in_the_background(self):
+        """ symbols are imported in the background """
+
+        symbol_cache = ImportManager.symbol_cache
+        symbol_cache.clear()
+
+        prefetcher = ImportPrefetcher(application=self.application)
+        prefetcher.start()
+        prefetcher.join()
+
+        # The modules were imported (and the bogus one didn't stop the rest).
+        self.assertIn(PKG + '.foo', sys.modules)
+        self.assertIn(PKG + '.i_foo', sys.modules)
+
+        # ... and the symbols are now in the cache.
+        foo = ImportManager().import_symbol(PKG + '.foo.Foo')
+        self.assertIs(sys.modules[PKG + '.foo'].Foo, foo)
+        self.assertEqual(1, symbol_cache.statistics()['hits'])
+
+        return
+
+    def test_application_prefetches_imports_when_started(self):
+        """ application prefetches imports when started """
+
+        self.application.prefetch_imports = True
+        self.application.start()
+        self.application._import_prefetcher.join()
+
+        self.assertIn(PKG + '.foo', sys.modules)
+
+        self.application.stop()
+
+        return
+
+    ###########################################################################
+    # Private interface.
+    ###########################################################################
+
+    def _remove_modules(self):
+        """ Make sure the modules imported by the tests are not imported. """
+
+        for module_name in [PKG + '.foo', PKG + '.i_foo']:
+            if module_name in sys.modules:
+                del sys.modules[module_name]
+
+        return
+
+
+# Entry point for stand-alone testing.
+if __name__ == '__main__':
+    unittest.main()
+
+#### EOF ######################################################################
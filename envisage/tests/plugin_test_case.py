@@ -330,6 +330,94 @@ class PluginTestCase(unittest.TestCase):
 
         return
 
+    def test_contribution_manifest(self):
+        """ contribution manifest """
+
+        class PluginA(Plugin):
+            id = 'A'
+            x  = ExtensionPoint(List, id='x')
+            y  = ExtensionPoint(List, id='y')
+            z  = ExtensionPoint(List, id='z')
+
+        class PluginB(Plugin):
+            id = 'B'
+            x  = List([1, 2, 3], contributes_to='x')
+
+            @contributes_to('enthought.y')
+            def _y_contributions(self):
+                return [4, 5, 6]
+
+            def get_extensions(self, extension_point_id):
+                asked.append(extension_point_id)
+
+                return super(PluginB, self).get_extensions(extension_point_id)
+
+        asked = []
+
+        a = PluginA()
+        b = PluginB()
+        self.assertEqual(
+            set(['x', 'y', 'enthought.y']), b.get_contribution_manifest()
+        )
+
+        # Traits can also be added to individual plugins.
+        c = PluginB()
+        c.add_trait('w', List([7], contributes_to='w'))
+        self.assertEqual(
+            set(['w', 'x', 'y', 'enthought.y']),
+            c.get_contribution_manifest()
+        )
+
+        application = TestApplication(plugins=[a, b])
+        self.assertEqual([1, 2, 3], application.get_extensions('x'))
+        self.assertEqual([4, 5, 6], application.get_extensions('y'))
+        self.assertEqual([], application.get_extensions('z'))
+
+        # The plugin is only asked about the extension points that it
+        # contributes to.
+        self.assertEqual(['x', 'y'], asked)
+
+        return
+
+    def test_contributions_from_base_classes(self):
+        """ contributions from base classes """
+
+        class PluginA(Plugin):
+            id = 'A'
+            x  = ExtensionPoint(List, id='x')
+
+        class Base(Plugin):
+            @contributes_to('x')
+            def _x_contributions(self):
+                return [1]
+
+            @contributes_to('x')
+            def _more_x_contributions(self):
+                return [2]
+
+        class PluginB(Base):
+            id = 'B'
+
+            # Overridden methods replace the base class's contributions.
+            @contributes_to('x')
+            def _more_x_contributions(self):
+                return [3]
+
+        a = PluginA()
+        b = PluginB()
+
+        # Extension points added to a particular plugin are offered too.
+        b.add_trait('y', ExtensionPoint(List, id='y'))
+        extension_point_ids = [
+            extension_point.id for extension_point in b.get_extension_points()
+        ]
+        self.assertEqual(['y'], extension_point_ids)
+
+        application = TestApplication(plugins=[a, b])
+        self.assertEqual([3, 1], application.get_extensions('x'))
+
+        return
+
     def test_add_plugins_to_empty_application(self):
         """ add plugins to empty application """
 
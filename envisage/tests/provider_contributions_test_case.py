@@ -0,0 +1,54 @@
+""" Tests for the sparse storage of provider contributions. """
+
+
+# Enthought library imports.
+from envisage.provider_contributions import ProviderContributions
+from traits.testing.unittest_tools import unittest
+
+
+class ProviderContributionsTestCase(unittest.TestCase):
+    """ Tests for the sparse storage of provider contributions. """
+
+    ###########################################################################
+    # Tests.
+    ###########################################################################
+
+    def test_set_and_offset(self):
+        """ set and offset """
+
+        contributions = ProviderContributions()
+        self.assertEqual([], contributions.flatten())
+        self.assertEqual([], contributions.get(0))
+        self.assertEqual(0, contributions.offset(0))
+
+        # Set the contributions out of key order.
+        contributions.set(5, [5, 55])
+        contributions.set(1, [1])
+        contributions.set(3, [])
+        contributions.set(9, [9])
+
+        self.assertEqual([1, 5, 55, 9], contributions.flatten())
+        self.assertEqual([[1], [5, 55], [9]], list(contributions))
+        self.assertEqual(4, contributions.total())
+
+        # Providers that don't contribute anything still have an offset.
+        self.assertEqual([], contributions.get(3))
+        self.assertEqual(1, contributions.offset(3))
+        self.assertEqual(1, contributions.offset(5))
+        self.assertEqual(3, contributions.offset(9))
+        self.assertEqual(4, contributions.offset(10))
+
+        # Update a provider's contributions.
+        contributions.set(1, [1, 11, 111])
+        self.assertEqual([1, 11, 111, 5, 55, 9], contributions.flatten())
+        self.assertEqual(5, contributions.offset(9))
+
+        # Setting an empty list removes the provider altogether.
+        contributions.set(5, [])
+        self.assertEqual([[1, 11, 111], [9]], list(contributions))
+        self.assertEqual(3, contributions.offset(9))
+        self.assertEqual(4, contributions.total())
+
+        return
+
+#### EOF ######################################################################
@@ -5,9 +5,11 @@
 import unittest
 
 # Enthought library imports.
-from envisage.api import ExtensionPoint, ExtensionProvider
-from envisage.api import ProviderExtensionRegistry
-from traits.api import Int, List
+from envisage.api import Application, ExtensionPoint
+from envisage.api import ExtensionPointChangedEvent, ExtensionProvider
+from envisage.api import IExtensionProvider, Plugin
+from envisage.api import ProviderExtensionRegistry, bind_extension_point
+from traits.api import Event, HasTraits, Int, List, provides
 
 # Local imports.
 from .extension_registry_test_case import ExtensionRegistryTestCase
@@ -610,9 +612,23 @@ class ProviderExtensionRegistryTestCase(ExtensionRegistryTestCase):
         self.assertEqual(1, len(extension_points))
         self.assertEqual('x', extension_points[0].id)
 
+        events = []
+        def listener(registry, event):
+            """ An extension point listener. """
+
+            events.append((event.added, event.removed, event.index))
+
+            return
+
+        registry.add_extension_point_listener(listener, 'x')
+
         # Remove the extension point.
         registry.remove_extension_point('x')
 
+        # The removed extensions are reported as a list.
+        self.assertEqual([([], [42, 43], 0)], events)
+        self.assertEqual(list, type(events[0][1]))
+
         # Make sure there are no extension points.
         extension_points = registry.get_extension_points()
         self.assertEqual(0, len(extension_points))
@@ -622,6 +638,357 @@ class ProviderExtensionRegistryTestCase(ExtensionRegistryTestCase):
 
         return
 
+    def test_generations(self):
+        """ generations """
+
+        registry = self.registry
+
+        class ProviderA(ExtensionProvider):
+            """ An extension provider. """
+
+            def get_extensions(self, extension_point_id):
+                """ Return the provider's contributions to an extension point.
+
+                """
+
+                if extension_point_id == 'my.ep':
+                    extensions = [42]
+
+                else:
+                    extensions = []
+
+                return extensions
+
+        class ProviderB(ExtensionProvider):
+            """ An extension provider. """
+
+            def get_extensions(self, extension_point_id):
+                """ Return the provider's contributions to an extension point.
+
+                """
+
+                if extension_point_id == 'your.ep':
+                    extensions = [43]
+
+                else:
+                    extensions = []
+
+                return extensions
+
+        registry.add_extension_point(self._create_extension_point('my.ep'))
+        registry.add_extension_point(self._create_extension_point('your.ep'))
+
+        a = ProviderA()
+        registry.add_provider(a)
+        self.assertEqual([42], registry.get_extensions('my.ep'))
+        self.assertEqual([], registry.get_extensions('your.ep'))
+        generation = registry.get_extensions_generation('my.ep')
+
+        # Adding (and removing) a provider that doesn't contribute to the
+        # extension point doesn't change its generation.
+        b = ProviderB()
+        registry.add_provider(b)
+        registry.remove_provider(b)
+        self.assertEqual(
+            generation, registry.get_extensions_generation('my.ep')
+        )
+        self.assertTrue(registry.get_extensions_generation() > generation)
+
+        # But removing one that does, does!
+        registry.remove_provider(a)
+        self.assertTrue(
+            registry.get_extensions_generation('my.ep') > generation
+        )
+        self.assertEqual(
+            registry.get_extensions_generation(),
+            registry.get_extensions_generation('my.ep')
+        )
+
+        return
+
+    def test_provider_without_contribution_manifest(self):
+        """ provider without contribution manifest """
+
+        registry = self.registry
+
+        # A provider that doesn't derive from 'ExtensionProvider' (and so
+        # doesn't have a 'get_contribution_manifest' method).
+        @provides(IExtensionProvider)
+        class Provider(HasTraits):
+            """ An extension provider. """
+
+            extension_point_changed = Event(ExtensionPointChangedEvent)
+
+            def get_extension_points(self):
+                """ Return the extension points offered by the provider. """
+
+                return [ExtensionPoint(List, 'my.ep')]
+
+            def get_extensions(self, extension_point_id):
+                """ Return the provider's contributions to an extension point.
+
+                """
+
+                if extension_point_id == 'my.ep':
+                    extensions = [1, 2, 3]
+
+                else:
+                    extensions = []
+
+                return extensions
+
+        registry.add_provider(Provider())
+        self.assertEqual([1, 2, 3], registry.get_extensions('my.ep'))
+
+        return
+
+    def test_contributing_trait_added_to_plugin(self):
+        """ contributing trait added to plugin """
+
+        class PluginA(Plugin):
+            id = 'A'
+            x  = ExtensionPoint(List(Int), id='a.x')
+            y  = ExtensionPoint(List(Int), id='a.y')
+
+        class PluginB(Plugin):
+            id = 'B'
+
+        b = PluginB()
+        application = Application(plugins=[PluginA(), b])
+
+        # Make sure the plugins have been added to the registry.
+        self.assertEqual([], application.get_extensions('a.y'))
+
+        # Add a contributing trait to the plugin after it has been added to
+        # the registry.
+        b.add_trait('c', List(Int, [1, 2, 3], contributes_to='a.x'))
+        self.assertEqual([1, 2, 3], application.get_extensions('a.x'))
+
+        return
+
+    def test_add_providers(self):
+        """ add providers """
+
+        registry = self.registry
+
+        class Provider(ExtensionProvider):
+            """ An extension provider. """
+
+            def __init__(self, extensions, **traits):
+                """ Constructor. """
+
+                super(Provider, self).__init__(**traits)
+
+                self.extensions = extensions
+
+                return
+
+            def get_extensions(self, extension_point_id):
+                """ Return the provider's contributions to an extension point.
+
+                """
+
+                if extension_point_id == 'my.ep':
+                    extensions = self.extensions
+
+                else:
+                    extensions = []
+
+                return extensions
+
+        registry.add_extension_point(self._create_extension_point('my.ep'))
+        registry.add_provider(Provider([1, 2]))
+        self.assertEqual([1, 2], registry.get_extensions('my.ep'))
+
+        events = []
+        def listener(registry, event):
+            """ An extension point listener. """
+
+            events.append((event.added, event.removed, event.index))
+
+            return
+
+        registry.add_extension_point_listener(listener, 'my.ep')
+
+        # Adding several providers fires a single event.
+        b, c, d = Provider([3]), Provider([]), Provider([4, 5])
+        registry.add_providers([b, c, d])
+        self.assertEqual([([3, 4, 5], [], 2)], events)
+        self.assertEqual([1, 2, 3, 4, 5], registry.get_extensions('my.ep'))
+
+        # And so does removing adjacent providers in a batch.
+        del events[:]
+        with registry.batch():
+            registry.remove_provider(b)
+            registry.remove_provider(c)
+            registry.remove_provider(d)
+
+            # The listeners haven't been called yet, but the registry is up to
+            # date.
+            self.assertEqual([], events)
+            self.assertEqual([1, 2], registry.get_extensions('my.ep'))
+
+        self.assertEqual([([], [3, 4, 5], 2)], events)
+
+        return
+
+    def test_batch_with_slice_indexes(self):
+        """ batch with slice indexes """
+
+        class PluginA(Plugin):
+            id = 'A'
+            x  = ExtensionPoint(List(Int), id='a.x')
+
+        class PluginB(Plugin):
+            id = 'B'
+            c  = List(Int, contributes_to='a.x')
+
+        b = PluginB()
+        application = Application(plugins=[PluginA(), b])
+        self.assertEqual([], application.get_extensions('a.x'))
+
+        events = []
+        def listener(registry, event):
+            """ An extension point listener. """
+
+            events.append((event.added, event.removed, event.index))
+
+            return
+
+        application.add_extension_point_listener(listener, 'a.x')
+
+        # Reassigning a contributing trait fires an event with a slice index,
+        # which can't be merged with the events after it, so a single event
+        # replaces the extensions as they were before the batch.
+        with application.batch():
+            b.c = [4]
+            b.c.append(5)
+
+        self.assertEqual([([4, 5], [], slice(0, 0))], events)
+        self.assertEqual([4, 5], application.get_extensions('a.x'))
+
+        return
+
+    def test_batch_with_slice_index_and_new_provider(self):
+        """ batch with slice index and new provider """
+
+        class PluginA(Plugin):
+            id = 'A'
+            x  = ExtensionPoint(List(Int), id='a.x')
+            c  = List(Int, [1], contributes_to='a.x')
+
+        class PluginB(Plugin):
+            id = 'B'
+            c  = List(Int, contributes_to='a.x')
+
+        class Foo(HasTraits):
+            x = List(Int)
+
+        a = PluginA()
+        application = Application(plugins=[a])
+
+        f = Foo()
+        bind_extension_point(f, 'x', 'a.x', application)
+        self.assertEqual([1], f.x)
+
+        events = []
+        def listener(registry, event):
+            """ An extension point listener. """
+
+            events.append((event.added, event.removed, event.index))
+
+            return
+
+        application.add_extension_point_listener(listener, 'a.x')
+
+        with application.batch():
+            a.c = [2, 3]
+            application.add_plugin(PluginB(c=[9]))
+
+        # One event replaces all of the extensions.
+        self.assertEqual([([2, 3, 9], [1], slice(0, 1))], events)
+        self.assertEqual([2, 3, 9], application.get_extensions('a.x'))
+        self.assertEqual([2, 3, 9], f.x)
+
+        return
+
+    def test_get_extensions_view(self):
+        """ get extensions view """
+
+        registry = self.registry
+
+        class ProviderA(ExtensionProvider):
+            """ An extension provider. """
+
+            x = List(Int)
+
+            def get_extension_points(self):
+                """ Return the extension points offered by the provider. """
+
+                return [ExtensionPoint(List, 'my.ep')]
+
+            def get_extensions(self, extension_point_id):
+                """ Return the provider's contributions to an extension point.
+
+                """
+
+                if extension_point_id == 'my.ep':
+                    return self.x
+
+                return []
+
+            def _x_items_changed(self, event):
+                """ Static trait change handler. """
+
+                self._fire_extension_point_changed(
+                    'my.ep', event.added, event.removed, event.index
+                )
+
+                return
+
+        class ProviderB(ExtensionProvider):
+            """ An extension provider. """
+
+            def get_extensions(self, extension_point_id):
+                """ Return the provider's contributions to an extension point.
+
+                """
+
+                if extension_point_id == 'my.ep':
+                    return [44]
+
+                return []
+
+        a = ProviderA(x=[42, 43])
+        registry.add_provider(a)
+
+        # The view is shared (i.e. not copied each time)...
+        view = registry.get_extensions_view('my.ep')
+        self.assertEqual((42, 43), view)
+        self.assertIs(view, registry.get_extensions_view('my.ep'))
+
+        # ... but 'get_extensions' still returns a new list.
+        extensions = registry.get_extensions('my.ep')
+        self.assertEqual([42, 43], extensions)
+        extensions.append(99)
+        self.assertEqual([42, 43], registry.get_extensions('my.ep'))
+
+        # The view changes when a provider's contributions change...
+        a.x.append(100)
+        self.assertEqual((42, 43, 100), registry.get_extensions_view('my.ep'))
+
+        # ... or when a provider is added or removed.
+        b = ProviderB()
+        registry.add_provider(b)
+        self.assertEqual(
+            (42, 43, 100, 44), registry.get_extensions_view('my.ep')
+        )
+
+        registry.remove_provider(b)
+        self.assertEqual((42, 43, 100), registry.get_extensions_view('my.ep'))
+
+        return
+
 
 # Entry point for stand-alone testing.
 if __name__ == '__main__':
@@ -0,0 +1,165 @@
+""" Tests for asynchronous lookups in the service registry. """
+
+
+# Standard library imports.
+import sys, time
+
+# Enthought library imports.
+from envisage.api import Application, ServiceRegistry
+from traits.api import HasTraits, Int, Interface, provides
+from traits.testing.unittest_tools import unittest
+
+if sys.version_info >= (3, 5):
+    from envisage.tests.async_service_factories import (
+        cancel_first, gather, make_async_factory, run
+    )
+
+
+class IFoo(Interface):
+    price = Int
+
+
+@provides(IFoo)
+class Foo(HasTraits):
+    price = Int
+
+
+@unittest.skipIf(sys.version_info < (3, 5), 'requires Python 3.5')
+class ServiceRegistryAsyncTestCase(unittest.TestCase):
+    """ Tests for asynchronous lookups in the service registry. """
+
+    ###########################################################################
+    # 'TestCase' interface.
+    ###########################################################################
+
+    def setUp(self):
+        """ Prepares the test fixture before each test method is called. """
+
+        # We do all of the testing via the application to make sure it offers
+        # the same interface!
+        self.service_registry = Application(service_registry=ServiceRegistry())
+
+        return
+
+    ###########################################################################
+    # Tests.
+    ###########################################################################
+
+    def test_get_service_async_with_coroutine_factory(self):
+        """ get service async with coroutine factory """
+
+        calls = []
+        self.service_registry.register_service(
+            IFoo, make_async_factory(Foo, calls), {'price' : 100}
+        )
+
+        service = run(self.service_registry.get_service_async(IFoo))
+        self.assertEqual(Foo, type(service))
+        self.assertEqual(100, service.price)
+
+        # The service replaces the factory, so it is now available to
+        # synchronous lookups too.
+        self.assertIs(service, self.service_registry.get_service(IFoo))
+        self.assertEqual(1, len(calls))
+
+        return
+
+    def test_concurrent_lookups_share_one_factory_call(self):
+        """ concurrent lookups share one factory call """
+
+        calls = []
+        self.service_registry.register_service(
+            IFoo, make_async_factory(Foo, calls)
+        )
+
+        services = run(
+            gather(*[
+                self.service_registry.get_service_async(IFoo)
+                for i in range(5)
+            ])
+        )
+
+        self.assertEqual(1, len(calls))
+        for service in services:
+            self.assertIs(services[0], service)
+
+        return
+
+    def test_cancelling_a_lookup_does_not_cancel_other_lookups(self):
+        """ cancelling a lookup does not cancel other lookups """
+
+        calls = []
+        self.service_registry.register_service(
+            IFoo, make_async_factory(Foo, calls)
+        )
+
+        # The first lookup calls the factory, and is cancelled while the
+        # second lookup is waiting for it.
+        cancelled, service = run(
+            cancel_first(
+                self.service_registry.get_service_async(IFoo),
+                self.service_registry.get_service_async(IFoo)
+            )
+        )
+        self.assertTrue(cancelled)
+        self.assertEqual(Foo, type(service))
+        self.assertIs(service, self.service_registry.get_service(IFoo))
+        self.assertEqual(1, len(calls))
+
+        return
+
+    def test_factories_are_called_concurrently(self):
+        """ factories are called concurrently """
+
+        calls = []
+        for price in range(5):
+            self.service_registry.register_service(
+                IFoo, make_async_factory(Foo, calls, delay=0.2),
+                {'price' : price}
+            )
+
+        start = time.time()
+        services = run(
+            self.service_registry.get_services_async(
+                IFoo, 'price >= 2', maximize='price'
+            )
+        )
+        elapsed = time.time() - start
+
+        self.assertEqual([4, 3, 2], [service.price for service in services])
+        self.assertEqual(5, len(calls))
+        self.assertLess(elapsed, 0.2 * 5)
+
+        return
+
+    def test_synchronous_factories_work_asynchronously(self):
+        """ synchronous factories work asynchronously """
+
+        self.service_registry.register_service(IFoo, Foo, {'price' : 3})
+
+        service = run(self.service_registry.get_service_async(IFoo))
+        self.assertEqual(3, service.price)
+
+        return
+
+    def test_synchronous_lookup_of_coroutine_factory(self):
+        """ synchronous lookup of coroutine factory """
+
+        calls = []
+        self.service_registry.register_service(
+            IFoo, make_async_factory(Foo, calls)
+        )
+
+        with self.assertRaises(ValueError):
+            self.service_registry.get_service(IFoo)
+
+        self.assertEqual([], calls)
+
+        return
+
+
+# Entry point for stand-alone testing.
+if __name__ == '__main__':
+    unittest.main()
+
+#### EOF ######################################################################
@@ -2,10 +2,11 @@
 
 
 # Standard library imports.
-import sys
+import json, sys, threading, time
 
 # Enthought library imports.
 from envisage.api import Application, ServiceRegistry, NoSuchServiceError
+from envisage.api import ServicePolicy, ServiceRegistryMonitor, compile_query
 from traits.api import HasTraits, Int, Interface, provides
 from traits.testing.unittest_tools import unittest
 
@@ -538,6 +539,751 @@ class ServiceRegistryTestCase(unittest.TestCase):
 
         return
 
+    def test_get_services_only_looks_at_services_for_protocol(self):
+        """ get services only looks at services for protocol """
+
+        class IFoo(Interface):
+            pass
+
+        class IBar(Interface):
+            pass
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            pass
+
+        def bar_factory(**properties):
+            """ A factory that must never be called. """
+
+            raise AssertionError('bar factory called')
+
+        foo = Foo()
+        self.service_registry.register_service(IFoo, foo)
+        bar_id = self.service_registry.register_service(IBar, bar_factory)
+
+        # Looking up 'IFoo' must not resolve the 'IBar' factory.
+        self.assertEqual([foo], self.service_registry.get_services(IFoo))
+
+        # Once unregistered, the protocol has no services left.
+        self.service_registry.unregister_service(bar_id)
+        self.assertEqual([], self.service_registry.get_services(IBar))
+
+        return
+
+    def test_get_services_with_compiled_query(self):
+        """ get services with compiled query """
+
+        class IFoo(Interface):
+            price = Int
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            price = Int
+
+        foo = Foo(price=100)
+        self.service_registry.register_service(IFoo, foo)
+
+        goo = Foo(price=10)
+        self.service_registry.register_service(IFoo, goo, {'price' : 200})
+
+        # Compiling the same query twice gives the same compiled query.
+        query = compile_query('price <= 100')
+        self.assertIs(query, compile_query('price <= 100'))
+        self.assertIs(query, compile_query(query))
+
+        services = self.service_registry.get_services(IFoo, query)
+        self.assertEqual([foo], services)
+
+        service = self.service_registry.get_service(IFoo, query)
+        self.assertEqual(foo, service)
+
+        return
+
+    def test_get_services_with_invalid_query(self):
+        """ get services with invalid query """
+
+        class IFoo(Interface):
+            price = Int
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            price = Int
+
+        self.service_registry.register_service(IFoo, Foo(price=100))
+
+        # An invalid query doesn't match anything.
+        services = self.service_registry.get_services(IFoo, 'price <=')
+        self.assertEqual([], services)
+
+        # ... but compiling it explicitly raises an exception.
+        with self.assertRaises(SyntaxError):
+            compile_query('price <=')
+
+        return
+
+    def test_get_services_with_properties(self):
+        """ get services with properties """
+
+        class IFoo(Interface):
+            pass
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            pass
+
+        foos = [Foo() for i in range(4)]
+        registrations = [
+            {'language' : 'python', 'priority' : 1},
+            {'language' : 'python', 'priority' : 5},
+            {'language' : 'c',      'priority' : 10},
+            {'language' : 'python'},
+        ]
+        service_ids = [
+            self.service_registry.register_service(IFoo, foo, properties)
+            for foo, properties in zip(foos, registrations)
+        ]
+
+        # Run each query often enough for the registry to build its indexes,
+        # and make sure we get the same answer whether or not it does.
+        for i in range(5):
+            services = self.service_registry.get_services(
+                IFoo, properties={'language' : 'python'}
+            )
+            self.assertEqual([foos[0], foos[1], foos[3]], services)
+
+            services = self.service_registry.get_services(
+                IFoo, properties={'language' : 'python', 'priority__gt' : 3}
+            )
+            self.assertEqual([foos[1]], services)
+
+            services = self.service_registry.get_services(
+                IFoo, properties={'priority__le' : 5, 'language__ne' : 'c'}
+            )
+            self.assertEqual([foos[0], foos[1]], services)
+
+            services = self.service_registry.get_services(
+                IFoo, properties={'language__in' : ['c', 'java']}
+            )
+            self.assertEqual([foos[2]], services)
+
+        # Changing the properties of a service updates the indexes.
+        self.service_registry.set_service_properties(
+            service_ids[0], {'language' : 'java', 'priority' : 20}
+        )
+        service = self.service_registry.get_service(
+            IFoo, properties={'priority__ge' : 20}
+        )
+        self.assertEqual(foos[0], service)
+
+        # ... as does unregistering a service.
+        self.service_registry.unregister_service(service_ids[1])
+        services = self.service_registry.get_services(
+            IFoo, properties={'language' : 'python'}
+        )
+        self.assertEqual([foos[3]], services)
+
+        # Structured queries can be combined with free-form ones.
+        services = self.service_registry.get_services(
+            IFoo, 'priority == 10', properties={'language' : 'c'}
+        )
+        self.assertEqual([foos[2]], services)
+
+        return
+
+    def test_get_services_with_properties_skips_unregistered_services(self):
+        """ get services with properties skips unregistered services """
+
+        class IFoo(Interface):
+            pass
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            pass
+
+        service_registry = self.service_registry
+
+        class Unregister(object):
+            """ A property value that unregisters a service when compared.
+
+            This simulates the service being unregistered (e.g. by another
+            thread) while the registry is matching the property query.
+
+            """
+
+            # Property values that aren't hashable can't be indexed, so the
+            # registry has to check each candidate service in turn.
+            __hash__ = None
+
+            def __eq__(self, other):
+                service_registry.unregister_service(service_ids[1])
+                return True
+
+        foos = [Foo(), Foo()]
+        service_ids = [
+            service_registry.register_service(
+                IFoo, foos[0], {'x' : Unregister()}
+            ),
+            service_registry.register_service(IFoo, foos[1], {'x' : 1})
+        ]
+
+        services = service_registry.get_services(IFoo, properties={'x' : 1})
+        self.assertEqual([foos[0]], services)
+
+        return
+
+    def test_get_service_stops_at_first_match(self):
+        """ get service stops at first match """
+
+        class IFoo(Interface):
+            pass
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            pass
+
+        calls = []
+        def foo_factory(**properties):
+            """ A factory that records each call. """
+
+            calls.append(properties)
+
+            return Foo()
+
+        self.service_registry.register_service(IFoo, foo_factory)
+        self.service_registry.register_service(IFoo, foo_factory)
+
+        # Only the first factory is needed to find one service.
+        service = self.service_registry.get_service(IFoo)
+        self.assertIsInstance(service, Foo)
+        self.assertEqual(1, len(calls))
+
+        # Looking up all of the services needs the other one too.
+        services = self.service_registry.get_services(IFoo)
+        self.assertEqual(2, len(services))
+        self.assertEqual(2, len(calls))
+
+        return
+
+    def test_factory_called_once_by_concurrent_lookups(self):
+        """ factory called once by concurrent lookups """
+
+        class IFoo(Interface):
+            pass
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            pass
+
+        calls = []
+        def foo_factory(**properties):
+            """ A slow factory for foos. """
+
+            calls.append(threading.current_thread())
+            time.sleep(0.1)
+
+            return Foo()
+
+        self.service_registry.register_service(IFoo, foo_factory)
+
+        services = []
+        def lookup():
+            services.append(self.service_registry.get_service(IFoo))
+
+        threads = [threading.Thread(target=lookup) for i in range(8)]
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        # The factory was only called once, and every thread got its product.
+        self.assertEqual(1, len(calls))
+        self.assertEqual(8, len(services))
+        for service in services:
+            self.assertIs(services[0], service)
+
+        return
+
+    def test_failed_factory_is_called_again(self):
+        """ failed factory is called again """
+
+        class IFoo(Interface):
+            pass
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            pass
+
+        calls = []
+        def foo_factory(**properties):
+            """ A factory that fails the first time it is called. """
+
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError('not today')
+
+            return Foo()
+
+        self.service_registry.register_service(IFoo, foo_factory)
+
+        with self.assertRaises(RuntimeError):
+            self.service_registry.get_service(IFoo)
+
+        service = self.service_registry.get_service(IFoo)
+        self.assertEqual(Foo, type(service))
+        self.assertEqual(2, len(calls))
+
+        return
+
+    def test_minimize_and_maximize_follow_trait_changes(self):
+        """ minimize and maximize follow trait changes """
+
+        class IFoo(Interface):
+            price = Int
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            price = Int
+
+        x = Foo(price=10)
+        y = Foo(price=5)
+        z = Foo(price=100)
+
+        for foo in [x, y, z]:
+            self.service_registry.register_service(IFoo, foo)
+
+        get_service = self.service_registry.get_service
+        get_services = self.service_registry.get_services
+
+        self.assertEqual(y, get_service(IFoo, minimize='price'))
+        self.assertEqual(z, get_service(IFoo, maximize='price'))
+
+        # Change a price that the services are ranked by.
+        y.price = 1000
+        self.assertEqual(x, get_service(IFoo, minimize='price'))
+        self.assertEqual(y, get_service(IFoo, maximize='price'))
+        self.assertEqual([x, z, y], get_services(IFoo, minimize='price'))
+        self.assertEqual([y, z, x], get_services(IFoo, maximize='price'))
+
+        # Register and unregister some services.
+        w = Foo(price=1)
+        w_id = self.service_registry.register_service(IFoo, w)
+        self.assertEqual(w, get_service(IFoo, minimize='price'))
+
+        self.service_registry.unregister_service(w_id)
+        self.assertEqual(x, get_service(IFoo, minimize='price'))
+
+        # Queries are applied in ranking order.
+        services = get_services(IFoo, 'price < 500', maximize='price')
+        self.assertEqual([z, x], services)
+
+        return
+
+    def test_minimize_and_maximize_keep_registration_order(self):
+        """ minimize and maximize keep registration order """
+
+        class IFoo(Interface):
+            price = Int
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            price = Int
+
+        services = [Foo(price=price) for price in [2, 1, 2, 1, 3]]
+        for service in services:
+            self.service_registry.register_service(IFoo, service)
+
+        a, b, c, d, e = services
+
+        # Services with equal values are in the order they were registered in
+        # (just like a stable sort).
+        get_services = self.service_registry.get_services
+        self.assertEqual([b, d, a, c, e], get_services(IFoo, minimize='price'))
+        self.assertEqual([e, a, c, b, d], get_services(IFoo, maximize='price'))
+
+        get_service = self.service_registry.get_service
+        self.assertEqual(b, get_service(IFoo, minimize='price'))
+        self.assertEqual(e, get_service(IFoo, maximize='price'))
+
+        e.price = 2
+        self.assertEqual(a, get_service(IFoo, maximize='price'))
+
+        return
+
+    def test_minimize_and_maximize_with_factories_and_non_traits(self):
+        """ minimize and maximize with factories and non traits """
+
+        class IFoo(Interface):
+            price = Int
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            price = Int
+
+        @provides(IFoo)
+        class Bar(object):
+            def __init__(self, price):
+                self.price = price
+
+        x = Foo(price=10)
+        self.service_registry.register_service(IFoo, x)
+        self.service_registry.register_service(
+            IFoo, lambda **properties: Foo(price=5)
+        )
+
+        service = self.service_registry.get_service(IFoo, minimize='price')
+        self.assertEqual(5, service.price)
+
+        # Objects that aren't 'HasTraits' can't be ranked, but are still
+        # found.
+        bar = Bar(price=1)
+        bar_id = self.service_registry.register_service(IFoo, bar)
+        service = self.service_registry.get_service(IFoo, minimize='price')
+        self.assertEqual(bar, service)
+
+        bar.price = 20
+        service = self.service_registry.get_service(IFoo, maximize='price')
+        self.assertEqual(bar, service)
+
+        self.service_registry.unregister_service(bar_id)
+        service = self.service_registry.get_service(IFoo, maximize='price')
+        self.assertEqual(x, service)
+
+        return
+
+    def test_minimize_and_maximize_with_plain_attributes(self):
+        """ minimize and maximize with plain attributes """
+
+        class IFoo(Interface):
+            pass
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            pass
+
+        # The price isn't declared as a trait, so changing it doesn't tell
+        # anybody!
+        x = Foo()
+        x.price = 10
+        y = Foo()
+        y.price = 5
+
+        for foo in [x, y]:
+            self.service_registry.register_service(IFoo, foo)
+
+        get_service = self.service_registry.get_service
+        for i in range(2):
+            self.assertEqual(y, get_service(IFoo, minimize='price'))
+
+        y.price = 1000
+        self.assertEqual(x, get_service(IFoo, minimize='price'))
+        self.assertEqual(y, get_service(IFoo, maximize='price'))
+
+        return
+
+    def test_query_namespace(self):
+        """ query namespace """
+
+        class IFoo(Interface):
+            price = Int
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            price = Int
+
+        x = Foo(price=10)
+        y = Foo(price=20)
+
+        self.service_registry.register_service(IFoo, x, {'size' : 3})
+        self.service_registry.register_service(IFoo, y, {'price' : 1})
+
+        get_services = self.service_registry.get_services
+
+        # Properties take precedence over attributes.
+        self.assertEqual([y], get_services(IFoo, 'price < 5'))
+        self.assertEqual([x], get_services(IFoo, 'size == 3 and price == 10'))
+
+        # Builtins are still available.
+        self.assertEqual([x, y], get_services(IFoo, 'abs(price) > 0'))
+
+        # Names used in nested scopes.
+        self.assertEqual(
+            [x], get_services(IFoo, 'any(p == price for p in [10, 30])')
+        )
+        self.assertEqual([y], get_services(IFoo, '(lambda: price)() == 1'))
+
+        # Names that aren't defined don't match.
+        self.assertEqual([], get_services(IFoo, 'colour == "red"'))
+
+        return
+
+    def test_register_and_unregister_services(self):
+        """ register and unregister services """
+
+        class IFoo(Interface):
+            pass
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            pass
+
+        class IBar(Interface):
+            pass
+
+        @provides(IBar)
+        class Bar(HasTraits):
+            pass
+
+        events = []
+        def listener(obj, trait_name, old, new):
+            events.append((trait_name, new))
+
+        self.service_registry.on_trait_change(listener)
+
+        x, y, z = Foo(), Foo(), Bar()
+        service_ids = self.service_registry.register_services([
+            (IFoo, x, {'size' : 1}), (IFoo, y), (IBar, z)
+        ])
+        self.assertEqual(3, len(service_ids))
+        self.assertEqual([x, y], self.service_registry.get_services(IFoo))
+        self.assertEqual(
+            [x], self.service_registry.get_services(IFoo, 'size == 1')
+        )
+        self.assertEqual(
+            {'size' : 1},
+            self.service_registry.get_service_properties(service_ids[0])
+        )
+
+        # One event is fired per service, one for the batch, and one per
+        # protocol.
+        self.assertEqual(
+            [
+                ('registered', service_ids[0]),
+                ('registered', service_ids[1]),
+                ('registered', service_ids[2]),
+                ('services_registered', service_ids)
+            ],
+            events
+        )
+
+        # If any of the services don't exist then none are unregistered.
+        with self.assertRaises(ValueError):
+            self.service_registry.unregister_services([service_ids[0], -1])
+
+        self.assertEqual([x, y], self.service_registry.get_services(IFoo))
+
+        del events[:]
+        self.service_registry.unregister_services(service_ids[:2])
+        self.assertEqual([], self.service_registry.get_services(IFoo))
+        self.assertEqual([z], self.service_registry.get_services(IBar))
+        self.assertEqual(
+            [
+                ('unregistered', service_ids[0]),
+                ('unregistered', service_ids[1]),
+                ('services_unregistered', service_ids[:2])
+            ],
+            events
+        )
+
+        return
+
+    def test_monitor(self):
+        """ monitor """
+
+        class IFoo(Interface):
+            pass
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            pass
+
+        monitor = ServiceRegistryMonitor()
+        self.service_registry.service_registry.monitor = monitor
+
+        self.service_registry.register_service(IFoo, lambda **kw: Foo())
+        self.service_registry.get_service(IFoo)
+        self.service_registry.get_service(IFoo, 'colour == "red"')
+        self.service_registry.get_services('foo.IBar')
+
+        protocols = monitor.snapshot()['protocols']
+
+        statistics = protocols[IFoo.__module__ + '.IFoo']
+        self.assertEqual(2, statistics['lookups'])
+        self.assertEqual(1, statistics['misses'])
+        self.assertEqual(2, sum(statistics['lookup_time']['histogram']))
+        self.assertEqual(1, statistics['query_failures'])
+        self.assertEqual({'NameError' : 1}, statistics['query_errors'])
+        self.assertEqual(1, statistics['factories'])
+        self.assertEqual(0, statistics['factory_failures'])
+
+        self.assertEqual(1, protocols['foo.IBar']['misses'])
+
+        # The snapshot can be serialized as JSON.
+        self.assertEqual(
+            monitor.snapshot(), json.loads(monitor.to_json())
+        )
+
+        monitor.reset()
+        self.assertEqual({}, monitor.snapshot()['protocols'])
+
+        return
+
+    def test_idle_services_are_evicted(self):
+        """ idle services are evicted """
+
+        class IFoo(Interface):
+            pass
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            pass
+
+        registry = self.service_registry.service_registry
+        registry.register_service(
+            IFoo, lambda **properties: Foo(), policy=ServicePolicy(
+                idle_timeout=0.05
+            )
+        )
+
+        foo = registry.get_service(IFoo)
+        self.assertEqual(Foo, type(foo))
+
+        # Not idle for long enough...
+        registry.evict_idle_services()
+        self.assertIs(foo, registry.get_service(IFoo))
+
+        # ... but now it is!
+        time.sleep(0.1)
+        registry.evict_idle_services()
+        service = registry.get_service(IFoo)
+        self.assertEqual(Foo, type(service))
+        self.assertIsNot(foo, service)
+
+        return
+
+    def test_least_recently_used_services_are_evicted(self):
+        """ least recently used services are evicted """
+
+        class IFoo(Interface):
+            pass
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            pass
+
+        calls = []
+        def factory(**properties):
+            calls.append(properties['name'])
+            return Foo()
+
+        registry = self.service_registry.service_registry
+        policy = ServicePolicy(capacity=2)
+        for name in ['a', 'b', 'c']:
+            registry.register_service(IFoo, factory, {'name' : name}, policy)
+
+        # Structured queries don't call the factories of services that don't
+        # match.
+        def get(name):
+            return registry.get_service(IFoo, properties={'name' : name})
+
+        a = get('a')
+        b = get('b')
+        self.assertIs(a, get('a'))
+        self.assertEqual(['a', 'b'], calls)
+
+        # 'b' is the least recently used service so it gets evicted.
+        c = get('c')
+        self.assertIs(a, get('a'))
+        self.assertIs(c, get('c'))
+        self.assertEqual(['a', 'b', 'c'], calls)
+
+        self.assertIsNot(b, get('b'))
+        self.assertEqual(['a', 'b', 'c', 'b'], calls)
+
+        return
+
+    def test_pooled_services(self):
+        """ pooled services """
+
+        class IFoo(Interface):
+            pass
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            pass
+
+        registry = self.service_registry.service_registry
+
+        foo_factory = lambda **properties: Foo()
+        service_id = registry.register_service(
+            IFoo, foo_factory, policy=ServicePolicy(
+                pool_size=2, idle_timeout=0.05
+            )
+        )
+
+        services = [registry.get_service(IFoo) for i in range(4)]
+        self.assertIsNot(services[0], services[1])
+        self.assertEqual(services[:2], services[2:])
+
+        # The registered factory is returned for the service's Id (rather than
+        # the pool).
+        self.assertIs(foo_factory, registry.get_service_from_id(service_id))
+
+        # The whole pool is evicted when it is idle.
+        time.sleep(0.1)
+        registry.evict_idle_services()
+        self.assertNotIn(registry.get_service(IFoo), services)
+
+        return
+
+    def test_generations(self):
+        """ generations """
+
+        class IFoo(Interface):
+            pass
+
+        @provides(IFoo)
+        class Foo(HasTraits):
+            pass
+
+        registry = self.service_registry
+        self.assertEqual(0, registry.get_services_generation())
+        self.assertEqual(0, registry.get_services_generation(IFoo))
+
+        # Each change moves the protocol (and the registry) on to the next
+        # generation.
+        generations = []
+        service_id = registry.register_service(IFoo, Foo())
+        generations.append(registry.get_services_generation(IFoo))
+        registry.set_service_properties(service_id, {'x' : 1})
+        generations.append(registry.get_services_generation(IFoo))
+        registry.register_services([(IFoo, Foo()), (IFoo, Foo())])
+        generations.append(registry.get_services_generation(IFoo))
+        registry.unregister_service(service_id)
+        generations.append(registry.get_services_generation(IFoo))
+
+        self.assertEqual(sorted(set(generations)), generations)
+        self.assertEqual(
+            generations[-1], registry.get_services_generation()
+        )
+
+        # Lookups don't change anything, and neither do changes to the
+        # services registered for other protocols.
+        registry.get_services(IFoo)
+        registry.register_service('foo.IBar', Foo())
+        self.assertEqual(
+            generations[-1], registry.get_services_generation(IFoo)
+        )
+        self.assertTrue(registry.get_services_generation() > generations[-1])
+
+        # The protocol can also be specified by name.
+        self.assertEqual(
+            generations[-1],
+            registry.get_services_generation(IFoo.__module__ + '.IFoo')
+        )
+
+        return
+
 
 # Entry point for stand-alone testing.
 if __name__ == '__main__':
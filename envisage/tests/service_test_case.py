@@ -1,9 +1,13 @@
 """ Tests for the 'Service' trait type. """
 
 
+# Standard library imports.
+import gc
+import weakref
+
 # Enthought library imports.
-from envisage.api import Application, Plugin, Service
-from traits.api import HasTraits, Instance
+from envisage.api import Application, Plugin, Service, ServiceRegistry
+from traits.api import HasTraits, Instance, Int
 from traits.testing.unittest_tools import unittest
 
 
@@ -84,6 +88,126 @@ class ServiceTestCase(unittest.TestCase):
 
         return
 
+    def test_cached_service_trait_type(self):
+        """ cached service trait type """
+
+        class Foo(HasTraits):
+            price = Int
+
+        class Bar(HasTraits):
+            pass
+
+        class Baz(HasTraits):
+            service_registry = Instance(ServiceRegistry, ())
+
+            foo = Service(Foo, minimize='price', cache=True)
+
+        baz = Baz()
+        service_registry = baz.service_registry
+        self.assertEqual(None, baz.foo)
+
+        # Registering a service that provides the protocol invalidates the
+        # cached value.
+        expensive = Foo(price=100)
+        expensive_id = service_registry.register_service(Foo, expensive)
+        self.assertIs(expensive, baz.foo)
+
+        # The cached value is used until something changes...
+        calls = []
+        get_service = service_registry.get_service
+        def counting_get_service(*args):
+            calls.append(args)
+            return get_service(*args)
+
+        service_registry.get_service = counting_get_service
+        for i in range(3):
+            self.assertIs(expensive, baz.foo)
+        self.assertEqual(0, len(calls))
+
+        # ... and registering services for other protocols doesn't count.
+        service_registry.register_service(Bar, Bar())
+        self.assertIs(expensive, baz.foo)
+        self.assertEqual(0, len(calls))
+
+        cheap = Foo(price=10)
+        service_registry.register_service(Foo, cheap)
+        self.assertIs(cheap, baz.foo)
+        self.assertEqual(1, len(calls))
+
+        # Unregistering a service invalidates the cached value too.
+        service_registry.unregister_service(expensive_id)
+        self.assertIs(cheap, baz.foo)
+        self.assertEqual(2, len(calls))
+
+        return
+
+    def test_cached_service_trait_type_in_plugin(self):
+        """ cached service trait type in plugin """
+
+        class Foo(HasTraits):
+            pass
+
+        class PluginA(Plugin):
+            id = 'A'
+            foo = Instance(Foo, (), service=True)
+
+        class PluginB(Plugin):
+            id = 'B'
+            foo = Service(Foo, cache=True)
+
+        a = PluginA()
+        b = PluginB()
+
+        application = TestApplication(plugins=[a, b])
+        self.assertEqual(None, b.foo)
+
+        # The application delegates the services generation to the registry,
+        # so the cached value is thrown away when the service is registered
+        # and unregistered.
+        application.start()
+        self.assertEqual(a.foo, b.foo)
+
+        application.stop()
+        self.assertEqual(None, b.foo)
+
+        return
+
+    def test_cache_does_not_keep_objects_alive(self):
+        """ cache does not keep objects alive """
+
+        class Foo(HasTraits):
+            application = Instance(Application)
+
+        class PluginA(Plugin):
+            id = 'A'
+            foo = Instance(Foo, service=True)
+
+            def _foo_default(self):
+                return Foo(application=self.application)
+
+        class PluginB(Plugin):
+            id = 'B'
+            foo = Service(Foo, cache=True)
+
+        a = PluginA()
+        b = PluginB()
+
+        application = TestApplication(plugins=[a, b])
+        application.start()
+
+        # The cached service refers back to the application.
+        self.assertIs(application, b.foo.application)
+
+        application_ref = weakref.ref(application)
+        b_ref = weakref.ref(b)
+        del a, b, application
+        gc.collect()
+
+        self.assertIsNone(application_ref())
+        self.assertIsNone(b_ref())
+
+        return
+
 
 # Entry point for stand-alone testing.
 if __name__ == '__main__':
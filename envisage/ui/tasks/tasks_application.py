@@ -308,10 +308,19 @@ class TasksApplication(Application):
     def _get_task_factory(self, id):
         """ Returns the TaskFactory with the specified ID, or None.
         """
-        for factory in self.task_factories:
-            if factory.id == id:
-                return factory
-        return None
+        # The task factories extension point (declared by the tasks plugin) is
+        # keyed by ID, so the registry can find the factory without scanning
+        # all of them.
+        try:
+            return self.get_keyed_extension(self.TASK_FACTORIES, id)
+
+        # ... unless the extension point has been replaced by one that isn't
+        # keyed, in which case we have to scan them after all.
+        except ValueError:
+            for factory in self.task_factories:
+                if factory.id == id:
+                    return factory
+            return None
 
     def _prepare_exit(self):
         """ Called immediately before the extant windows are destroyed and the
@@ -63,6 +63,7 @@ class TasksPlugin(Plugin):
     tasks = ExtensionPoint(
         List(Instance('envisage.ui.tasks.task_factory.TaskFactory')),
         id=TASKS,
+        key='id',
         desc="""
 
         This extension point makes tasks avaiable to the application.
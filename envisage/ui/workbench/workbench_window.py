@@ -166,11 +166,12 @@ class WorkbenchWindow(pyface.WorkbenchWindow):
     # 'IServiceRegistry' interface.
     ###########################################################################
 
-    def get_service(self, protocol, query='', minimize='', maximize=''):
+    def get_service(self, protocol, query='', minimize='', maximize='',
+                    properties=None):
         """ Return at most one service that matches the specified query. """
 
         service = self.service_registry.get_service(
-            protocol, query, minimize, maximize
+            protocol, query, minimize, maximize, properties
         )
 
         return service
@@ -180,20 +181,21 @@ class WorkbenchWindow(pyface.WorkbenchWindow):
 
         return self.service_registry.get_service_properties(service_id)
 
-    def get_services(self, protocol, query='', minimize='', maximize=''):
+    def get_services(self, protocol, query='', minimize='', maximize='',
+                     properties=None):
         """ Return all services that match the specified query. """
 
         services = self.service_registry.get_services(
-            protocol, query, minimize, maximize
+            protocol, query, minimize, maximize, properties
         )
 
         return services
 
-    def register_service(self, protocol, obj, properties=None):
+    def register_service(self, protocol, obj, properties=None, policy=None):
         """ Register a service. """
 
         service_id = self.service_registry.register_service(
-            protocol, obj, properties
+            protocol, obj, properties, policy
         )
 
         return service_id
@@ -241,7 +243,8 @@ class WorkbenchWindow(pyface.WorkbenchWindow):
         service_id = self.register_service(
             protocol   = service_offer.protocol,
             obj        = service_offer.factory,
-            properties = service_offer.properties
+            properties = service_offer.properties,
+            policy     = service_offer.policy
         )
 
         return service_id